@@ -17,7 +17,9 @@ try:
 except ImportError:
     HAS_PSYCOPG2 = False
 
-from spiderfoot import SpiderFootPlugin
+import threading
+
+from spiderfoot import SpiderFootDb, SpiderFootEventWriter, SpiderFootPlugin
 
 
 class sfp__stor_db(SpiderFootPlugin):
@@ -91,6 +93,10 @@ class sfp__stor_db(SpiderFootPlugin):
         self.sf = sfc
         self.errorState = False
         self.pg_conn = None
+        self.pg_db = None
+        self.pg_writer = None
+        self.writer = None
+        self.writerLock = threading.Lock()
         
         # CRITICAL FIX: Properly initialize the database handle from SpiderFoot
         if not hasattr(sfc, 'dbh') or sfc.dbh is None:
@@ -145,16 +151,26 @@ class sfp__stor_db(SpiderFootPlugin):
         return True
 
     def _connect_postgresql(self):
-        """Establish PostgreSQL connection."""
+        """Open the PostgreSQL database, setting up its schema if needed."""
+        if self.pg_writer is not None:
+            # events the old connection could not write go to SQLite
+            try:
+                self.pg_writer.flush()
+            except IOError as e:
+                self.error(f"Failed to store events in PostgreSQL: {e}")
+            self.pg_writer = None
+
         try:
-            self.pg_conn = psycopg2.connect(
+            dsn = psycopg2.extensions.make_dsn(
                 host=self.opts['postgresql_host'],
                 port=int(self.opts['postgresql_port']),
-                database=self.opts['postgresql_database'],
+                dbname=self.opts['postgresql_database'],
                 user=self.opts['postgresql_username'],
                 password=self.opts['postgresql_password'],
                 connect_timeout=self.opts['postgresql_timeout']
             )
+            self.pg_db = SpiderFootDb({'__dbtype': 'postgresql', '__database': dsn})
+            self.pg_conn = self.pg_db.conn
             self.debug("Connected to PostgreSQL database")
         except Exception as e:
             self.error(f"Could not connect to PostgreSQL database: {e}")
@@ -216,7 +232,9 @@ class sfp__stor_db(SpiderFootPlugin):
 
     def _store_sqlite(self, sfEvent):
         """Store the event in the SQLite database.
-        
+
+        Events are written in batches by a SpiderFootEventWriter.
+
         Args:
             sfEvent: SpiderFoot event
         """
@@ -224,63 +242,73 @@ class sfp__stor_db(SpiderFootPlugin):
         if not self.__sfdb__:
             self.error("Database handle not available for SQLite storage")
             return
-            
-        if self.opts['maxstorage'] != 0 and len(sfEvent.data) > self.opts['maxstorage']:
-            self.debug("Storing an event: " + sfEvent.eventType)
-            self.__sfdb__.scanEventStore(
-                self.getScanId(), sfEvent, self.opts['maxstorage'])
-            return
+
+        # also called from the PostgreSQL writer's thread, for events it
+        # could not write
+        with self.writerLock:
+            if self.writer is None:
+                self.writer = SpiderFootEventWriter(
+                    self.__sfdb__, self.getScanId(), self.opts['maxstorage'],
+                    name=f"{getattr(self, '__name__', self.__class__.__name__)}_writer")
 
         self.debug("Storing an event: " + sfEvent.eventType)
-        self.__sfdb__.scanEventStore(self.getScanId(), sfEvent)
+        self.writer.store(sfEvent)
+
+    def finish(self):
+        """Write any events still waiting to be stored."""
+        # PostgreSQL first, as events it fails to write are stored in SQLite
+        if self.pg_writer is not None:
+            try:
+                self.pg_writer.flush()
+            except IOError as e:
+                self.error(f"Failed to store events in PostgreSQL: {e}")
+
+        if self.writer is None:
+            return
+
+        try:
+            self.writer.flush()
+        except IOError as e:
+            self.error(f"Failed to store events: {e}")
 
     def _store_postgresql(self, sfEvent):
         """Store the event in the PostgreSQL database.
 
+        Events are written in batches by a SpiderFootEventWriter, and
+        stored in SQLite instead if they can't be written.
+
         Args:
             sfEvent: SpiderFoot event
         """
-        try:
-            cursor = self.pg_conn.cursor()
+        if self.pg_writer is None:
+            scanId = self.getScanId()
+            try:
+                # results reference their scan, so it must exist in this database too
+                if not self.pg_db.scanInstanceGet(scanId):
+                    scanInfo = self.__sfdb__.scanInstanceGet(scanId)
+                    self.pg_db.scanInstanceCreate(scanId, scanInfo[0], scanInfo[1])
+            except Exception as e:
+                self.error(f"Error creating scan in PostgreSQL: {e}")
+                self.debug("Falling back to SQLite storage")
+                self._store_sqlite(sfEvent)
+                return
 
-            # Truncate data if necessary
-            data = sfEvent.data
-            if self.opts['maxstorage'] != 0 and len(data) > self.opts['maxstorage']:
-                data = data[:self.opts['maxstorage']]
-
-            # CORRECTED: Use proper table and column names matching the schema
-            cursor.execute(
-                """INSERT INTO tbl_scan_results 
-                   (scan_instance_id, hash, type, generated, confidence, 
-                    visibility, risk, module, data, source_event_hash) 
-                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)""",
-                (
-                    self.getScanId(),
-                    sfEvent.hash,
-                    sfEvent.eventType,
-                    sfEvent.generated,
-                    sfEvent.confidence,
-                    sfEvent.visibility,
-                    sfEvent.risk,
-                    sfEvent.module,
-                    data,
-                    getattr(sfEvent, 'sourceEventHash', 'ROOT')
-                )
-            )
+            self.pg_writer = SpiderFootEventWriter(
+                self.pg_db, scanId, self.opts['maxstorage'],
+                name=f"{getattr(self, '__name__', self.__class__.__name__)}_pg_writer",
+                fallback=self._store_fallback)
 
-            self.pg_conn.commit()
-            cursor.close()
+        self.debug("Storing an event in PostgreSQL: " + sfEvent.eventType)
+        self.pg_writer.store(sfEvent)
 
-            self.debug("Stored event in PostgreSQL: " + sfEvent.eventType)
-        except Exception as e:
-            self.error(f"Error storing event in PostgreSQL: {e}")
-            if self.pg_conn:
-                try:
-                    self.pg_conn.rollback()
-                except:
-                    pass
-            # Fall back to SQLite storage
-            self.debug("Falling back to SQLite storage")
+    def _store_fallback(self, sfEvents):
+        """Store events which could not be written to PostgreSQL in SQLite.
+
+        Args:
+            sfEvents (list): SpiderFoot events
+        """
+        self.debug(f"Falling back to SQLite storage for {len(sfEvents)} events")
+        for sfEvent in sfEvents:
             self._store_sqlite(sfEvent)
 
     def __del__(self):
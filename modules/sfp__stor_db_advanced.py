@@ -49,7 +49,7 @@ try:
 except ImportError:
     HAS_ELASTICSEARCH = False
 
-from spiderfoot import SpiderFootPlugin
+from spiderfoot import SpiderFootDb, SpiderFootEventWriter, SpiderFootPlugin
 
 
 @dataclass
@@ -82,6 +82,7 @@ class ConnectionLoadBalancer:
     def __init__(self, configs: List[Dict[str, Any]]):
         self.configs = configs
         self.pools = {}
+        self.databases = {}
         self.metrics = {}
         self.health_status = {}
         self.lock = threading.RLock()
@@ -111,8 +112,8 @@ class ConnectionLoadBalancer:
                 logging.error(f"Failed to initialize pool {pool_id}: {e}")
                 self.health_status[pool_id] = False
     
-    def get_optimal_connection(self, query_type: str = None) -> Tuple[str, Any]:
-        """Get the optimal connection based on load balancing algorithms."""
+    def get_optimal_pool(self) -> str:
+        """Get the healthy pool with the lowest load factor."""
         with self.lock:
             available_pools = [
                 (pool_id, pool) for pool_id, pool in self.pools.items() 
@@ -123,8 +124,36 @@ class ConnectionLoadBalancer:
                 raise RuntimeError("No healthy database connections available")
             
             # Load balancing algorithm: weighted round-robin
-            best_pool_id = min(available_pools, 
-                             key=lambda x: self.metrics[x[0]].load_factor)[0]
+            return min(available_pools, 
+                       key=lambda x: self.metrics[x[0]].load_factor)[0]
+
+    def get_database(self, pool_id: str) -> SpiderFootDb:
+        """Get a SpiderFootDb for the database of a pool, opened on first use.
+
+        Events are stored through it rather than with INSERTs on pooled
+        connections, so that the scan's result summary and value index are
+        updated in the same transaction.
+        """
+        with self.lock:
+            dbh = self.databases.get(pool_id)
+            if dbh is None:
+                config = self.configs[int(pool_id.rsplit('_', 1)[1])]
+                dsn = psycopg2.extensions.make_dsn(
+                    host=config['host'],
+                    port=config['port'],
+                    dbname=config['database'],
+                    user=config['username'],
+                    password=config['password'],
+                    connect_timeout=config.get('timeout', 30)
+                )
+                dbh = SpiderFootDb({'__dbtype': 'postgresql', '__database': dsn})
+                self.databases[pool_id] = dbh
+            return dbh
+
+    def get_optimal_connection(self, query_type: str = None) -> Tuple[str, Any]:
+        """Get the optimal connection based on load balancing algorithms."""
+        with self.lock:
+            best_pool_id = self.get_optimal_pool()
             
             try:
                 conn = self.pools[best_pool_id].getconn()
@@ -141,19 +170,23 @@ class ConnectionLoadBalancer:
         with self.lock:
             try:
                 self.pools[pool_id].putconn(conn)
-                metrics = self.metrics[pool_id]
-                metrics.total_queries += 1
-                if success:
-                    metrics.successful_queries += 1
-                else:
-                    metrics.failed_queries += 1
-                    
-                # Update load factor
-                metrics.load_factor = (metrics.total_queries - metrics.successful_queries) / max(metrics.total_queries, 1)
-                
+                self.record_result(pool_id, success)
             except Exception as e:
                 logging.error(f"Failed to return connection to {pool_id}: {e}")
 
+    def record_result(self, pool_id: str, success: bool = True):
+        """Update the metrics of a pool after a query on its database."""
+        with self.lock:
+            metrics = self.metrics[pool_id]
+            metrics.total_queries += 1
+            if success:
+                metrics.successful_queries += 1
+            else:
+                metrics.failed_queries += 1
+                
+            # Update load factor
+            metrics.load_factor = (metrics.total_queries - metrics.successful_queries) / max(metrics.total_queries, 1)
+
 
 class QueryOptimizer:
     """Advanced query optimizer with prepared statements and AI-powered optimization."""
@@ -531,6 +564,8 @@ class sfp__stor_db_advanced(SpiderFootPlugin):
         self.errorState = False
         self.event_buffer = []
         self.buffer_lock = threading.Lock()
+        self.writer = None
+        self.pool_scans = set()
         
         # Initialize database handle
         if not hasattr(sfc, 'dbh') or sfc.dbh is None:
@@ -649,84 +684,62 @@ class sfp__stor_db_advanced(SpiderFootPlugin):
                 self._store_single_event(event)
 
     def _bulk_store_with_load_balancing(self, events: List[Any]):
-        """Store events using load-balanced connections."""
-        pool_id, conn = self.load_balancer.get_optimal_connection('bulk_insert')
+        """Store events in the least loaded database, in one transaction."""
+        pool_id = self.load_balancer.get_optimal_pool()
+        success = False
         
         try:
-            cursor = conn.cursor()
-            
-            # Prepare bulk insert data
-            insert_data = []
-            for event in events:
-                data = event.data
-                if self.opts['maxstorage'] != 0 and len(data) > self.opts['maxstorage']:
-                    data = data[:self.opts['maxstorage']]
-                
-                insert_data.append((
-                    self.getScanId(),
-                    event.hash,
-                    event.eventType,
-                    event.generated,
-                    event.confidence,
-                    event.visibility,
-                    event.risk,
-                    event.module,
-                    data,
-                    getattr(event, 'sourceEventHash', 'ROOT')
-                ))
-            
-            # Use optimized bulk insert
-            if self.query_optimizer:
-                optimized_query = self.query_optimizer._optimize_for_bulk(
-                    """INSERT INTO tbl_scan_results 
-                       (scan_instance_id, hash, type, generated, confidence, 
-                        visibility, risk, module, data, source_event_hash) 
-                       VALUES %s"""
-                )
-            else:
-                optimized_query = """INSERT INTO tbl_scan_results 
-                                   (scan_instance_id, hash, type, generated, confidence, 
-                                    visibility, risk, module, data, source_event_hash) 
-                                   VALUES %s"""
-            
-            from psycopg2.extras import execute_values
-            execute_values(cursor, optimized_query, insert_data, page_size=1000)
-            
-            conn.commit()
-            cursor.close()
-            
-            self.load_balancer.return_connection(pool_id, conn, True)
+            dbh = self._pool_database(pool_id)
+            dbh.scanEventStoreMany(self.getScanId(), events, self.opts['maxstorage'])
+            success = True
             self.debug(f"Bulk stored {len(events)} events using load balancer")
             
         except Exception as e:
             self.error(f"Bulk store failed: {e}")
-            if conn:
-                try:
-                    conn.rollback()
-                except:
-                    pass
-            self.load_balancer.return_connection(pool_id, conn, False)
             raise
 
+        finally:
+            self.load_balancer.record_result(pool_id, success)
+
+    def _pool_database(self, pool_id: str) -> SpiderFootDb:
+        """Get the SpiderFootDb of a load-balanced database, with this scan
+        created in it."""
+        dbh = self.load_balancer.get_database(pool_id)
+        if pool_id not in self.pool_scans:
+            scanId = self.getScanId()
+            # results reference their scan, so it must exist in this database too
+            if not dbh.scanInstanceGet(scanId):
+                scanInfo = self.__sfdb__.scanInstanceGet(scanId)
+                dbh.scanInstanceCreate(scanId, scanInfo[0], scanInfo[1])
+            self.pool_scans.add(pool_id)
+        return dbh
+
     def _bulk_store_sqlite(self, events: List[Any]):
-        """Bulk store events in SQLite."""
+        """Bulk store events in SQLite, group-committed by a SpiderFootEventWriter."""
+        if self.writer is None:
+            self.writer = SpiderFootEventWriter(
+                self.__sfdb__, self.getScanId(), self.opts['maxstorage'],
+                batchSize=self.opts['bulk_insert_threshold'],
+                name=f"{getattr(self, '__name__', self.__class__.__name__)}_writer")
+
         for event in events:
-            if self.opts['maxstorage'] != 0 and len(event.data) > self.opts['maxstorage']:
-                self.__sfdb__.scanEventStore(
-                    self.getScanId(), event, self.opts['maxstorage']
-                )
-            else:
-                self.__sfdb__.scanEventStore(self.getScanId(), event)
+            self.writer.store(event)
+
+    def finish(self):
+        """Store buffered events, and wait until they have been written."""
+        with self.buffer_lock:
+            self._process_event_buffer()
+
+        if self.writer is not None:
+            try:
+                self.writer.flush()
+            except IOError as e:
+                self.error(f"Failed to store events: {e}")
 
     def _store_single_event(self, sfEvent):
         """Store single event (fallback method)."""
         try:
-            if self.opts['maxstorage'] != 0 and len(sfEvent.data) > self.opts['maxstorage']:
-                self.__sfdb__.scanEventStore(
-                    self.getScanId(), sfEvent, self.opts['maxstorage']
-                )
-            else:
-                self.__sfdb__.scanEventStore(self.getScanId(), sfEvent)
+            self.__sfdb__.scanEventStoreMany(self.getScanId(), [sfEvent], self.opts['maxstorage'])
         except Exception as e:
             self.error(f"Failed to store single event: {e}")
 
@@ -795,6 +808,12 @@ class sfp__stor_db_advanced(SpiderFootPlugin):
                         self.debug(f"Closed connection pool {pool_id}")
                     except Exception as e:
                         self.error(f"Error closing pool {pool_id}: {e}")
+                for pool_id, dbh in self.load_balancer.databases.items():
+                    try:
+                        dbh.close()
+                    except Exception as e:
+                        self.error(f"Error closing database of pool {pool_id}: {e}")
+                self.load_balancer.databases.clear()
             
             self.debug("Graceful shutdown completed")
         except Exception as e:
@@ -56,6 +56,7 @@ class sfp_abstractapi(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
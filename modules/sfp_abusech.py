@@ -78,6 +78,7 @@ class sfp_abusech(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
@@ -45,6 +45,7 @@ class sfp_adguard_dns(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
@@ -48,6 +48,7 @@ class sfp_azureblobstorage(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     s3results = None
 
     def __init__(self):
@@ -51,6 +51,7 @@ class sfp_binstring(SpiderFootPlugin):
     d = None
     n = None
     fq = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
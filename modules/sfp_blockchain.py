@@ -47,6 +47,7 @@ class sfp_blockchain(SpiderFootPlugin):
     optdescs = {}
 
     results = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
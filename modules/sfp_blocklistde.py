@@ -57,6 +57,7 @@ class sfp_blocklistde(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
@@ -45,6 +45,7 @@ class sfp_botvrij(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
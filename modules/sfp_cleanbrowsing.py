@@ -55,6 +55,7 @@ class sfp_cleanbrowsing(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
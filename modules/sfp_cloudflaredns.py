@@ -47,6 +47,7 @@ class sfp_cloudflaredns(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
@@ -48,6 +48,7 @@ class sfp_cloudfront(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     # CloudFront domains to check against
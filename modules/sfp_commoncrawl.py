@@ -53,6 +53,7 @@ class sfp_commoncrawl(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     indexBase = list()
     errorState = False
 
@@ -49,6 +49,7 @@ class sfp_comodo(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     def __init__(self):
         super().__init__()
@@ -38,6 +38,9 @@ class sfp_crossref(SpiderFootPlugin):
 
     fetched = None
 
+    # handleEvent() sets moduleDataSource on the incoming event
+    _mutatesEvents = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.fetched = self.tempStorage()
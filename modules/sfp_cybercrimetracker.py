@@ -50,6 +50,7 @@ class sfp_cybercrimetracker(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
@@ -50,6 +50,7 @@ class sfp_digitaloceanspace(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     s3results = dict()
     lock = None
 
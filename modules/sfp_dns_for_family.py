@@ -44,6 +44,7 @@ class sfp_dns_for_family(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
@@ -65,6 +65,7 @@ class sfp_dnsgrep(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
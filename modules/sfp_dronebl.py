@@ -58,6 +58,7 @@ class sfp_dronebl(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     checks = {
         "127.0.0.3": "dronebl.org - IRC Drone",
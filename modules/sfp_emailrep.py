@@ -54,6 +54,7 @@ class sfp_emailrep(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
     errorWarned = False
 
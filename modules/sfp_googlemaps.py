@@ -57,6 +57,7 @@ class sfp_googlemaps(SpiderFootPlugin):
         "api_key": "Google Geocoding API Key."
     }
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
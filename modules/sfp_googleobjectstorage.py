@@ -50,6 +50,7 @@ class sfp_googleobjectstorage(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     gosresults = dict()
     lock = None
 
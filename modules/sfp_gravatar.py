@@ -50,6 +50,7 @@ class sfp_gravatar(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     reportedUsers = None
 
     def setup(self, sfc, userOpts=dict()):
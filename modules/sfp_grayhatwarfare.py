@@ -61,6 +61,7 @@ class sfp_grayhatwarfare(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
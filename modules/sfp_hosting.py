@@ -36,6 +36,7 @@ class sfp_hosting(SpiderFootPlugin):
 
     # Target
     results = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
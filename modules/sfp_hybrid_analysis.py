@@ -60,6 +60,7 @@ class sfp_hybrid_analysis(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
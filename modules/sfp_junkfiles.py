@@ -43,6 +43,7 @@ class sfp_junkfiles(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     hosts = None
     skiphosts = None
     bases = None
@@ -69,6 +69,7 @@ class sfp_mnemonic(SpiderFootPlugin):
 
     cohostcount = 0
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
@@ -49,6 +49,7 @@ class sfp_opendns(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     checks = {
         "146.112.61.105": "OpenDNS - Botnet",
@@ -26,6 +26,7 @@ class sfp_pgp(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     # Sample key servers:
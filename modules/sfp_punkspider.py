@@ -44,6 +44,7 @@ class sfp_punkspider(SpiderFootPlugin):
     # or you run the risk of data persisting between scan runs.
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
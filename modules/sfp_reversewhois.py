@@ -43,6 +43,7 @@ class sfp_reversewhois(SpiderFootPlugin):
     # or you run the risk of data persisting between scan runs.
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
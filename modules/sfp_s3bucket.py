@@ -51,6 +51,7 @@ class sfp_s3bucket(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     s3results = dict()
     lock = None
 
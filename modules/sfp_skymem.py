@@ -37,6 +37,7 @@ class sfp_skymem(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     # Default options
     opts = {
@@ -47,6 +47,8 @@ class sfp_slideshare(SpiderFootPlugin):
     optdescs = {
     }
 
+    _uniqueEvents = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.results = self.tempStorage()
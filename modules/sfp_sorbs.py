@@ -61,6 +61,7 @@ class sfp_sorbs(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     # Zones:
     # "http.dnsbl.sorbs.net": "127.0.0.2",
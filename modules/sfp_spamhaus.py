@@ -62,6 +62,7 @@ class sfp_spamhaus(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     checks = {
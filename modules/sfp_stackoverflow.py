@@ -57,6 +57,7 @@ class sfp_stackoverflow(SpiderFootPlugin):
 
     # Results Tracking
     results = None
+    _uniqueEvents = True
 
     # Tracking the error state of the module
     errorState = False
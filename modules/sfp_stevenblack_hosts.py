@@ -43,6 +43,7 @@ class sfp_stevenblack_hosts(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
@@ -36,6 +36,7 @@ class sfp_subdomain_takeover(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
     fingerprints = dict()
 
@@ -176,6 +176,7 @@ class sfp_template(SpiderFootPlugin):
 
     # Tracking results can be helpful to avoid reporting/processing duplicates
     results = None
+    _uniqueEvents = True
 
     # Tracking the error state of the module can be useful to detect when a third party
     # has failed and you don't wish to process any more events.
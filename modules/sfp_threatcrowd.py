@@ -63,6 +63,7 @@ class sfp_threatcrowd(SpiderFootPlugin):
     # or you run the risk of data persisting between scan runs.
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
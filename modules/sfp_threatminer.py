@@ -69,6 +69,7 @@ class sfp_threatminer(SpiderFootPlugin):
     # or you run the risk of data persisting between scan runs.
 
     results = None
+    _uniqueEvents = True
     cohostcount = 0
     reportedhosts = None
     checkedips = None
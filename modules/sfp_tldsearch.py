@@ -47,6 +47,7 @@ class sfp_tldsearch(SpiderFootPlugin):
 
     # Internal results tracking
     results = None
+    _uniqueEvents = True
 
     # Track TLD search results between threads
     tldResults = dict()
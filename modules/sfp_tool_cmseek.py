@@ -48,6 +48,7 @@ class sfp_tool_cmseek(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
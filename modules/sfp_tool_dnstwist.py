@@ -53,6 +53,7 @@ class sfp_tool_dnstwist(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
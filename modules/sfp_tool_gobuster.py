@@ -80,6 +80,7 @@ class sfp_tool_gobuster(SpiderFootPlugin):
 
     # Target
     results = None
+    _uniqueEvents = True
 
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
@@ -49,6 +49,7 @@ class sfp_tool_snallygaster(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
@@ -44,6 +44,7 @@ class sfp_tool_wafw00f(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
@@ -52,6 +52,7 @@ class sfp_tool_whatweb(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
     errorState = False
 
     def setup(self, sfc, userOpts=dict()):
@@ -42,6 +42,8 @@ class sfp_twitter(SpiderFootPlugin):
     optdescs = {
     }
 
+    _uniqueEvents = True
+
     def setup(self, sfc, userOpts=dict()):
         self.sf = sfc
         self.__dataSource__ = "Twitter"
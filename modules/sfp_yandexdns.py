@@ -48,6 +48,7 @@ class sfp_yandexdns(SpiderFootPlugin):
     }
 
     results = None
+    _uniqueEvents = True
 
     checks = {
         "213.180.193.250": "Yandex - Infected",
@@ -46,6 +46,10 @@ dbh = None
 sfConfig = {
     '_debug': False,  # Debug
     '_maxthreads': 3,  # Number of modules to run concurrently
+    '_maxqueuesize': 10000,  # Max events held in memory per module queue
+    '_moduleprocesses': 0,  # Worker processes to run modules in
+    '_dbfulltext': False,  # Full-text index of result data
+    '_correlationincremental': False,  # Correlate events as the scan runs
     '__logging': True,  # Logging in general
     '__outputfilter': None,  # Event types to filter from modules' output
     # User-Agent to use for HTTP requests
@@ -68,6 +72,10 @@ sfConfig = {
 sfOptdescs = {
     '_debug': "Enable debugging?",
     '_maxthreads': "Max number of modules to run concurrently",
+    '_maxqueuesize': "Max number of events to hold in memory for each module awaiting processing. Further events are buffered on disk. (0 = unlimited)",
+    '_moduleprocesses': "Number of worker processes to spread modules across, so that a scan can use more than one CPU core. Storage modules always run in the scan process. (0 = run all modules in the scan process)",
+    '_dbfulltext': "Index the data of scan results for full-text search. Makes searches much faster, but makes the database larger and storing results slower. The index is built the next time the database is opened.",
+    '_correlationincremental': "Run correlation rules on events as they are produced, so that correlations are found while the scan runs rather than only once it has finished. Requires the sfp__stor_db module.",
     '_useragent': "User-Agent string to use for HTTP requests. Prefix with an '@' to randomly select the User Agent from a file containing user agent strings for each request, e.g. @C:\\useragents.txt or @/home/bob/useragents.txt. Or supply a URL to load the list from there.",
     '_dnsserver': "Override the default resolver with another DNS server. For example, 8.8.8.8 is Google's open DNS server.",
     '_fetchtimeout': "Number of seconds before giving up on a HTTP request.",
@@ -539,7 +547,8 @@ def main():
                 correlations_dir = os.path.join(script_dir, 'correlations')
                 correlation_rules = []
                 if os.path.exists(correlations_dir):
-                    loader = RuleLoader(correlations_dir)
+                    loader = RuleLoader(
+                        correlations_dir, cache_path=os.path.join(SpiderFootHelpers.cachePath(), 'correlationrules.json'))
                     rules = loader.load_rules()
                     errors = loader.get_errors()
                     if errors:
@@ -565,10 +574,10 @@ def main():
                 # Enrich results (optional, can be expanded)
                 enricher = EventEnricher(dbh)
                 for rule_id, result in results.items():
-                    # Example: enrich with sources/entities if result has events
-                    if 'events' in result:
-                        result['events'] = enricher.enrich_sources(scan_id, result['events'])
-                        result['events'] = enricher.enrich_entities(scan_id, result['events'])
+                    # enrich the events of correlations created, each fetched once
+                    if result.get('correlated_events'):
+                        result['correlated_events'] = enricher.enrich_sources(scan_id, result['correlated_events'])
+                        result['correlated_events'] = enricher.enrich_entities(scan_id, result['correlated_events'])
                 # Aggregate results (optional)
                 aggregator = ResultAggregator()
                 agg_count = aggregator.aggregate(list(results.values()), method='count')
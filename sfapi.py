@@ -41,6 +41,7 @@ import uvicorn
 # SpiderFoot imports
 from sflib import SpiderFoot
 from spiderfoot import SpiderFootDb
+from spiderfoot import SpiderFootDbPool
 from spiderfoot import SpiderFootHelpers
 from spiderfoot import __version__
 from spiderfoot.workspace import SpiderFootWorkspace
@@ -77,6 +78,9 @@ class Config:
         dbh = SpiderFootDb(self.defaultConfig, init=True)
         sf = SpiderFoot(self.defaultConfig)
         self.config = sf.configUnserialize(dbh.configGet(), self.defaultConfig)
+
+        # Database handles shared by the API routes
+        self.dbPool = SpiderFootDbPool(self.config, factory=lambda: SpiderFootDb(self.config))
         
         # Set up logging
         self.loggingQueue = mp.Queue()
@@ -219,6 +223,12 @@ class WebSocketManager:
             except:
                 pass
 
+# Database dependency
+def get_db():
+    """Check out a pooled database handle for the duration of a request"""
+    with get_app_config().dbPool.connection() as db:
+        yield db
+
 # Authentication dependency
 async def get_api_key(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Validate API key"""
@@ -392,12 +402,11 @@ async def health_check():
 async def list_scans(
     limit: int = Query(50, ge=1, le=1000),
     offset: int = Query(0, ge=0),
-    api_key: str = Depends(optional_auth)
+    api_key: str = Depends(optional_auth),
+    db: SpiderFootDb = Depends(get_db)
 ):
     """List all scans"""
     try:
-        config = get_app_config()
-        db = SpiderFootDb(config.get_config())
         scans = db.scanInstanceList()
           # Apply pagination
         paginated_scans = scans[offset:offset + limit]
@@ -427,11 +436,10 @@ async def list_scans(
         raise HTTPException(status_code=500, detail="Failed to list scans")
 
 @scan_router.post("/scans", status_code=201)
-async def create_scan(scan_request: ScanRequest, background_tasks: BackgroundTasks, api_key: str = Depends(get_api_key)):
+async def create_scan(scan_request: ScanRequest, background_tasks: BackgroundTasks, api_key: str = Depends(get_api_key), db: SpiderFootDb = Depends(get_db)):
     """Create and start a new scan"""
     try:
         config = get_app_config()
-        db = SpiderFootDb(config.get_config())
         scan_id = SpiderFootHelpers.genScanInstanceId()
         target_type = SpiderFootHelpers.targetTypeFromString(scan_request.target)
         if not target_type:
@@ -493,12 +501,9 @@ async def start_scan_background(scan_id: str, scan_name: str, target: str,
         logger.error("Failed to start scan %s: %s", scan_id, e)
 
 @scan_router.get("/scans/{scan_id}")
-async def get_scan(scan_id: str, api_key: str = Depends(optional_auth)):
+async def get_scan(scan_id: str, api_key: str = Depends(optional_auth), db: SpiderFootDb = Depends(get_db)):
     """Get scan details"""
     try:
-        config = get_app_config()
-        db = SpiderFootDb(config.get_config())
-        
         scan_info = db.scanInstanceGet(scan_id)
         if not scan_info:
             raise HTTPException(status_code=404, detail="Scan not found")
@@ -519,12 +524,9 @@ async def get_scan(scan_id: str, api_key: str = Depends(optional_auth)):
         raise HTTPException(status_code=500, detail="Failed to get scan")
 
 @scan_router.delete("/scans/{scan_id}")
-async def delete_scan(scan_id: str, api_key: str = Depends(get_api_key)):
+async def delete_scan(scan_id: str, api_key: str = Depends(get_api_key), db: SpiderFootDb = Depends(get_db)):
     """Delete a scan"""
     try:
-        config = get_app_config()
-        db = SpiderFootDb(config.get_config())
-        
         # Check if scan exists
         scan_info = db.scanInstanceGet(scan_id)
         if not scan_info:
@@ -541,12 +543,9 @@ async def delete_scan(scan_id: str, api_key: str = Depends(get_api_key)):
         raise HTTPException(status_code=500, detail="Failed to delete scan")
 
 @scan_router.post("/scans/{scan_id}/stop")
-async def stop_scan(scan_id: str, api_key: str = Depends(get_api_key)):
+async def stop_scan(scan_id: str, api_key: str = Depends(get_api_key), db: SpiderFootDb = Depends(get_db)):
     """Stop a running scan"""
     try:
-        config = get_app_config()
-        db = SpiderFootDb(config.get_config())
-        
         # Check if scan exists
         scan_info = db.scanInstanceGet(scan_id)
         if not scan_info:
@@ -568,23 +567,27 @@ async def get_scan_events(
     event_types: Optional[List[str]] = Query(None),
     limit: int = Query(1000, ge=1, le=10000),
     offset: int = Query(0, ge=0),
-    api_key: str = Depends(optional_auth)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    api_key: str = Depends(optional_auth),
+    db: SpiderFootDb = Depends(get_db)
 ):
     """Get scan events/results"""
     try:
-        config = get_app_config()
-        db = SpiderFootDb(config.get_config())
-        
         # Check if scan exists
         scan_info = db.scanInstanceGet(scan_id)
         if not scan_info:
             raise HTTPException(status_code=404, detail="Scan not found")
         
-        # Get scan events
-        events = db.scanResultEvent(scan_id, event_types or ['ALL'])
-        
-        # Apply pagination
-        paginated_events = events[offset:offset + limit]
+        # Get one page of scan events, starting after the cursor if given
+        after = None
+        if cursor:
+            generated, _, event_hash = cursor.partition(':')
+            try:
+                after = (float(generated), event_hash)
+            except ValueError:
+                raise HTTPException(status_code=422, detail="Invalid cursor")
+        event_type = event_types or 'ALL'
+        paginated_events, next_key = db.scanResultEventPage(scan_id, event_type, limit=limit, after=after, offset=0 if after else offset)
         
         events_list = []
         for event in paginated_events:
@@ -602,9 +605,10 @@ async def get_scan_events(
         
         return {
             "events": events_list,
-            "total": len(events),
+            "total": db.scanResultEventCount(scan_id, event_type),
             "offset": offset,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": f"{next_key[0]!r}:{next_key[1]}" if len(paginated_events) == limit else None
         }
         
     except HTTPException:
@@ -617,41 +621,48 @@ async def get_scan_events(
 async def export_scan(
     scan_id: str,
     format: str = Query("json", pattern="^(json|csv|xml)$"),
-    api_key: str = Depends(optional_auth)
+    api_key: str = Depends(optional_auth),
+    db: SpiderFootDb = Depends(get_db)
 ):
     """Export scan results"""
     try:
-        config = get_app_config()
-        db = SpiderFootDb(config.get_config())
-        
         # Check if scan exists
         scan_info = db.scanInstanceGet(scan_id)
         if not scan_info:
             raise HTTPException(status_code=404, detail="Scan not found")
         
-        # Get all events
-        events = db.scanResultEvent(scan_id, ['ALL'])
-        
         if format == "csv":
-            output = StringIO()
-            writer = csv.writer(output)
-            writer.writerow(['Time', 'Event Type', 'Module', 'Data', 'Source', 'Confidence', 'Visibility', 'Risk'])
-            
-            for event in events:
-                writer.writerow([
-                    event[0], event[4], event[3], event[1], 
-                    event[2], event[6], event[7], event[8]
-                ])
-            
-            csv_content = output.getvalue()
-            output.close()
+            def csv_rows():
+                # The request's handle is returned to the pool before the
+                # response body is sent, so the rows are read with another
+                with get_app_config().dbPool.connection() as export_db:
+                    output = StringIO()
+                    writer = csv.writer(output)
+                    writer.writerow(['Time', 'Event Type', 'Module', 'Data', 'Source', 'Confidence', 'Visibility', 'Risk'])
+                    
+                    for event in export_db.scanResultEventIter(scan_id):
+                        writer.writerow([
+                            event[0], event[4], event[3], event[1], 
+                            event[2], event[6], event[7], event[8]
+                        ])
+                        if output.tell() > 65536:
+                            yield output.getvalue().encode('utf-8')
+                            output.seek(0)
+                            output.truncate()
+                    
+                    yield output.getvalue().encode('utf-8')
+                    output.close()
             
             return StreamingResponse(
-                BytesIO(csv_content.encode('utf-8')),
+                csv_rows(),
                 media_type="text/csv",
                 headers={"Content-Disposition": f"attachment; filename=scan_{scan_id}.csv"}
             )
-        elif format == "xml":
+
+        # Get all events
+        events = db.scanResultEvent(scan_id, 'ALL')
+        
+        if format == "xml":
             # Basic XML export
             xml_content = f"<?xml version='1.0' encoding='UTF-8'?>\n<scan id='{scan_id}'>\n"
             for event in events:
@@ -926,12 +937,9 @@ async def get_modules(api_key: str = Depends(optional_auth)):
         raise HTTPException(status_code=500, detail="Failed to get modules")
 
 @config_router.get("/event-types")
-async def get_event_types(api_key: str = Depends(optional_auth)):
+async def get_event_types(api_key: str = Depends(optional_auth), db: SpiderFootDb = Depends(get_db)):
     """Get available event types"""
     try:
-        config = get_app_config()
-        db = SpiderFootDb(config.get_config())
-        
         event_types = db.eventTypes()
         return {"event_types": event_types}
     except Exception as e:
@@ -953,12 +961,19 @@ async def websocket_scan_stream(websocket: WebSocket, scan_id: str):
             await websocket.send_text(json.dumps({"error": "Scan not found"}))
             return
         
-        last_event_count = 0
+        last_event_key = 0
         
         while True:
-            # Get current scan status and events
+            # Get current scan status and the events stored since the last
+            # update. Events are stored out of the order they were generated
+            # in, so they are followed in the order they were stored.
             current_scan_info = db.scanInstanceGet(scan_id)
-            events = db.scanResultEvent(scan_id, ['ALL'])
+            new_events = list()
+            while True:
+                events, last_event_key = db.scanResultEventStored(scan_id, after=last_event_key, limit=1000)
+                new_events.extend(events)
+                if len(events) < 1000:
+                    break
             
             # Send status update
             if current_scan_info:
@@ -966,13 +981,12 @@ async def websocket_scan_stream(websocket: WebSocket, scan_id: str):
                     "type": "status_update",
                     "scan_id": scan_id,
                     "status": current_scan_info[6],
-                    "event_count": len(events),
+                    "event_count": db.scanResultEventCount(scan_id),
                     "timestamp": time.time()
                 }))
             
             # Send new events if any
-            if len(events) > last_event_count:
-                new_events = events[last_event_count:]
+            if new_events:
                 await websocket.send_text(json.dumps({
                     "type": "new_events",
                     "scan_id": scan_id,
@@ -985,7 +999,6 @@ async def websocket_scan_stream(websocket: WebSocket, scan_id: str):
                         } for event in new_events
                     ]
                 }))
-                last_event_count = len(events)
             
             await asyncio.sleep(2)
             
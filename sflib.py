@@ -30,6 +30,7 @@ from datetime import datetime
 
 import cryptography
 import dns.resolver
+import httpx
 import netaddr
 import OpenSSL
 import requests
@@ -53,6 +54,7 @@ class SpiderFoot:
     _dbh = None
     _scanId = None
     _socksProxy = None
+    _asyncSessions = None
     opts = dict()
 
     def __init__(self, options: dict) -> None:
@@ -68,6 +70,7 @@ class SpiderFoot:
             raise TypeError(f"options is {type(options)}; expected dict()")
 
         self.opts = deepcopy(options)
+        self._asyncSessions = dict()
         self.log = logging.getLogger(f"spiderfoot.{__name__}")
 
         # This is ugly but we don't want any fetches to fail - we expect
@@ -1232,6 +1235,167 @@ class SpiderFoot:
 
         return True
 
+    def _fetchUrlRequest(self, url: str, timeout: int, useragent: str, headers: dict, cookies) -> tuple:
+        """Check a URL can be fetched, and build the request fetchUrl() and
+        fetchUrlAsync() make for it.
+
+        Args:
+            url (str): URL to fetch
+            timeout (int): timeout
+            useragent (str): user agent header
+            headers (dict): headers
+            cookies: cookies
+
+        Returns:
+            tuple: URL, empty result, request headers and request details
+            to log, or None if the URL can't be fetched
+        """
+        result = {
+            'code': None,
+            'status': None,
+            'content': None,
+            'headers': None,
+            'realurl': url
+        }
+
+        url = url.strip()
+
+        try:
+            parsed_url = urllib.parse.urlparse(url)
+        except Exception:
+            self.debug(f"Could not parse URL: {url}")
+            return None
+
+        if parsed_url.scheme != 'http' and parsed_url.scheme != 'https':
+            self.debug(f"Invalid URL scheme for URL: {url}")
+            return None
+
+        header = dict()
+
+        if isinstance(useragent, list):
+            header['User-Agent'] = random.SystemRandom().choice(useragent)
+        else:
+            header['User-Agent'] = useragent
+
+        # Add custom headers
+        if isinstance(headers, dict):
+            for k in list(headers.keys()):
+                header[k] = str(headers[k])
+
+        request_log = [
+            f"proxy={self.socksProxy}",
+            f"user-agent={header['User-Agent']}",
+            f"timeout={timeout}",
+            f"cookies={cookies}"
+        ]
+
+        return url, result, header, request_log
+
+    def _fetchUrlHead(self, result: dict, url: str, statusCode: int, headers) -> int:
+        """Fill in the code and URL of a fetch from the response to a HEAD
+        request, which isn't redirected.
+
+        Args:
+            result (dict): fetch result
+            url (str): URL requested
+            statusCode (int): HTTP status code
+            headers: response headers
+
+        Returns:
+            int: content length
+        """
+        newloc = headers.get('location', url).strip()
+
+        # Relative re-direct
+        if newloc.startswith("/") or newloc.startswith("../"):
+            newloc = SpiderFootHelpers.urlBaseUrl(url) + newloc
+        result['realurl'] = newloc
+        result['code'] = str(statusCode)
+
+        return int(headers.get('content-length', 0))
+
+    def _fetchUrlResponse(
+        self,
+        result: dict,
+        url: str,
+        realurl: str,
+        statusCode: int,
+        headers,
+        content: bytes,
+        sizeLimit: int,
+        disableContentEncoding: bool,
+        btime: float
+    ) -> str:
+        """Fill in the result of a fetch from the response to a GET or POST
+        request.
+
+        Args:
+            result (dict): fetch result
+            url (str): URL requested
+            realurl (str): URL of the response, once redirected
+            statusCode (int): HTTP status code
+            headers: response headers
+            content (bytes): response body
+            sizeLimit (int): size threshold
+            disableContentEncoding (bool): do not UTF-8 encode response body
+            btime (float): time the fetch started
+
+        Returns:
+            str: URL a Refresh header redirects to, which should be fetched
+            instead, or None
+        """
+        try:
+            result['headers'] = dict(headers)
+            result['realurl'] = realurl
+            result['code'] = str(statusCode)
+
+            for header, value in headers.items():
+                result['headers'][str(header).lower()] = str(value)
+
+            # Sometimes content exceeds the size limit after decompression
+            if sizeLimit and len(content) > sizeLimit:
+                self.debug(
+                    f"Content exceeded size limit ({sizeLimit}), so returning no data just headers")
+                return None
+
+            refresh_header = result['headers'].get('refresh')
+            if refresh_header:
+                try:
+                    newurl = refresh_header.split(";url=")[1]
+                except Exception as e:
+                    self.debug(
+                        f"Refresh header '{refresh_header}' found, but not parsable: {e}")
+                    return None
+
+                self.debug(
+                    f"Refresh header '{refresh_header}' found, re-directing to {self.removeUrlCreds(newurl)}")
+                return newurl
+
+            if disableContentEncoding:
+                result['content'] = content
+            else:
+                for encoding in ("utf-8", "ascii"):
+                    try:
+                        result["content"] = content.decode(encoding)
+                    except UnicodeDecodeError:
+                        pass
+                    else:
+                        break
+                else:
+                    result["content"] = content
+
+        except Exception as e:
+            self.error(
+                f"Unexpected exception ({e}) occurred parsing response for URL: {url}")
+            result['content'] = None
+            result['status'] = str(e)
+
+        atime = time.time()
+        t = str(atime - btime)
+        self.info(
+            f"Fetched {self.removeUrlCreds(url)} ({len(result['content'] or '')} bytes in {t}s)")
+        return None
+
     def fetchUrl(
         self,
         url: str,
@@ -1267,27 +1431,13 @@ class SpiderFoot:
         if not url:
             return None
 
-        result = {
-            'code': None,
-            'status': None,
-            'content': None,
-            'headers': None,
-            'realurl': url
-        }
-
-        url = url.strip()
-
-        try:
-            parsed_url = urllib.parse.urlparse(url)
-        except Exception:
-            self.debug(f"Could not parse URL: {url}")
-            return None
-
-        if parsed_url.scheme != 'http' and parsed_url.scheme != 'https':
-            self.debug(f"Invalid URL scheme for URL: {url}")
+        request = self._fetchUrlRequest(url, timeout, useragent, headers, cookies)
+        if request is None:
             return None
+        url, result, header, request_log = request
 
-        request_log = []
+        log = self.debug if noLog else self.info
+        logError = self.debug if noLog else self.error
 
         proxies = dict()
         if self.useProxyForUrl(url):
@@ -1296,31 +1446,10 @@ class SpiderFoot:
                 'https': self.socksProxy,
             }
 
-        header = dict()
         btime = time.time()
 
-        if isinstance(useragent, list):
-            header['User-Agent'] = random.SystemRandom().choice(useragent)
-        else:
-            header['User-Agent'] = useragent
-
-        # Add custom headers
-        if isinstance(headers, dict):
-            for k in list(headers.keys()):
-                header[k] = str(headers[k])
-
-        request_log.append(f"proxy={self.socksProxy}")
-        request_log.append(f"user-agent={header['User-Agent']}")
-        request_log.append(f"timeout={timeout}")
-        request_log.append(f"cookies={cookies}")
-
         if sizeLimit or headOnly:
-            if noLog:
-                self.debug(
-                    f"Fetching (HEAD): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
-            else:
-                self.info(
-                    f"Fetching (HEAD): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
+            log(f"Fetching (HEAD): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
 
             try:
                 hdr = self.getSession().head(
@@ -1331,23 +1460,11 @@ class SpiderFoot:
                     timeout=timeout
                 )
             except Exception as e:
-                if noLog:
-                    self.debug(
-                        f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {url}")
-                else:
-                    self.error(
-                        f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {url}")
-
+                logError(
+                    f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {url}")
                 return result
 
-            size = int(hdr.headers.get('content-length', 0))
-            newloc = hdr.headers.get('location', url).strip()
-
-            # Relative re-direct
-            if newloc.startswith("/") or newloc.startswith("../"):
-                newloc = SpiderFootHelpers.urlBaseUrl(url) + newloc
-            result['realurl'] = newloc
-            result['code'] = str(hdr.status_code)
+            size = self._fetchUrlHead(result, url, hdr.status_code, hdr.headers)
 
             if headOnly:
                 return result
@@ -1356,12 +1473,7 @@ class SpiderFoot:
                 return result
 
             if result['realurl'] != url:
-                if noLog:
-                    self.debug(
-                        f"Fetching (HEAD): {self.removeUrlCreds(result['realurl'])} ({', '.join(request_log)})")
-                else:
-                    self.info(
-                        f"Fetching (HEAD): {self.removeUrlCreds(result['realurl'])} ({', '.join(request_log)})")
+                log(f"Fetching (HEAD): {self.removeUrlCreds(result['realurl'])} ({', '.join(request_log)})")
 
                 try:
                     hdr = self.getSession().head(
@@ -1371,32 +1483,19 @@ class SpiderFoot:
                         verify=verify,
                         timeout=timeout
                     )
-                    size = int(hdr.headers.get('content-length', 0))
-                    result['realurl'] = hdr.headers.get(
-                        'location', result['realurl'])
-                    result['code'] = str(hdr.status_code)
+                    size = self._fetchUrlHead(result, result['realurl'], hdr.status_code, hdr.headers)
 
                     if size > sizeLimit:
                         return result
 
                 except Exception as e:
-                    if noLog:
-                        self.debug(
-                            f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {result['realurl']}")
-                    else:
-                        self.error(
-                            f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {result['realurl']}")
-
+                    logError(
+                        f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {result['realurl']}")
                     return result
 
         try:
             if postData:
-                if noLog:
-                    self.debug(
-                        f"Fetching (POST): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
-                else:
-                    self.info(
-                        f"Fetching (POST): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
+                log(f"Fetching (POST): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
                 res = self.getSession().post(
                     url,
                     data=postData,
@@ -1408,12 +1507,7 @@ class SpiderFoot:
                     verify=verify
                 )
             else:
-                if noLog:
-                    self.debug(
-                        f"Fetching (GET): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
-                else:
-                    self.info(
-                        f"Fetching (GET): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
+                log(f"Fetching (GET): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
                 res = self.getSession().get(
                     url,
                     headers=header,
@@ -1427,77 +1521,198 @@ class SpiderFoot:
             self.error(f"Failed to connect to {url}: {e}")
             return result
         except Exception as e:
-            if noLog:
-                self.debug(
-                    f"Unexpected exception ({e}) occurred fetching URL: {url}")
-            else:
-                self.error(
-                    f"Unexpected exception ({e}) occurred fetching URL: {url}")
-
+            logError(f"Unexpected exception ({e}) occurred fetching URL: {url}")
             return result
 
+        newurl = self._fetchUrlResponse(
+            result, url, res.url, res.status_code, res.headers, res.content,
+            sizeLimit, disableContentEncoding, btime)
+        if newurl:
+            return self.fetchUrl(
+                newurl,
+                cookies,
+                timeout,
+                useragent,
+                headers,
+                noLog,
+                postData,
+                disableContentEncoding,
+                sizeLimit,
+                headOnly
+            )
+        return result
+
+    def getAsyncSession(self, useProxy: bool = False, verify: bool = True) -> 'httpx.AsyncClient':
+        """Return the shared asynchronous HTTP client for the running event
+        loop, creating it if necessary.
+
+        Clients hold a connection pool bound to the event loop they were
+        first used on, so one is kept per combination of proxy and
+        certificate verification settings and reused across requests.
+        Redirects are followed or not per request, as fetchUrl() does.
+
+        Args:
+            useProxy (bool): route requests through the configured proxy
+            verify (bool): use HTTPS SSL/TLS verification
+
+        Returns:
+            httpx.AsyncClient: asynchronous HTTP client
+        """
+        key = (bool(useProxy and self.socksProxy), bool(verify))
+        session = self._asyncSessions.get(key)
+        if session is None or session.is_closed:
+            session = httpx.AsyncClient(
+                proxy=self.socksProxy if key[0] else None,
+                verify=verify
+            )
+            self._asyncSessions[key] = session
+        return session
+
+    async def closeAsyncSessions(self) -> None:
+        """Close the asynchronous HTTP clients. Must be awaited on the event
+        loop the clients were used on."""
+        sessions = list(self._asyncSessions.values())
+        self._asyncSessions.clear()
+        for session in sessions:
+            await session.aclose()
+
+    async def fetchUrlAsync(
+        self,
+        url: str,
+        cookies: dict = None,
+        timeout: int = 30,
+        useragent: str = "SpiderFoot",
+        headers: dict = None,
+        noLog: bool = False,
+        postData: str = None,
+        disableContentEncoding: bool = False,
+        sizeLimit: int = None,
+        headOnly: bool = False,
+        verify: bool = True
+    ) -> dict:
+        """Fetch a URL without blocking the event loop, for use by
+        SpiderFootAsyncPlugin modules. Arguments and the returned dictionary
+        are the same as for fetchUrl().
+
+        Args:
+            url (str): URL to fetch
+            cookies (dict): cookies
+            timeout (int): timeout
+            useragent (str): user agent header
+            headers (dict): headers
+            noLog (bool): do not log request
+            postData (str): HTTP POST data
+            disableContentEncoding (bool): do not UTF-8 encode response body
+            sizeLimit (int): size threshold
+            headOnly (bool): use HTTP HEAD method
+            verify (bool): use HTTPS SSL/TLS verification
+
+        Returns:
+            dict: HTTP response
+        """
+        if not url:
+            return None
+
+        request = self._fetchUrlRequest(url, timeout, useragent, headers, cookies)
+        if request is None:
+            return None
+        url, result, header, request_log = request
+
+        log = self.debug if noLog else self.info
+        logError = self.debug if noLog else self.error
+
+        btime = time.time()
+
         try:
-            result['headers'] = dict(res.headers)
-            result['realurl'] = res.url
-            result['code'] = str(res.status_code)
+            session = self.getAsyncSession(self.useProxyForUrl(url), verify)
+        except Exception as e:
+            self.error(f"Could not set up HTTP client for {url}: {e}")
+            return result
 
-            for header, value in res.headers.items():
-                result['headers'][str(header).lower()] = str(value)
+        if sizeLimit or headOnly:
+            log(f"Fetching (HEAD): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
 
-            # Sometimes content exceeds the size limit after decompression
-            if sizeLimit and len(res.content) > sizeLimit:
-                self.debug(
-                    f"Content exceeded size limit ({sizeLimit}), so returning no data just headers")
+            try:
+                hdr = await session.head(url, headers=header, timeout=timeout, follow_redirects=False)
+            except Exception as e:
+                logError(
+                    f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {url}")
                 return result
 
-            refresh_header = result['headers'].get('refresh')
-            if refresh_header:
+            size = self._fetchUrlHead(result, url, hdr.status_code, hdr.headers)
+
+            if headOnly:
+                return result
+
+            if size > sizeLimit:
+                return result
+
+            if result['realurl'] != url:
+                log(f"Fetching (HEAD): {self.removeUrlCreds(result['realurl'])} ({', '.join(request_log)})")
+
                 try:
-                    newurl = refresh_header.split(";url=")[1]
+                    hdr = await session.head(
+                        result['realurl'], headers=header, timeout=timeout, follow_redirects=False)
+                    size = self._fetchUrlHead(result, result['realurl'], hdr.status_code, hdr.headers)
+
+                    if size > sizeLimit:
+                        return result
+
                 except Exception as e:
-                    self.debug(
-                        f"Refresh header '{refresh_header}' found, but not parsable: {e}")
+                    logError(
+                        f"Unexpected exception ({e}) occurred fetching (HEAD only) URL: {result['realurl']}")
                     return result
 
-                self.debug(
-                    f"Refresh header '{refresh_header}' found, re-directing to {self.removeUrlCreds(newurl)}")
-
-                return self.fetchUrl(
-                    newurl,
-                    cookies,
-                    timeout,
-                    useragent,
-                    headers,
-                    noLog,
-                    postData,
-                    disableContentEncoding,
-                    sizeLimit,
-                    headOnly
+        try:
+            if postData:
+                log(f"Fetching (POST): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
+                # form fields are encoded and anything else sent as it is,
+                # as requests does for fetchUrl()
+                if isinstance(postData, (dict, list, tuple)):
+                    body = {'data': postData}
+                else:
+                    body = {'content': postData}
+                res = await session.post(
+                    url,
+                    headers=header,
+                    cookies=cookies,
+                    timeout=timeout,
+                    follow_redirects=True,
+                    **body
                 )
-
-            if disableContentEncoding:
-                result['content'] = res.content
             else:
-                for encoding in ("utf-8", "ascii"):
-                    try:
-                        result["content"] = res.content.decode(encoding)
-                    except UnicodeDecodeError:
-                        pass
-                    else:
-                        break
-                else:
-                    result["content"] = res.content
-
+                log(f"Fetching (GET): {self.removeUrlCreds(url)} ({', '.join(request_log)})")
+                res = await session.get(
+                    url,
+                    headers=header,
+                    cookies=cookies,
+                    timeout=timeout,
+                    follow_redirects=True
+                )
+        except httpx.HTTPError as e:
+            self.error(f"Failed to connect to {url}: {e}")
+            return result
         except Exception as e:
-            self.error(
-                f"Unexpected exception ({e}) occurred parsing response for URL: {url}")
-            result['content'] = None
-            result['status'] = str(e)
+            logError(f"Unexpected exception ({e}) occurred fetching URL: {url}")
+            return result
 
-        atime = time.time()
-        t = str(atime - btime)
-        self.info(
-            f"Fetched {self.removeUrlCreds(url)} ({len(result['content'] or '')} bytes in {t}s)")
+        newurl = self._fetchUrlResponse(
+            result, url, str(res.url), res.status_code, res.headers, res.content,
+            sizeLimit, disableContentEncoding, btime)
+        if newurl:
+            return await self.fetchUrlAsync(
+                newurl,
+                cookies,
+                timeout,
+                useragent,
+                headers,
+                noLog,
+                postData,
+                disableContentEncoding,
+                sizeLimit,
+                headOnly,
+                verify
+            )
         return result
 
     def checkDnsWildcard(self, target: str) -> bool:
@@ -13,7 +13,6 @@
 import socket
 import time
 import queue
-from time import sleep
 from copy import deepcopy
 from contextlib import suppress
 from collections import OrderedDict
@@ -21,7 +20,7 @@ from collections import OrderedDict
 import dns.resolver
 
 from sflib import SpiderFoot
-from spiderfoot import SpiderFootDb, SpiderFootEvent, SpiderFootPlugin, SpiderFootTarget, SpiderFootHelpers, SpiderFootThreadPool, logger
+from spiderfoot import SpiderFootAsyncLoop, SpiderFootAsyncPlugin, SpiderFootDb, SpiderFootEvent, SpiderFootEventDedup, SpiderFootEventIndex, SpiderFootEventQueue, SpiderFootModuleProxy, SpiderFootModuleShard, SpiderFootPlugin, SpiderFootScanActivity, SpiderFootTarget, SpiderFootHelpers, SpiderFootThreadPool, logger
 from spiderfoot.logger import logWorkerSetup
 
 
@@ -67,6 +66,9 @@ class SpiderFootScanner():
     __moduleInstances = dict()
     __modconfig = dict()
     __scanName = None
+    __eventRouter = dict()
+    __wildcardSubscribers = list()
+    __correlator = None
 
     def __init__(self, scanName: str, scanId: str, targetValue: str, targetType: str, moduleList: list, globalOpts: dict, start: bool = True) -> None:
         """Initialize SpiderFootScanner object.
@@ -246,8 +248,17 @@ class SpiderFootScanner():
         self.__sharedThreadPool = SpiderFootThreadPool(
             threads=self.__config.get("_maxthreads", 3), name='sharedThreadPool')
 
+        # Event loop shared by asynchronous modules, started on first use
+        self.__sharedAsyncLoop = SpiderFootAsyncLoop(name='sharedAsyncLoop')
+
+        # Events produced by the scan, to suppress repeats and duplicates
+        self.__eventIndex = SpiderFootEventIndex()
+        self.__eventDedup = SpiderFootEventDedup()
+
         # Used when module threading is enabled
         self.eventQueue = None
+        self.__activity = None
+        self.__shards = list()
 
         if start:
             self.__startScan()
@@ -304,10 +315,21 @@ class SpiderFootScanner():
             self.__sf.status(
                 f"Scan [{self.__scanId}] for '{self.__target.targetValue}' initiated.")
 
-            self.eventQueue = queue.Queue()
+            # Events waiting to be dispatched are bounded so that modules
+            # producing events faster than they can be dispatched block.
+            # Module queues never block, but keep at most maxQueueSize events
+            # in memory and spill the rest to disk.
+            maxQueueSize = int(self.__config.get('_maxqueuesize', 0) or 0)
+            self.__activity = SpiderFootScanActivity()
+            self.eventQueue = SpiderFootEventQueue(
+                self.__activity, maxsize=max(maxQueueSize, 10) if maxQueueSize else 0)
 
             self.__sharedThreadPool.start()
 
+            # Global options are copied once for the scan, and the copy is
+            # shared by all of the scan's modules
+            globalOpts = deepcopy(self.__config)
+
             # moduleList = list of modules the user wants to run
             self.__sf.debug(f"Loading {len(self.__moduleList)} modules ...")
             for modName in self.__moduleList:
@@ -339,14 +361,16 @@ class SpiderFootScanner():
                     # Configuration is a combined global config with module-specific options
                     self.__modconfig[modName] = deepcopy(
                         self.__config['__modules__'][modName]['opts'])
-                    for opt in list(self.__config.keys()):
-                        self.__modconfig[modName][opt] = deepcopy(
-                            self.__config[opt])
+                    self.__modconfig[modName].update(globalOpts)
 
                     # clear any listener relationships from the past
                     mod.clearListeners()
                     mod.setScanId(self.__scanId)
                     mod.setSharedThreadPool(self.__sharedThreadPool)
+                    if isinstance(mod, SpiderFootPlugin):
+                        mod.setEventIndex(self.__eventIndex)
+                    if isinstance(mod, SpiderFootAsyncPlugin):
+                        mod.setSharedAsyncLoop(self.__sharedAsyncLoop)
                     mod.setDbh(self.__dbh)
                     mod.setup(self.__sf, self.__modconfig[modName])
                 except Exception:
@@ -394,7 +418,8 @@ class SpiderFootScanner():
                 # Set up the outgoing event queue
                 try:
                     mod.outgoingEventQueue = self.eventQueue
-                    mod.incomingEventQueue = queue.Queue()
+                    mod.incomingEventQueue = SpiderFootEventQueue(
+                        self.__activity, spillsize=getattr(mod, 'maxQueueSize', 0) or maxQueueSize)
                     # Debug: Verify queues are set
                     self.__sf.debug(f"Module {modName} queues initialized: incoming={mod.incomingEventQueue is not None}, outgoing={mod.outgoingEventQueue is not None}")
                     
@@ -423,6 +448,10 @@ class SpiderFootScanner():
             self.__moduleInstances = OrderedDict(
                 sorted(self.__moduleInstances.items(), key=lambda m: m[-1]._priority))
 
+            self.__startShards()
+            self.__buildEventRouter()
+            self.__startCorrelator()
+
             # Now we are ready to roll..
             self.__setStatus("RUNNING")
 
@@ -431,6 +460,7 @@ class SpiderFootScanner():
             psMod.__name__ = "SpiderFoot UI"
             psMod.setTarget(self.__target)
             psMod.setDbh(self.__dbh)
+            psMod.setEventIndex(self.__eventIndex)
             psMod.clearListeners()
             psMod.outgoingEventQueue = self.eventQueue
             psMod.incomingEventQueue = queue.Queue()
@@ -472,14 +502,153 @@ class SpiderFootScanner():
             # self.__sf.error(f"Scan [{self.__scanId}] failed: {str(e)}", exc_info=True)
 
         finally:
+            # aborted and failed scans never see FINISHED, so events still
+            # buffered by the storage modules would otherwise be lost
+            self.__flushStorage()
             if not failed:
                 self.__setStatus("FINISHED", None, time.time() * 1000)
                 self.runCorrelations()
                 self.__sf.status(f"Scan [{self.__scanId}] completed.")
             self.__dbh.close()
 
+    def __flushStorage(self) -> None:
+        """Write any events still buffered by the storage modules."""
+        for mod in self.__moduleInstances.values():
+            if not mod.__name__.startswith('sfp__stor_'):
+                continue
+            try:
+                mod.finish()
+            except Exception as e:
+                self.__sf.error(f"Module {mod.__name__} failed to store buffered events: {e}")
+
+    def __startShards(self) -> None:
+        """Move modules into worker processes, if enabled with the
+        _moduleprocesses option.
+
+        Modules are spread across the worker processes in priority order,
+        and each is replaced by a SpiderFootModuleProxy. Storage modules,
+        and modules which set _shardable to False, remain in the scan
+        process. If a worker process fails to start, its modules remain in
+        the scan process.
+        """
+        processes = int(self.__config.get('_moduleprocesses', 0) or 0)
+        if processes < 1:
+            return
+
+        shardable = [
+            mod for mod in self.__moduleInstances.values()
+            if not mod.errorState and mod._shardable and not mod.__name__.startswith('sfp__stor_')
+        ]
+        groups = [group for group in (shardable[i::processes] for i in range(processes)) if group]
+
+        for n, group in enumerate(groups):
+            shard = SpiderFootModuleShard(name=f"{self.__scanId}_shard_{n + 1}")
+            ready = shard.start(
+                self.__config,
+                self.__scanId,
+                self.__target,
+                self.__sf.socksProxy,
+                {mod.__name__: self.__modconfig[mod.__name__] for mod in group}
+            )
+            if ready is None:
+                self.__sf.error(
+                    f"Failed to start worker process for modules: {', '.join(mod.__name__ for mod in group)}")
+                continue
+
+            self.__shards.append(shard)
+            for mod in group:
+                try:
+                    proxy = SpiderFootModuleProxy(shard, mod)
+                except Exception as e:
+                    self.__sf.error(f"Module {mod.__name__} could not be moved to a worker process: {e}")
+                    proxy = None
+                if proxy is None or not ready.get(mod.__name__):
+                    self.__sf.error(f"Module {mod.__name__} setup failed in worker process")
+                    mod.errorState = True
+                    if proxy is None:
+                        continue
+                    proxy.errorState = True
+                shard.attach(proxy)
+                self.__moduleInstances[mod.__name__] = proxy
+
+            shard.run(self.eventQueue, self.__eventIndex)
+            self.__sf.debug(
+                f"Running {len(group)} modules in worker process {shard.name}: {', '.join(mod.__name__ for mod in group)}")
+
+    def __buildEventRouter(self) -> None:
+        """Build the event type to subscribing module routing table.
+
+        Each module's watchedEvents() is only consulted once, here, rather
+        than for every event pulled off the event queue. Modules are kept
+        in priority order within each subscriber list.
+        """
+        self.__eventRouter = dict()
+        self.__wildcardSubscribers = list()
+
+        for mod in self.__moduleInstances.values():
+            if mod.errorState:
+                continue
+
+            try:
+                watchedEvents = mod.watchedEvents()
+            except Exception as e:
+                self.__sf.error(
+                    f"Module {mod.__name__} watchedEvents() failed: {e}")
+                mod.errorState = True
+                continue
+
+            if "*" in watchedEvents:
+                self.__wildcardSubscribers.append(mod)
+                continue
+
+            for eventType in set(watchedEvents):
+                self.__eventRouter.setdefault(eventType, []).append(mod)
+
+    def __unrouteModule(self, mod) -> None:
+        """Remove a module from the event routing table, e.g. once it has
+        entered errorState and should no longer receive events.
+
+        Args:
+            mod (SpiderFootPlugin): module instance
+        """
+        with suppress(ValueError):
+            self.__wildcardSubscribers.remove(mod)
+
+        for eventType in list(self.__eventRouter):
+            subscribers = self.__eventRouter[eventType]
+            if mod in subscribers:
+                subscribers.remove(mod)
+            if not subscribers:
+                del self.__eventRouter[eventType]
+
+    def __startCorrelator(self) -> None:
+        """Evaluate correlation rules on events as they are produced, if
+        enabled with the _correlationincremental option.
+
+        Only events stored in the database are correlated once the scan has
+        finished, so this requires the sfp__stor_db module.
+        """
+        self.__correlator = None
+        if not self.__config.get('_correlationincremental'):
+            return
+
+        if 'sfp__stor_db' not in self.__moduleInstances:
+            self.__sf.debug("Incremental correlation requires the sfp__stor_db module.")
+            return
+
+        from spiderfoot.correlation.incremental_correlator import IncrementalCorrelator
+
+        truncateSize = self.__modconfig['sfp__stor_db'].get('maxstorage', 0)
+        self.__correlator = IncrementalCorrelator(
+            self.__dbh, self.__config['__correlationrules__'] or [], self.__scanId,
+            truncate_size=truncateSize if isinstance(truncateSize, int) else 0)
+
     def runCorrelations(self) -> None:
-        """Run correlation rules using the modular engine."""
+        """Run correlation rules using the modular engine.
+
+        Rules already evaluated while the scan ran only have their
+        remaining correlations written.
+        """
         from spiderfoot.correlation.rule_executor import RuleExecutor
         from spiderfoot.correlation.event_enricher import EventEnricher
         from spiderfoot.correlation.result_aggregator import ResultAggregator
@@ -487,14 +656,20 @@ class SpiderFootScanner():
         self.__sf.status(
             f"Running {len(self.__config['__correlationrules__'])} correlation rules on scan {self.__scanId}.")
         rules = self.__config['__correlationrules__']
-        executor = RuleExecutor(self.__dbh, rules, scan_ids=[self.__scanId])
-        results = executor.run()
+        results = dict()
+        if self.__correlator is not None:
+            results = self.__correlator.finalize()
+            rules = self.__correlator.other_rules
+        if rules:
+            executor = RuleExecutor(self.__dbh, rules, scan_ids=[self.__scanId])
+            results.update(executor.run())
         # Enrich results (optional, can be expanded)
         enricher = EventEnricher(self.__dbh)
         for rule_id, result in results.items():
-            if 'events' in result:
-                result['events'] = enricher.enrich_sources(self.__scanId, result['events'])
-                result['events'] = enricher.enrich_entities(self.__scanId, result['events'])
+            # only the events of correlations created, each fetched once
+            if result.get('correlated_events'):
+                result['correlated_events'] = enricher.enrich_sources(self.__scanId, result['correlated_events'])
+                result['correlated_events'] = enricher.enrich_entities(self.__scanId, result['correlated_events'])
         # Aggregate results (optional)
         aggregator = ResultAggregator()
         agg_count = aggregator.aggregate(list(results.values()), method='count')
@@ -510,8 +685,6 @@ class SpiderFootScanner():
         if not self.eventQueue:
             return
 
-        counter = 0
-
         try:
             # start one thread for each module
             for mod in self.__moduleInstances.values():
@@ -521,69 +694,119 @@ class SpiderFootScanner():
                     continue
                 mod.start()
             final_passes = 3
+            finishing = None
+            dispatched = 0
+            lastStatusCheck = 0
 
             # watch for newly-generated events
             while True:
 
-                # log status of threads every 10 iterations
-                log_status = counter % 10 == 0
-                counter += 1
-
+                # check for abort requests and log status of threads once a second
+                now = time.time()
+                log_status = now - lastStatusCheck >= 1
                 if log_status:
+                    lastStatusCheck = now
                     scanstatus = self.__dbh.scanInstanceGet(self.__scanId)
                     if scanstatus and scanstatus[5] == "ABORT-REQUESTED":
                         raise AssertionError("ABORT-REQUESTED")
 
+                    for mod in self.__moduleInstances.values():
+                        if mod._stopScanning:
+                            raise AssertionError(f"{mod.__name__} requested stop")
+
+                    # write the correlations found since the last check
+                    if self.__correlator is not None:
+                        created = self.__correlator.flush()
+                        if created:
+                            self.__sf.status(f"Correlated {created} new results for scan {self.__scanId}")
+
                 try:
                     sfEvent = self.eventQueue.get_nowait()
                     self.__sf.debug(
                         f"waitForThreads() got event, {sfEvent.eventType}, from eventQueue.")
                 except queue.Empty:
-                    # check if we're finished
-                    if self.threadsFinished(log_status):
-                        sleep(.1)
-                        # but are we really?
-                        if self.threadsFinished(log_status):
-                            if final_passes < 1:
-                                break
-                            # Trigger module.finished()
-                            for mod in self.__moduleInstances.values():
-                                if not mod.errorState and mod.incomingEventQueue is not None:
-                                    mod.incomingEventQueue.put('FINISHED')
-                            sleep(.1)
-                            while not self.threadsFinished(log_status):
-                                log_status = counter % 100 == 0
-                                counter += 1
-                                sleep(.01)
-                            final_passes -= 1
-
-                    else:
-                        # save on CPU
-                        sleep(.1)
+                    # block until a module produces an event, or until no
+                    # events are queued or being handled anywhere in the scan
+                    if not self.__activity.wait(self.eventQueue, timeout=1):
+                        # clean up after errored or stalled modules
+                        self.threadsFinished(log_status)
+                        continue
+
+                    if self.__activity.inFlight > 0:
+                        continue
+
+                    # The scan is idle. Give modules a chance to submit any
+                    # final events via finish(), until a FINISHED round
+                    # produces nothing new.
+                    if finishing == dispatched or final_passes < 1:
+                        break
+
+                    # Trigger module.finished()
+                    for mod in self.__moduleInstances.values():
+                        if not mod.errorState and mod.incomingEventQueue is not None:
+                            mod.incomingEventQueue.put('FINISHED')
+                    finishing = dispatched
+                    final_passes -= 1
                     continue
 
+                dispatched += 1
+
                 if not isinstance(sfEvent, SpiderFootEvent):
                     raise TypeError(
                         f"sfEvent is {type(sfEvent)}; expected SpiderFootEvent")
 
-                # for every module
-                for mod in self.__moduleInstances.values():
-                    # if it's been aborted
-                    if mod._stopScanning:
-                        # break out of the while loop
-                        raise AssertionError(f"{mod.__name__} requested stop")
+                # the same read-only event is shared by every subscriber
+                sfEvent.freeze()
+
+                # computed when first needed, as most modules want every event
+                dedupKey = None
+
+                # for every module subscribed to this event type
+                for subscribers in (self.__eventRouter.get(sfEvent.eventType, ()), self.__wildcardSubscribers):
+                    for mod in subscribers:
+                        # if it's been aborted
+                        if mod._stopScanning:
+                            # break out of the while loop
+                            raise AssertionError(f"{mod.__name__} requested stop")
+
+                        # events repeating an earlier element are only stored
+                        if sfEvent.storeOnly and not mod.__name__.startswith('sfp__stor_'):
+                            continue
 
-                    # send it the new event if applicable
-                    if not mod.errorState and mod.incomingEventQueue is not None:
-                        watchedEvents = mod.watchedEvents()
-                        if sfEvent.eventType in watchedEvents or "*" in watchedEvents:
-                            mod.incomingEventQueue.put(deepcopy(sfEvent))
+                        # send it the new event if applicable
+                        if not mod.errorState and mod.incomingEventQueue is not None:
+                            # skip data the module has already been given
+                            if SpiderFootEventDedup.wantsUnique(mod, sfEvent.eventType):
+                                if dedupKey is None:
+                                    dedupKey = SpiderFootEventDedup.key(sfEvent)
+                                if not self.__eventDedup.firstDelivery(mod.__name__, dedupKey):
+                                    continue
+
+                            if mod._mutatesEvents:
+                                mod.incomingEventQueue.put(sfEvent.copy())
+                            else:
+                                mod.incomingEventQueue.put(sfEvent)
+
+                if self.__correlator is not None:
+                    self.__correlator.add(sfEvent)
+
+                self.eventQueue.task_done()
 
         finally:
             # tell the modules to stop
             for mod in self.__moduleInstances.values():
                 mod._stopScanning = True
+            for shard in self.__shards:
+                shard.shutdown()
             self.__sharedThreadPool.shutdown(wait=True)
+            if self.__sharedAsyncLoop.running:
+                with suppress(Exception):
+                    self.__sharedAsyncLoop.submit(self.__sf.closeAsyncSessions()).result(timeout=10)
+                self.__sharedAsyncLoop.shutdown(wait=True)
+            # discard any overflow files
+            for mod in self.__moduleInstances.values():
+                with suppress(Exception):
+                    mod.incomingEventQueue.close()
 
     def threadsFinished(self, log_status: bool = False) -> bool:
         """Check if all threads are complete.
@@ -633,16 +856,15 @@ class SpiderFootScanner():
                 self.__sf.debug(
                     f"Clearing and unsetting incomingEventQueue for errored module {mod.__name__}.")
                 with suppress(Exception):
-                    while 1:
-                        mod.incomingEventQueue.get_nowait()
+                    mod.incomingEventQueue.clear()
                 mod.incomingEventQueue = None
+                self.__unrouteModule(mod)
 
         if not modules_running and not queues_empty:
             self.__sf.debug("Clearing queues for stalled/aborted modules.")
             for mod in self.__moduleInstances.values():
                 with suppress(Exception):
-                    while True:
-                        mod.incomingEventQueue.get_nowait()
+                    mod.incomingEventQueue.clear()
 
         if log_status:
             events_queued = ", ".join(
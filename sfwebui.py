@@ -36,10 +36,12 @@ import markdown
 from sflib import SpiderFoot
 from sfscan import startSpiderFootScanner
 from spiderfoot import SpiderFootDb
+from spiderfoot import SpiderFootDbPool
 from spiderfoot import SpiderFootHelpers
 from spiderfoot import __version__
 from spiderfoot.logger import logListenerSetup, logWorkerSetup
 from spiderfoot.workspace import SpiderFootWorkspace
+from spiderfoot.correlation.rule_compiler import CompiledRuleSet
 
 mp.set_start_method("spawn", force=True)
 
@@ -85,6 +87,14 @@ class SpiderFootWebUi:
         sf = SpiderFoot(self.defaultConfig)
         self.config = sf.configUnserialize(dbh.configGet(), self.defaultConfig)
 
+        # Handles for requests are checked out of a pool sized to match the
+        # server's worker threads, rather than opened for every request
+        self.dbPool = SpiderFootDbPool(
+            self.config,
+            maxSize=cherrypy.server.thread_pool,
+            factory=lambda: SpiderFootDb(self.config)
+        )
+
         # Set up logging
         if loggingQueue is None:
             self.loggingQueue = mp.Queue()
@@ -123,6 +133,27 @@ class SpiderFootWebUi:
             "tools.response_headers.headers": secure_headers.framework.cherrypy()
         })
 
+    def dbHandle(self: 'SpiderFootWebUi') -> SpiderFootDb:
+        """Database handle for the current request.
+
+        Within a request the handle comes from the connection pool, and is
+        returned to it when the request ends. Outside of a request a new
+        handle is opened.
+
+        Returns:
+            SpiderFootDb: database handle
+        """
+        request = cherrypy.serving.request
+        if request.app is None:
+            return SpiderFootDb(self.config)
+
+        dbh = getattr(request, 'spiderfootDbh', None)
+        if dbh is None:
+            dbh = self.dbPool.acquire()
+            request.spiderfootDbh = dbh
+            request.hooks.attach('on_end_request', self.dbPool.release, dbh=dbh)
+        return dbh
+
     def error_page(self: 'SpiderFootWebUi') -> None:
         """Error page."""
         cherrypy.response.status = 500
@@ -258,7 +289,7 @@ class SpiderFootWebUi:
             value = "%"
             regex = ""
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         criteria = {
             'scan_id': id or '',
             'type': eventType or '',
@@ -345,7 +376,7 @@ class SpiderFootWebUi:
         Returns:
             bytes: scan logs in CSV format
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         try:
             data = dbh.scanLogs(id)
@@ -378,7 +409,7 @@ class SpiderFootWebUi:
         Returns:
             str: results in CSV or Excel format
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         try:
             data = dbh.scanCorrelations(id)
@@ -425,7 +456,7 @@ class SpiderFootWebUi:
         Returns:
             str: results in CSV or Excel format
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         data = dbh.scanResultEvent(id, type)
 
         if filetype.lower() in ["xlsx", "excel"]:
@@ -485,7 +516,7 @@ class SpiderFootWebUi:
         Returns:
             str: results in CSV or Excel format
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         scaninfo = dict()
         data = list()
         scan_name = ""
@@ -616,7 +647,7 @@ class SpiderFootWebUi:
         Returns:
             str: results in JSON format
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         scaninfo = list()
         scan_name = ""
 
@@ -677,7 +708,7 @@ class SpiderFootWebUi:
         if not id:
             return None
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         data = dbh.scanResultEvent(id, filterFp=True)
         scan = dbh.scanInstanceGet(id)
 
@@ -713,7 +744,7 @@ class SpiderFootWebUi:
         Returns:
             str: GEXF data
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         data = list()
         roots = list()
         scan_name = ""
@@ -758,7 +789,7 @@ class SpiderFootWebUi:
         Returns:
             dict: scan options for the specified scan
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         ret = dict()
 
         meta = dbh.scanInstanceGet(id)
@@ -814,7 +845,7 @@ class SpiderFootWebUi:
         # Snapshot the current configuration to be used by the scan
         cfg = deepcopy(self.config)
         modlist = list()
-        dbh = SpiderFootDb(cfg)
+        dbh = self.dbHandle()
         info = dbh.scanInstanceGet(id)
         
         if not info:
@@ -883,7 +914,7 @@ class SpiderFootWebUi:
         # Snapshot the current configuration to be used by the scan
         cfg = deepcopy(self.config)
         modlist = list()
-        dbh = SpiderFootDb(cfg)
+        dbh = self.dbHandle()
 
         for id in ids.split(","):
             info = dbh.scanInstanceGet(id)
@@ -941,7 +972,7 @@ class SpiderFootWebUi:
         Returns:
             str: New scan page HTML
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         types = dbh.eventTypes()
         templ = Template(
             filename='spiderfoot/templates/newscan.tmpl', lookup=self.lookup)
@@ -959,7 +990,7 @@ class SpiderFootWebUi:
         Returns:
             str: New scan page HTML pre-populated with options from cloned scan.
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         types = dbh.eventTypes()
         info = dbh.scanInstanceGet(id)
         
@@ -1019,7 +1050,7 @@ class SpiderFootWebUi:
         Returns:
             str: scan info page HTML
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         res = dbh.scanInstanceGet(id)
         if res is None:
             return self.error("Scan ID not found.")
@@ -1123,7 +1154,7 @@ class SpiderFootWebUi:
         if not id:
             return self.jsonify_error('404', "No scan specified")
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         ids = id.split(',')
 
         for scan_id in ids:
@@ -1188,7 +1219,7 @@ class SpiderFootWebUi:
 
         # Save settings
         try:
-            dbh = SpiderFootDb(self.config)
+            dbh = self.dbHandle()
             useropts = json.loads(allopts)
             cleanopts = dict()
             for opt in list(useropts.keys()):
@@ -1236,7 +1267,7 @@ class SpiderFootWebUi:
 
         # Save settings
         try:
-            dbh = SpiderFootDb(self.config)
+            dbh = self.dbHandle()
             useropts = json.loads(allopts)
             cleanopts = dict()
             for opt in list(useropts.keys()):
@@ -1261,7 +1292,7 @@ class SpiderFootWebUi:
             bool: success
         """
         try:
-            dbh = SpiderFootDb(self.config)
+            dbh = self.dbHandle()
             dbh.configClear()  # Clear it in the DB
             self.config = deepcopy(self.defaultConfig)  # Clear in memory
         except Exception:
@@ -1283,7 +1314,7 @@ class SpiderFootWebUi:
         """
         cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         if fp not in ["0", "1"]:
             return json.dumps(["ERROR", "No FP flag set or not set correctly."]).encode('utf-8')
@@ -1335,7 +1366,7 @@ class SpiderFootWebUi:
         """
         cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         types = dbh.eventTypes()
         ret = list()
 
@@ -1379,15 +1410,16 @@ class SpiderFootWebUi:
         """
         cherrypy.response.headers['Content-Type'] = "application/json; charset=utf-8"
         
+        # rule details are under meta in the YAML rules
         rules = list()
-        for rule in self.config.get('__correlationrules__', []):
+        for rule in CompiledRuleSet(self.config.get('__correlationrules__') or []).rules:
             rules.append({
-                'id': rule.get('id', ''),
-                'name': rule.get('name', ''),
-                'risk': rule.get('risk', 'UNKNOWN'),
-                'description': rule.get('description', '')
+                'id': rule.rule.get('id', ''),
+                'name': rule.name,
+                'risk': rule.risk,
+                'description': rule.description
             })
-            
+
         return sorted(rules, key=lambda x: x['name'])
 
     @cherrypy.expose
@@ -1412,7 +1444,7 @@ class SpiderFootWebUi:
         Returns:
             str: query results as JSON
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         if not query:
             return self.jsonify_error('400', "Invalid query.")
@@ -1474,7 +1506,7 @@ class SpiderFootWebUi:
             return self.error("Invalid target type. Could not recognize it as a target SpiderFoot supports.")
 
         # Swap the globalscantable for the database handler
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         # Snapshot the current configuration to be used by the scan
         cfg = deepcopy(self.config)
@@ -1570,7 +1602,7 @@ class SpiderFootWebUi:
         if not id:
             return self.jsonify_error('404', "No scan specified")
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         ids = id.split(',')
 
         for scan_id in ids:
@@ -1598,7 +1630,7 @@ class SpiderFootWebUi:
     @cherrypy.tools.json_out()
     def vacuum(self):
         """Vacuum the database."""
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         try:
             if dbh.vacuumDB():
                 return json.dumps(["SUCCESS", ""]).encode('utf-8')
@@ -1624,7 +1656,7 @@ class SpiderFootWebUi:
         Returns:
             list: scan log
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         retdata = []
 
         try:
@@ -1652,7 +1684,7 @@ class SpiderFootWebUi:
         Returns:
             list: scan errors
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         retdata = []
 
         try:
@@ -1675,7 +1707,7 @@ class SpiderFootWebUi:
         Returns:
             list: scan list
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         data = dbh.scanInstanceList()
         retdata = []
 
@@ -1722,7 +1754,7 @@ class SpiderFootWebUi:
         Returns:
             list: scan status
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         data = dbh.scanInstanceGet(id)
 
         if not data:
@@ -1758,7 +1790,7 @@ class SpiderFootWebUi:
         """
         retdata = []
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         try:
             scandata = dbh.scanResultSummary(id, by)
@@ -1792,7 +1824,7 @@ class SpiderFootWebUi:
             list: correlation result list or error message
         """
         retdata = []
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         try:
             self.log.debug(f"Fetching correlations for scan {id}")
@@ -1846,7 +1878,7 @@ class SpiderFootWebUi:
         """
         retdata = []
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         if not eventType:
             eventType = 'ALL'
@@ -1889,7 +1921,7 @@ class SpiderFootWebUi:
         Returns:
             list: unique search results
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         retdata = []
 
         try:
@@ -1935,7 +1967,7 @@ class SpiderFootWebUi:
         if not id:
             return self.jsonify_error('404', "No scan specified")
 
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
 
         try:
             return dbh.scanResultHistory(id)
@@ -1954,7 +1986,7 @@ class SpiderFootWebUi:
         Returns:
             dict
         """
-        dbh = SpiderFootDb(self.config)
+        dbh = self.dbHandle()
         pc = dict()
         datamap = dict()
         retdata = dict()
@@ -2211,7 +2243,7 @@ class SpiderFootWebUi:
                 return {'success': False, 'error': 'No valid scan IDs provided'}
             
             # Verify scans exist before importing
-            dbh = SpiderFootDb(self.config)
+            dbh = self.dbHandle()
             valid_scans = []
             invalid_scans = []
             
@@ -2821,7 +2853,7 @@ This is a placeholder MCP report. Integration with actual MCP server required.
             workspace.load_workspace()
             
             # Get workspace summary and scan details
-            dbh = SpiderFootDb(self.config)
+            dbh = self.dbHandle()
             scan_details = []
             
             for scan in workspace.scans:
@@ -2868,7 +2900,7 @@ This is a placeholder MCP report. Integration with actual MCP server required.
             if not workspace.scans or len(workspace.scans) < 2:
                 return {'success': True, 'correlations': [], 'message': 'Need at least 2 scans for cross-correlation analysis'}
             
-            dbh = SpiderFootDb(self.config)
+            dbh = self.dbHandle()
             correlations = []
               # Get correlations for each scan
             finished_scans = 0
@@ -2953,7 +2985,7 @@ This is a placeholder MCP report. Integration with actual MCP server required.
                 limit = 10000
 
             workspace = SpiderFootWorkspace(self.config, workspace_id)
-            dbh = SpiderFootDb(self.config)
+            dbh = self.dbHandle()
 
             if scan_id:
                 # Get results for specific scan
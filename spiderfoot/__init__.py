@@ -14,10 +14,17 @@ __email__ = "steve@binarypool.com, van1sh@van1shland.io"
 __url__ = "https://github.com/poppopjmp/spiderfoot"
 
 # Core imports for package
+from .asyncloop import SpiderFootAsyncLoop
 from .db import SpiderFootDb
+from .dbdialect import SpiderFootDbDialect, SpiderFootPostgreSQLDialect
+from .dbpool import SpiderFootDbPool
 from .event import SpiderFootEvent
+from .eventindex import SpiderFootEventDedup, SpiderFootEventIndex
+from .eventqueue import SpiderFootEventQueue, SpiderFootScanActivity
+from .eventwriter import SpiderFootEventWriter
 from .helpers import SpiderFootHelpers
-from .plugin import SpiderFootPlugin
+from .plugin import SpiderFootAsyncPlugin, SpiderFootPlugin
+from .shard import SpiderFootModuleProxy, SpiderFootModuleShard
 from .target import SpiderFootTarget
 from .threadpool import SpiderFootThreadPool
 
@@ -30,10 +37,22 @@ except ImportError:
     logger = logging.getLogger(__name__)
 
 __all__ = [
+    'SpiderFootAsyncLoop',
+    'SpiderFootAsyncPlugin',
     'SpiderFootDb', 
+    'SpiderFootDbDialect',
+    'SpiderFootDbPool',
     'SpiderFootEvent', 
+    'SpiderFootEventDedup',
+    'SpiderFootEventIndex',
+    'SpiderFootEventQueue',
+    'SpiderFootEventWriter',
+    'SpiderFootScanActivity',
     'SpiderFootHelpers', 
+    'SpiderFootModuleProxy',
+    'SpiderFootModuleShard',
     'SpiderFootPlugin',
+    'SpiderFootPostgreSQLDialect',
     'SpiderFootTarget',
     'SpiderFootThreadPool',
     'logger',
@@ -0,0 +1,120 @@
+"""SpiderFoot shared asyncio event loop.
+
+A single asyncio event loop running in a background thread, shared by all
+of a scan's asynchronous modules, so that many concurrent I/O-bound tasks
+can be in flight without a thread for each.
+"""
+
+import asyncio
+import concurrent.futures
+import logging
+import threading
+
+
+class SpiderFootAsyncLoop:
+    """An asyncio event loop running in a daemon thread.
+
+    Coroutines are submitted from other threads with submit(), which
+    returns a concurrent.futures.Future for the result. The loop is started
+    on first use.
+    """
+
+    def __init__(self, name: str = "") -> None:
+        """Initialize the loop.
+
+        Args:
+            name (str): name of the loop thread
+        """
+        self.name = name or "SpiderFootAsyncLoop"
+        self.log = logging.getLogger(f"spiderfoot.{__name__}")
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Whether the loop thread is running.
+
+        Returns:
+            bool: loop is running
+        """
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The event loop, or None if it has not been started.
+
+        Returns:
+            asyncio.AbstractEventLoop: event loop
+        """
+        return self._loop
+
+    def start(self) -> None:
+        """Start the loop thread, if it is not already running."""
+        with self._lock:
+            if self.running:
+                return
+
+            self._loop = asyncio.new_event_loop()
+            started = threading.Event()
+            self._thread = threading.Thread(
+                target=self._run, args=(self._loop, started), name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+
+    def _run(self, loop: asyncio.AbstractEventLoop, started: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(started.set)
+        try:
+            loop.run_forever()
+        finally:
+            asyncio.set_event_loop(None)
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop.
+
+        Args:
+            coro (coroutine): coroutine to run
+
+        Returns:
+            concurrent.futures.Future: result of the coroutine
+        """
+        if not self.running:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Cancel outstanding tasks and stop the loop.
+
+        Args:
+            wait (bool): wait for the loop thread to exit
+        """
+        with self._lock:
+            if not self.running:
+                return
+            loop = self._loop
+            thread = self._thread
+
+        async def _cancelTasks():
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await loop.shutdown_asyncgens()
+
+        try:
+            asyncio.run_coroutine_threadsafe(_cancelTasks(), loop).result(timeout=10)
+        except Exception as e:
+            self.log.debug(f"Error cancelling tasks on {self.name}: {e}")
+
+        loop.call_soon_threadsafe(loop.stop)
+
+        if not wait:
+            return
+
+        thread.join()
+        loop.close()
+        with self._lock:
+            if self._loop is loop:
+                self._loop = None
+                self._thread = None
@@ -1,15 +1,18 @@
 import logging
+from collections import defaultdict
 
 class EventEnricher:
     def __init__(self, dbh):
         self.log = logging.getLogger("spiderfoot.correlation.enricher")
         self.dbh = dbh
+        # Sources and entities already fetched, by (scan ID, event hash),
+        # so that events shared by several rules are only fetched once
+        self._sources = {}
+        self._entities = {}
 
     def enrich_sources(self, scan_id, events):
-        # Example: Add source info to each event
-        for event in events:
-            event['sources'] = self.dbh.get_sources(scan_id, event['hash'])
-        return events
+        # Add source info to each event
+        return self._enrich(scan_id, events, 'sources', self._sources, self.dbh.get_sources_many)
 
     def enrich_children(self, scan_id, events):
         # Example: Add child info to each event
@@ -18,7 +21,37 @@ class EventEnricher:
         return events
 
     def enrich_entities(self, scan_id, events):
-        # Example: Add entity info to each event
+        # Add entity info to each event
+        return self._enrich(scan_id, events, 'entities', self._entities, self.dbh.get_entities_many)
+
+    def _enrich(self, scan_id, events, key, cache, fetch):
+        """Add details fetched for each event, with a single query per scan
+        for the events not already fetched.
+
+        Args:
+            scan_id (str): scan of events which do not name their own
+            events (list): event dicts
+            key (str): event key the details are added as
+            cache (dict): details already fetched, by (scan ID, event hash)
+            fetch: function returning the details of a list of event hashes in a scan, by hash
+
+        Returns:
+            list: the events
+        """
+        missing = defaultdict(dict)
+        for event in events:
+            event_hash = event.get('hash')
+            event_scan_id = event.get('scan_id', scan_id)
+            if event_hash is not None and (event_scan_id, event_hash) not in cache:
+                missing[event_scan_id][event_hash] = None
+
+        for event_scan_id, event_hashes in missing.items():
+            fetched = fetch(event_scan_id, list(event_hashes))
+            for event_hash in event_hashes:
+                cache[(event_scan_id, event_hash)] = fetched.get(event_hash, [])
+
         for event in events:
-            event['entities'] = self.dbh.get_entities(scan_id, event['hash'])
+            event_hash = event.get('hash')
+            if event_hash is not None:
+                event[key] = cache[(event.get('scan_id', scan_id), event_hash)]
         return events
@@ -0,0 +1,191 @@
+import logging
+from spiderfoot.correlation.rule_compiler import CompiledRuleSet
+from spiderfoot.correlation.rule_executor import DefaultRuleExecutionStrategy, RuleExecutor
+
+
+class _Group:
+    """Events of a rule collected so far with the same aggregation key."""
+
+    __slots__ = ('events', 'scan_ids', 'created', 'correlation_id', 'written')
+
+    def __init__(self):
+        self.events = []
+        self.scan_ids = set()
+        # whether creating the correlation has been attempted
+        self.created = False
+        self.correlation_id = None
+        # number of events written to the correlation
+        self.written = 0
+
+
+class _RuleState:
+    """Running aggregation state of a compiled correlation rule."""
+
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.rule = compiled.rule
+        self.events = []
+        self.groups = {}
+
+    def passes(self, group):
+        """Whether a group meets the rule's analysis."""
+        return self.compiled.passes(len(group.events), len(group.scan_ids))
+
+
+class IncrementalCorrelator:
+    """Evaluates correlation rules on a scan's events as they are produced.
+
+    Each rule run by the default strategy is compiled to the event types
+    it can collect and a running aggregation of the events it has
+    collected. Correlations are written by flush() once their group meets
+    the rule's analysis, and the events collected into the group after
+    that are added to them, so finalize() only has to write what is left
+    rather than read and evaluate the whole scan.
+
+    Rules run by other strategies are left to the RuleExecutor, once the
+    scan has finished.
+    """
+
+    def __init__(self, dbh, rules, scan_id, truncate_size=0):
+        """
+        Args:
+            dbh: Database handle.
+            rules (list): Correlation rules.
+            scan_id (str): Scan the events are from.
+            truncate_size (int): Length event data is truncated to when
+                stored, so that rules see the data they would be run on
+                once the scan has finished.
+        """
+        self.log = logging.getLogger("spiderfoot.correlation.incremental")
+        self.dbh = dbh
+        self.scan_id = scan_id
+        self.truncate_size = truncate_size
+        self.strategy = DefaultRuleExecutionStrategy()
+        # rules left for the RuleExecutor to run when the scan has finished
+        self.other_rules = []
+        # groups with correlations or events waiting to be written
+        self._dirty = {}
+
+        executor = RuleExecutor(dbh, [])
+        incremental = []
+        for rule in rules:
+            if not rule.get('enabled', True):
+                continue
+            # subclasses may collect or aggregate differently
+            if type(executor._strategy(rule)) is not DefaultRuleExecutionStrategy or not self.strategy._collect_rules(rule):
+                self.other_rules.append(rule)
+                continue
+            incremental.append(rule)
+
+        self.compiled = CompiledRuleSet(incremental)
+        self.states = [_RuleState(compiled) for compiled in self.compiled.rules]
+        self._state = {id(state.compiled): state for state in self.states}
+
+    def add(self, sfEvent):
+        """Evaluate the rules on an event produced by the scan.
+
+        Args:
+            sfEvent (SpiderFootEvent): Event.
+        """
+        compiled_rules = self.compiled.for_type(sfEvent.eventType)
+        if not compiled_rules:
+            return
+
+        event = self._event(sfEvent)
+        if event is None:
+            return
+
+        for compiled in compiled_rules:
+            if not compiled.matches(event):
+                continue
+            state = self._state[id(compiled)]
+            state.events.append(event)
+
+            key = compiled.group_key(event)
+            group = state.groups.get(key)
+            if group is None:
+                group = state.groups[key] = _Group()
+            group.events.append(event)
+            group.scan_ids.add(event['scan_id'])
+
+            if group.correlation_id or (not group.created and state.passes(group)):
+                self._dirty[(id(state), key)] = (state, key, group)
+
+    def _event(self, sfEvent):
+        """Event dict as the RuleExecutor reads it from the database, or
+        None for events which are not stored."""
+        data = sfEvent.data
+        if not isinstance(data, str) or not data:
+            return None
+        if self.truncate_size > 0:
+            data = data[0:self.truncate_size]
+        return {
+            'hash': sfEvent.hash,
+            'type': sfEvent.eventType,
+            'data': data,
+            'module': sfEvent.module,
+            'created': sfEvent.generated,
+            'source_event_hash': sfEvent.sourceEventHash,
+            'scan_id': self.scan_id
+        }
+
+    def flush(self):
+        """Write the correlations whose groups have met their rule's
+        analysis, and the events collected into them since the last flush.
+
+        Returns:
+            int: Number of correlations created.
+        """
+        dirty = self._dirty
+        self._dirty = {}
+        created = 0
+        for state, key, group in dirty.values():
+            if not group.created:
+                group.created = True
+                group.correlation_id = self.strategy._create_correlation_result(
+                    self.dbh, state.rule, [self.scan_id], key, group.events)
+                group.written = len(group.events)
+                if group.correlation_id:
+                    created += 1
+                continue
+
+            event_hashes = [event['hash'] for event in group.events[group.written:]]
+            if not event_hashes or not hasattr(self.dbh, 'correlationResultEventsAdd'):
+                group.written = len(group.events)
+                continue
+            try:
+                self.dbh.correlationResultEventsAdd(group.correlation_id, event_hashes)
+                group.written = len(group.events)
+            except IOError as e:
+                self.log.error(f"Error adding events to correlation {group.correlation_id}: {e}")
+                self._dirty[(id(state), key)] = (state, key, group)
+        return created
+
+    def finalize(self):
+        """Write what is left once the scan has finished.
+
+        Returns:
+            dict: Results of the rules evaluated, by rule ID, as returned by
+            RuleExecutor.run().
+        """
+        self.flush()
+
+        results = {}
+        for state in self.states:
+            rule = state.rule
+            for hook in RuleExecutor._event_hooks['pre_rule']:
+                hook(rule, [self.scan_id])
+
+            correlated = [group for group in state.groups.values() if group.correlation_id]
+            result = {
+                'meta': rule['meta'],
+                'matched': bool(correlated),
+                'events': state.events,
+                'correlated_events': [event for group in correlated for event in group.events],
+                'correlations_created': len(correlated)
+            }
+
+            for hook in RuleExecutor._event_hooks['post_rule']:
+                hook(rule, result, [self.scan_id])
+            results[state.compiled.id] = result
+        return results
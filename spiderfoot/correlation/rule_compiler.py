@@ -0,0 +1,253 @@
+import functools
+import re
+from collections import defaultdict
+
+
+class CompiledFilter:
+    """A collection filter compiled once, rather than interpreted for every
+    event it is applied to.
+
+    Regex filters search with a single alternation of their patterns where
+    the patterns allow it.
+    """
+
+    __slots__ = ('method', 'field', 'value', 'search')
+
+    def __init__(self, method, field, value):
+        self.method = method
+        self.field = field
+        self.value = list(value) if isinstance(value, tuple) else value
+        self.search = None
+        if method == 'regex':
+            self.search = _compile_search(tuple(self.value) if isinstance(self.value, list) else (self.value,))
+
+    def matches(self, event):
+        """Whether an event passes the filter."""
+        if self.method == 'exact':
+            return event.get(self.field) == self.value
+        if self.method == 'regex':
+            return self.search(str(event.get(self.field, '')))
+        # Unknown method, all events pass
+        return True
+
+    def filter(self, events):
+        """Events which pass the filter."""
+        field = self.field
+        if self.method == 'exact':
+            value = self.value
+            return [e for e in events if e.get(field) == value]
+        if self.method == 'regex':
+            search = self.search
+            return [e for e in events if search(str(e.get(field, '')))]
+        return events
+
+
+def compile_filter(collect_rule):
+    """Compile a collection filter.
+
+    Args:
+        collect_rule (dict): filter, with method, field and value
+
+    Returns:
+        CompiledFilter: compiled filter, shared by identical filters
+    """
+    value = collect_rule.get('value', '')
+    if isinstance(value, list):
+        value = tuple(value)
+    return _compile_filter(collect_rule.get('method', ''), collect_rule.get('field', ''), value)
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_filter(method, field, value):
+    return CompiledFilter(method, field, value)
+
+
+def _compile_search(patterns):
+    # re.search() finds a match for the alternation of the patterns
+    # exactly where it finds one for any of them. Backreferences would be
+    # renumbered, and inline flags are only allowed at the start of a
+    # pattern, so patterns using them are searched one by one.
+    patterns = [_search_pattern(str(p)) for p in patterns]
+    if len(patterns) == 1:
+        return _searcher(re.compile(patterns[0]))
+    if not any(_backref.search(p) for p in patterns):
+        try:
+            return _searcher(re.compile('|'.join(f"(?:{p})" for p in patterns)))
+        except re.error:
+            pass
+    compiled = [re.compile(p) for p in patterns]
+    return lambda value: any(c.search(value) for c in compiled)
+
+
+def _searcher(compiled):
+    search = compiled.search
+    return lambda value: search(value) is not None
+
+
+_backref = re.compile(r'\\[1-9]|\(\?P=')
+
+
+def _search_pattern(pattern):
+    # A leading or trailing .* can match nothing, so can't change whether
+    # re.search() finds a match, but makes searches of long values slow.
+    stripped = pattern
+    while stripped.startswith('.*') and stripped[2:3] not in ('?', '*', '+', '{'):
+        stripped = stripped[2:]
+    while stripped.endswith('.*') and _unescaped(stripped, len(stripped) - 2):
+        stripped = stripped[:-2]
+    if stripped == pattern:
+        return pattern
+    try:
+        re.compile(stripped)
+    except re.error:
+        return pattern
+    return stripped
+
+
+def _unescaped(pattern, pos):
+    backslashes = 0
+    while pos - backslashes > 0 and pattern[pos - backslashes - 1] == '\\':
+        backslashes += 1
+    return backslashes % 2 == 0
+
+
+def field_accessor(field):
+    """Function returning the value of a field of an event, as rules
+    aggregate on it.
+
+    Fields of the source event, like 'source.data', are taken from the
+    event itself.
+
+    Args:
+        field (str): field name
+
+    Returns:
+        function: accessor, taking an event dict
+    """
+    if '.' in field and field.split('.')[0] == 'source':
+        return lambda event: event.get('data', '')
+    return lambda event: event.get(field, '')
+
+
+def collect_rules(rule):
+    """Collection filters of a rule, all of which an event must pass."""
+    collections = rule.get('collections', {})
+
+    # Handle both dict and list formats for collections
+    if isinstance(collections, list):
+        # Test format: collections is a list of dicts with 'collect' key
+        filters = []
+        for collection in collections:
+            if 'collect' in collection:
+                filters.extend(collection['collect'])
+        return filters
+    # YAML format: collections is a dict with 'collect' key
+    return collections.get('collect', [])
+
+
+def collect_types(filters):
+    """Event types which can pass collection filters.
+
+    Returns:
+        set: event types, or None if the filters do not restrict the type
+    """
+    event_types = None
+    for collect_rule in filters:
+        if collect_rule.get('method') != 'exact' or collect_rule.get('field') != 'type':
+            continue
+        value = collect_rule.get('value')
+        values = set(value) if isinstance(value, list) else {value}
+        event_types = values if event_types is None else event_types & values
+    return event_types
+
+
+class CompiledRule:
+    """A correlation rule compiled to the form it is evaluated in.
+
+    Attributes:
+        rule (dict): the rule
+        collect_rules (list): collection filters, as written
+        filters (list): compiled collection filters
+        event_types (set): event types the rule can collect, or None for any
+        aggregation_field (str): field events are grouped on, or None to
+            put all events in one group
+        group_key: function returning the group key of an event
+        minimum (int): events a group needs to pass every threshold
+        multi_scan (bool): groups need events from more than one scan
+    """
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.collect_rules = collect_rules(rule)
+        self.filters = [compile_filter(c) for c in self.collect_rules]
+        self.event_types = collect_types(self.collect_rules)
+
+        aggregation = rule.get('aggregation', {})
+        if aggregation:
+            self.aggregation_field = aggregation.get('field', 'data')
+            accessor = field_accessor(self.aggregation_field)
+            self.group_key = lambda event: str(accessor(event))
+        else:
+            self.aggregation_field = None
+            self.group_key = lambda event: 'all'
+
+        self.minimum = max(
+            [a.get('minimum', 1) for a in rule.get('analysis', []) or [] if a.get('method') == 'threshold'],
+            default=1
+        )
+        self.multi_scan = rule.get('meta', {}).get('type') == 'multi-scan'
+
+    @property
+    def id(self):
+        return self.rule.get('id', self.rule.get('meta', {}).get('name', 'unknown'))
+
+    @property
+    def name(self):
+        return self.rule.get('meta', {}).get('name', self.rule.get('name', ''))
+
+    @property
+    def risk(self):
+        return self.rule.get('meta', {}).get('risk', self.rule.get('risk', 'UNKNOWN'))
+
+    @property
+    def description(self):
+        return self.rule.get('meta', {}).get('description', self.rule.get('description', ''))
+
+    def matches(self, event):
+        """Whether an event passes all the collection filters."""
+        return all(f.matches(event) for f in self.filters)
+
+    def passes(self, event_count, scan_count):
+        """Whether a group of events meets the rule's analysis."""
+        if self.multi_scan and scan_count <= 1:
+            return False
+        return event_count >= self.minimum
+
+
+class CompiledRuleSet:
+    """Rules compiled together, indexed by the event types they collect."""
+
+    def __init__(self, rules):
+        self.rules = [CompiledRule(rule) for rule in rules]
+        self._by_type = defaultdict(list)
+        self._any_type = []
+        for compiled in self.rules:
+            if compiled.event_types is None:
+                self._any_type.append(compiled)
+                continue
+            for event_type in compiled.event_types:
+                self._by_type[event_type].append(compiled)
+
+    @property
+    def event_types(self):
+        """Event types any of the rules can collect, or None for any."""
+        if self._any_type:
+            return None
+        return set(self._by_type)
+
+    def for_type(self, event_type):
+        """Rules which can collect events of a type, in rule order."""
+        by_type = self._by_type.get(event_type, [])
+        if not self._any_type:
+            return by_type
+        return [c for c in self.rules if c.event_types is None or event_type in c.event_types]
@@ -1,7 +1,53 @@
+import heapq
 import logging
 from copy import deepcopy
 from collections import defaultdict
+from operator import itemgetter
 from spiderfoot.correlation.rule_loader import RuleLoader
+from spiderfoot.correlation.rule_compiler import CompiledRule, CompiledRuleSet, collect_rules, collect_types, compile_filter, field_accessor
+
+
+class ScanEventIndex:
+    """Events read once from each scan, indexed by event type, so that
+    every rule collects from the same read and only looks at the event
+    types it can match.
+    """
+
+    def __init__(self):
+        self._events = {}
+        self._by_type = {}
+
+    def add(self, scan_id, events):
+        """Add the events read from a scan.
+
+        Args:
+            scan_id (str): scan ID
+            events (list): event dicts, in the order they were read
+        """
+        scan_events = self._events.setdefault(scan_id, [])
+        buckets = self._by_type.setdefault(scan_id, defaultdict(list))
+        for event in events:
+            buckets[event.get('type')].append((len(scan_events), event))
+            scan_events.append(event)
+
+    def events(self, scan_id, event_types=None):
+        """Events of a scan, in the order they were read.
+
+        Args:
+            scan_id (str): scan ID
+            event_types (set): only events of these types (default: all)
+
+        Returns:
+            list: event dicts, which must not be modified
+        """
+        if event_types is None:
+            return self._events.get(scan_id, [])
+        buckets = self._by_type.get(scan_id, {})
+        selected = [buckets[t] for t in event_types if t in buckets]
+        if len(selected) == 1:
+            return [event for _, event in selected[0]]
+        return [event for _, event in heapq.merge(*selected, key=itemgetter(0))]
+
 
 class RuleExecutionStrategy:
     """Base class for pluggable rule execution strategies."""
@@ -9,16 +55,24 @@ class RuleExecutionStrategy:
         raise NotImplementedError
 
 class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
-    def execute(self, dbh, rule, scan_ids):
-        """Execute correlation rule and save results to database."""
-        import uuid
-        from collections import defaultdict
-        
+    def execute(self, dbh, rule, scan_ids, scan_events=None):
+        """Execute correlation rule and save results to database.
+
+        Args:
+            dbh: Database handle.
+            rule (dict): The correlation rule.
+            scan_ids (list): Scans the rule is run over.
+            scan_events (ScanEventIndex, optional): Events already read from
+                the scans, shared by all the rules being run. Read from the
+                database for this rule alone if omitted.
+        """
         log = logging.getLogger("spiderfoot.correlation.strategy")
         log.debug(f"Processing rule {rule.get('id', 'unknown')} for scans {scan_ids}")
         
+        compiled = CompiledRule(rule)
+
         # Step 1: Collect data based on rule collections
-        collected_events = self._collect_events(dbh, rule, scan_ids)
+        collected_events = self._collect_events(dbh, rule, scan_ids, scan_events, compiled)
         log.debug(f"Collected {len(collected_events)} events")
         
         if not collected_events:
@@ -27,6 +81,7 @@ class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
                 'meta': rule['meta'],
                 'matched': False,
                 'events': [],
+                'correlated_events': [],
                 'correlations_created': 0
             }
         
@@ -40,35 +95,30 @@ class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
         
         # Step 4: Create correlation results for valid groups
         correlations_created = 0
+        correlated_events = []
         for group_key, events in filtered_groups.items():
             correlation_id = self._create_correlation_result(dbh, rule, scan_ids, group_key, events)
             if correlation_id:
                 correlations_created += 1
+                correlated_events.extend(events)
                 log.debug(f"Created correlation {correlation_id} for group {group_key}")
         
         return {
             'meta': rule['meta'],
             'matched': correlations_created > 0,
             'events': collected_events,
+            # the events of the correlations created, rather than all collected
+            'correlated_events': correlated_events,
             'correlations_created': correlations_created
         }
     
-    def _collect_events(self, dbh, rule, scan_ids):
+    def _collect_events(self, dbh, rule, scan_ids, scan_events=None, compiled=None):
         """Collect events from database based on rule collections."""
         log = logging.getLogger("spiderfoot.correlation.collect")
         
-        collections = rule.get('collections', {})
-        
-        # Handle both dict and list formats for collections
-        if isinstance(collections, list):
-            # Test format: collections is a list of dicts with 'collect' key
-            collect_rules = []
-            for collection in collections:
-                if 'collect' in collection:
-                    collect_rules.extend(collection['collect'])
-        else:
-            # YAML format: collections is a dict with 'collect' key
-            collect_rules = collections.get('collect', [])
+        if compiled is None:
+            compiled = CompiledRule(rule)
+        collect_rules = compiled.collect_rules
         
         if not collect_rules:
             log.warning("No collection rules defined")
@@ -77,20 +127,51 @@ class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
         # For each scan, collect matching events
         all_events = []
         for scan_id in scan_ids:
-            scan_events = self._get_scan_events(dbh, scan_id, collect_rules)
-            all_events.extend(scan_events)
+            if scan_events is None:
+                events = self._get_scan_events(dbh, scan_id, collect_rules)
+            else:
+                events = self._filter_events(scan_events.events(scan_id, compiled.event_types), collect_rules)
+            all_events.extend(events)
         
         return all_events
-    
-    def _get_scan_events(self, dbh, scan_id, collect_rules):
-        """Get events for a specific scan that match collection rules."""
+
+    def _collect_rules(self, rule):
+        """Collection filters of a rule, all of which an event must pass."""
+        return collect_rules(rule)
+
+    def _collect_types(self, collect_rules):
+        """Event types which can pass the collection filters.
+
+        Returns:
+            set: event types, or None if the filters do not restrict the type
+        """
+        return collect_types(collect_rules)
+
+    def _get_scan_events(self, dbh, scan_id, collect_rules, event_types=None):
+        """Get events for a specific scan that match collection rules.
+
+        Args:
+            dbh: Database handle.
+            scan_id (str): Scan ID.
+            collect_rules (list): Collection filters.
+            event_types (set, optional): Only read events of these types. By
+                default, the types the collection filters can match.
+
+        Returns:
+            list: Event dicts.
+        """
         log = logging.getLogger("spiderfoot.correlation.collect")
         
+        if event_types is None:
+            event_types = self._collect_types(collect_rules)
+        if event_types is not None and not event_types:
+            return []
+        
+        dbh_lock = getattr(dbh, 'dbhLock', None)
         try:
             # Check which table schema we're working with
             # Try the simplified test schema first
             try:
-                dbh_lock = getattr(dbh, 'dbhLock', None)
                 if dbh_lock:
                     with dbh_lock:
                         dbh.dbh.execute("SELECT scan_id, type, data FROM tbl_scan_results WHERE scan_id = ? LIMIT 1", [scan_id])
@@ -105,6 +186,9 @@ class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
                 query_params = [scan_id]
                 
             except Exception:
+                # the failed query aborts the transaction on PostgreSQL
+                if getattr(dbh, 'db_type', None) == 'postgresql':
+                    dbh.conn.rollback()
                 # Use full production schema
                 base_query = """
                     SELECT hash, type, data, module, generated, source_event_hash 
@@ -113,6 +197,11 @@ class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
                 """
                 query_params = [scan_id]
             
+            # Only read the event types the rules can collect
+            if event_types is not None:
+                base_query += f" AND type IN ({', '.join('?' * len(event_types))})"
+                query_params.extend(sorted(event_types))
+            
             # Execute query
             events = []
             if dbh_lock:
@@ -138,40 +227,26 @@ class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
             
             log.debug(f"Retrieved {len(events)} base events for scan {scan_id}")
             
-            # Apply collection filters
-            filtered_events = events
-            for collect_rule in collect_rules:
-                filtered_events = self._apply_collection_filter(filtered_events, collect_rule)
-                log.debug(f"After filter {collect_rule}, {len(filtered_events)} events remain")
-            
-            return filtered_events
+            return self._filter_events(events, collect_rules)
             
         except Exception as e:
             log.error(f"Error collecting events for scan {scan_id}: {e}")
             return []
+
+    def _filter_events(self, events, collect_rules):
+        """Apply all the collection filters to events."""
+        log = logging.getLogger("spiderfoot.correlation.collect")
+        
+        filtered_events = events
+        for collect_rule in collect_rules:
+            filtered_events = self._apply_collection_filter(filtered_events, collect_rule)
+            log.debug(f"After filter {collect_rule}, {len(filtered_events)} events remain")
+        return filtered_events
     
     def _apply_collection_filter(self, events, collect_rule):
         """Apply a single collection filter to events."""
-        method = collect_rule.get('method', '')
-        field = collect_rule.get('field', '')
-        value = collect_rule.get('value', '')
-        
-        if method == 'exact':
-            return [e for e in events if e.get(field) == value]
-        elif method == 'regex':
-            import re
-            patterns = value if isinstance(value, list) else [value]
-            filtered = []
-            for event in events:
-                event_value = str(event.get(field, ''))
-                for pattern in patterns:
-                    if re.search(pattern, event_value):
-                        filtered.append(event)
-                        break
-            return filtered
-        else:
-            # Unknown method, return all events
-            return events
+        # compiled once per distinct filter, with its regexes
+        return compile_filter(collect_rule).filter(events)
     
     def _aggregate_events(self, events, aggregation):
         """Group events according to aggregation rules."""
@@ -179,27 +254,14 @@ class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
             # No aggregation, return all events in a single group
             return {'all': events}
         
-        field = aggregation.get('field', 'data')
+        accessor = field_accessor(aggregation.get('field', 'data'))
         groups = defaultdict(list)
         
         for event in events:
-            # Handle nested field references like 'source.data'
-            key_value = self._get_field_value(event, field)
-            groups[str(key_value)].append(event)
+            groups[str(accessor(event))].append(event)
         
         return dict(groups)
     
-    def _get_field_value(self, event, field):
-        """Get field value from event, supporting nested references."""
-        if '.' in field:
-            # Handle nested fields like 'source.data'
-            parts = field.split('.')
-            if parts[0] == 'source':
-                # For source fields, we'll use the event data as placeholder
-                return event.get('data', '')
-        
-        return event.get(field, '')
-    
     def _analyze_groups(self, groups, analysis_rules, rule=None):
         """
         Apply analysis rules to filter groups. Also enforces multi-scan logic if required.
@@ -302,6 +364,98 @@ class DefaultRuleExecutionStrategy(RuleExecutionStrategy):
             log.error(f"Error creating correlation result: {e}", exc_info=True)
             return None
 
+class ValueIndexRuleExecutionStrategy(RuleExecutionStrategy):
+    """Runs workspace rules which group events of some types by their data
+    from the database's value index, rather than reading every event of
+    every scan, so they take time in proportion to the values shared by
+    the scans.
+
+    Values are matched once normalised, as they are indexed, thresholds
+    count the scans a value is found in, and each correlation links the
+    first event with the value in each scan.
+    """
+
+    # analysis methods answered from the scans a value is found in
+    analysis_methods = {'threshold', 'outlier'}
+
+    @classmethod
+    def supports(cls, rule):
+        """Whether a rule can be run from the value index.
+
+        Args:
+            rule (dict): correlation rule
+
+        Returns:
+            bool: the rule is a workspace rule collecting events by type
+            and grouping them by data
+        """
+        if rule.get('meta', {}).get('scope') != 'workspace':
+            return False
+        filters = collect_rules(rule)
+        if not filters or any(f.get('field') != 'type' or f.get('method') not in ('exact', 'regex') for f in filters):
+            return False
+        aggregation = rule.get('aggregation', {})
+        if not aggregation or aggregation.get('field', 'data') != 'data':
+            return False
+        return all(a.get('method') in cls.analysis_methods for a in rule.get('analysis', []) or [])
+
+    def execute(self, dbh, rule, scan_ids):
+        """Execute correlation rule and save results to database.
+
+        Args:
+            dbh (SpiderFootDb): Database handle.
+            rule (dict): The correlation rule.
+            scan_ids (list): Scans the rule is run over.
+        """
+        log = logging.getLogger("spiderfoot.correlation.strategy")
+        log.debug(f"Processing rule {rule.get('id', 'unknown')} for scans {scan_ids} from the value index")
+
+        compiled = CompiledRule(rule)
+        event_types = compiled.event_types
+        if event_types is None:
+            event_types = {row[1] for row in dbh.eventTypes()}
+        event_types = sorted(t for t in event_types if compiled.matches({'type': t}))
+
+        min_scans = max(compiled.minimum, 2 if compiled.multi_scan else 1)
+        max_scans = 0
+        for analysis_rule in rule.get('analysis', []) or []:
+            if analysis_rule.get('method') == 'outlier':
+                limit = max(1, int(len(scan_ids) * analysis_rule.get('maximum_percent', 10) / 100))
+                max_scans = min(max_scans, limit) if max_scans else limit
+
+        groups = defaultdict(list)
+        for value, event_type, scan_id, event_hash, _ in dbh.scanValueIndexSearch(
+                event_types, list(scan_ids), min_scans, max_scans):
+            groups[value].append({
+                'hash': event_hash,
+                'type': event_type,
+                'data': value,
+                'scan_id': scan_id
+            })
+        log.debug(f"Found {len(groups)} values in {min_scans} or more scans")
+
+        creator = DefaultRuleExecutionStrategy()
+        correlations_created = 0
+        collected_events = []
+        correlated_events = []
+        for value, events in groups.items():
+            collected_events.extend(events)
+            correlation_id = creator._create_correlation_result(dbh, rule, scan_ids, value, events)
+            if correlation_id:
+                correlations_created += 1
+                correlated_events.extend(events)
+                log.debug(f"Created correlation {correlation_id} for group {value}")
+
+        return {
+            'meta': rule['meta'],
+            'matched': correlations_created > 0,
+            # only the events of values meeting the analysis are read
+            'events': collected_events,
+            'correlated_events': correlated_events,
+            'correlations_created': correlations_created
+        }
+
+
 class RuleExecutor:
     _strategy_registry = {}
     _event_hooks = {
@@ -327,18 +481,26 @@ class RuleExecutor:
         self.scan_ids = scan_ids if scan_ids else []
         self.results = {}
         self.debug = debug
+        self._value_index = None
 
     def run(self):
+        rules = []
         for rule in self.rules:
             if not rule.get('enabled', True):
                 self.log.info(f"Skipping disabled rule: {rule.get('id', rule.get('meta', {}).get('name', 'unknown'))}")
                 continue
+            rules.append(rule)
+
+        # read each scan once for all the rules, rather than once per rule
+        scan_events = self._read_scan_events(rules)
+
+        for rule in rules:
             try:
                 if self.debug:
                     print(f"[DEBUG] Evaluating rule: {rule.get('id', rule.get('meta', {}).get('name', 'unknown'))}")
                 for hook in self._event_hooks['pre_rule']:
                     hook(rule, self.scan_ids)
-                rule_result = self.process_rule(rule)
+                rule_result = self.process_rule(rule, scan_events)
                 if self.debug:
                     print(f"[DEBUG] Rule result: {rule_result}")
                 for hook in self._event_hooks['post_rule']:
@@ -348,13 +510,59 @@ class RuleExecutor:
                 self.log.error(f"Error processing rule {rule.get('id', rule.get('meta', {}).get('name', 'unknown'))}: {e}")
         return self.results
 
-    def process_rule(self, rule):
-        rule_type = rule.get('meta', {}).get('type', 'default')
-        strategy = self._strategy_registry.get(rule_type, DefaultRuleExecutionStrategy())
+    def process_rule(self, rule, scan_events=None):
+        strategy = self._strategy(rule)
         if self.debug:
             print(f"[DEBUG] Using strategy: {strategy.__class__.__name__}")
+        if scan_events is not None and isinstance(strategy, DefaultRuleExecutionStrategy):
+            return strategy.execute(self.dbh, rule, self.scan_ids, scan_events=scan_events)
         return strategy.execute(self.dbh, rule, self.scan_ids)
 
+    def _strategy(self, rule):
+        rule_type = rule.get('meta', {}).get('type', 'default')
+        if rule_type in self._strategy_registry:
+            return self._strategy_registry[rule_type]
+        if len(self.scan_ids) > 1 and ValueIndexRuleExecutionStrategy.supports(rule) and self._scans_indexed():
+            return ValueIndexRuleExecutionStrategy()
+        return DefaultRuleExecutionStrategy()
+
+    def _scans_indexed(self):
+        """Whether the scans are all stored in a database with a value
+        index, so that workspace rules can be run from it."""
+        if self._value_index is None:
+            self._value_index = False
+            if callable(getattr(self.dbh, 'scanValueIndexSearch', None)):
+                try:
+                    self._value_index = all(self.dbh.scanInstanceGet(scan_id) for scan_id in self.scan_ids)
+                except (IOError, TypeError) as e:
+                    self.log.debug(f"Value index not used: {e}")
+        return self._value_index
+
+    def _read_scan_events(self, rules):
+        """Read the events of each scan which any of the rules run by the
+        default strategy can collect, in a single query per scan.
+
+        Args:
+            rules (list): rules to be run
+
+        Returns:
+            ScanEventIndex: events, or None if no rule uses them
+        """
+        reader = DefaultRuleExecutionStrategy()
+        compiled = CompiledRuleSet([
+            rule for rule in rules
+            if isinstance(self._strategy(rule), DefaultRuleExecutionStrategy) and collect_rules(rule)
+        ])
+        if not compiled.rules:
+            return None
+        # a rule which can collect any event type needs them all
+        event_types = compiled.event_types
+
+        scan_events = ScanEventIndex()
+        for scan_id in self.scan_ids:
+            scan_events.add(scan_id, reader._get_scan_events(self.dbh, scan_id, [], event_types=event_types))
+        return scan_events
+
 # Example: Register a custom strategy for a new rule type
 # class CustomRuleStrategy(RuleExecutionStrategy):
 #     def execute(self, dbh, rule, scan_ids):
@@ -1,3 +1,6 @@
+import hashlib
+import json
+import logging
 import yaml
 import os
 import jsonschema
@@ -27,30 +30,99 @@ RULE_SCHEMA = {
     "required": ["meta", "collections", "headline"]
 }
 
+# checking the schema itself is slow, so is only done once
+_validator = jsonschema.validators.validator_for(RULE_SCHEMA)(RULE_SCHEMA)
+
+# bumped when the cached form of rules changes
+CACHE_VERSION = 1
+
+
 class RuleLoader:
-    def __init__(self, rule_dir):
+    def __init__(self, rule_dir, cache_path=None):
+        """
+        Args:
+            rule_dir (str): Directory of YAML rule files.
+            cache_path (str, optional): File to cache parsed and validated
+                rules in, keyed by the hash of each rule file, so that rule
+                files which have not changed are not parsed again.
+        """
+        self.log = logging.getLogger("spiderfoot.correlation.loader")
         self.rule_dir = rule_dir
+        self.cache_path = cache_path
         self.rules = []
         self.errors = []
 
     def load_rules(self):
+        cache = self._read_cache()
+        cached = {}
+        changed = False
         for fname in os.listdir(self.rule_dir):
             if not fname.endswith('.yaml'):
                 continue
             path = os.path.join(self.rule_dir, fname)
-            with open(path, 'r', encoding='utf-8') as f:
-                try:
-                    rule = yaml.safe_load(f)
-                    jsonschema.validate(instance=rule, schema=RULE_SCHEMA)
-                    rule['rawYaml'] = open(path, 'r', encoding='utf-8').read()
-                    rule['filename'] = fname
-                    self.rules.append(rule)
-                except Exception as e:
-                    self.errors.append((fname, str(e)))
+            try:
+                with open(path, 'rb') as f:
+                    raw = f.read()
+                digest = hashlib.sha256(raw).hexdigest()
+                entry = cache.get(fname)
+                if entry and entry.get('sha256') == digest:
+                    rule = entry['rule']
+                    cached[fname] = {'sha256': digest, 'rule': dict(rule)}
+                else:
+                    rule = yaml.safe_load(raw.decode('utf-8'))
+                    _validator.validate(rule)
+                    changed = True
+                    copy = _json_copy(rule)
+                    if copy is not None:
+                        cached[fname] = {'sha256': digest, 'rule': copy}
+                rule['rawYaml'] = raw.decode('utf-8')
+                rule['filename'] = fname
+                self.rules.append(rule)
+            except Exception as e:
+                self.errors.append((fname, str(e)))
+
+        if changed or cached.keys() != cache.keys():
+            self._write_cache(cached)
         return self.rules
 
+    def _read_cache(self):
+        """Rules cached by the last load, by file name."""
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(cache, dict) or cache.get('version') != CACHE_VERSION:
+            return {}
+        return cache.get('rules', {})
+
+    def _write_cache(self, rules):
+        if not self.cache_path:
+            return
+        # written to a temporary file first, so that loaders running at
+        # the same time never read a partly written cache
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'rules': rules}, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            self.log.warning(f"Unable to cache correlation rules in {self.cache_path}: {e}")
+
     def get_errors(self):
         return self.errors
 
     def get_rules(self):
         return self.rules
+
+
+def _json_copy(rule):
+    """Copy of a rule read back from JSON, or None if caching it as JSON
+    would change it, e.g. YAML dates."""
+    try:
+        copy = json.loads(json.dumps(rule))
+    except (TypeError, ValueError):
+        return None
+    return copy if copy == rule else None
@@ -10,8 +10,12 @@
 # Licence:     MIT
 # -------------------------------------------------------------------------------
 
+from collections import OrderedDict
+from contextlib import suppress
 from pathlib import Path
+import functools
 import hashlib
+import itertools
 import random
 import re
 import sqlite3
@@ -20,6 +24,8 @@ import time
 import psycopg2
 import psycopg2.extras
 
+from .dbdialect import SpiderFootDbCursor, SpiderFootDbDialect, SpiderFootPostgreSQLDialect
+
 
 class SpiderFootDb:
     """SpiderFoot database.
@@ -27,17 +33,91 @@ class SpiderFootDb:
     Attributes:
         conn: Database connection
         dbh: Database cursor
-        dbhLock (_thread.RLock): thread lock on database handle
+        dbhLock (_thread.RLock): thread lock on this instance's database handle
+        fullText (bool): result data has a full-text index
+        partitioned (bool): results and logs are partitioned by scan (PostgreSQL)
+        detachConcurrently (bool): scan partitions can be detached without
+            locking the partitioned tables (PostgreSQL 14 and later, without
+            default partitions)
     """
 
     dbh = None
     conn = None
+    dbhLock = None
+    fullText = False
+    partitioned = False
+    detachConcurrently = False
+
+    # Serialises checking for and creating the schema, which every instance
+    # in the process does on the same database when it is first opened
+    _schemaLock = threading.Lock()
+
+    # Seconds an SQLite connection waits for another connection's write to
+    # finish before failing with "database is locked"
+    busyTimeout = 30
+
+    # Distinct data counts for scanResultSummary(), by database, scan and
+    # group, kept with the group's total at the time they were counted so
+    # that they are only counted again once the group has new results.
+    # They are shared by every handle, as the web UI opens one per request,
+    # and only the uniqueCountsSize most recently used are kept.
+    _uniqueCounts = OrderedDict()
+    _uniqueCountsLock = threading.Lock()
+    uniqueCountsSize = 1000
+
+    # Columns of tbl_scan_results, in the order _scanEventValues() returns them
+    _scanEventColumns = [
+        'scan_instance_id', 'hash', 'type', 'generated', 'confidence',
+        'visibility', 'risk', 'module', 'data', 'source_event_hash'
+    ]
+
+    # Rows deleted per transaction when a scan is deleted from SQLite, so
+    # that running scans storing results are not held up until it is gone
+    deleteBatchSize = 10000
+
+    # Tables with a partition per scan, in PostgreSQL databases created
+    # with partitioning
+    _partitionedTables = ['tbl_scan_results', 'tbl_scan_log']
+
+    # Tables holding a scan, in the order they are copied when a scan is
+    # archived or restored, with the columns copied and the condition
+    # selecting the scan's rows
+    _scanTables = [
+        ('tbl_scan_instance', ['guid', 'name', 'seed_target', 'created', 'started', 'ended', 'status'],
+            "guid = ?"),
+        ('tbl_scan_config', ['scan_instance_id', 'component', 'opt', 'val'],
+            "scan_instance_id = ?"),
+        ('tbl_scan_results', _scanEventColumns + ['false_positive'],
+            "scan_instance_id = ?"),
+        ('tbl_scan_log', ['scan_instance_id', 'generated', 'component', 'type', 'message'],
+            "scan_instance_id = ?"),
+        ('tbl_scan_correlation_results', [
+            'id', 'scan_instance_id', 'title', 'rule_risk', 'rule_id', 'rule_name', 'rule_descr', 'rule_logic'],
+            "scan_instance_id = ?"),
+        ('tbl_scan_correlation_results_events', ['correlation_id', 'event_hash'],
+            "correlation_id IN (SELECT id FROM tbl_scan_correlation_results WHERE scan_instance_id = ?)"),
+        ('tbl_scan_result_summary', [
+            'scan_instance_id', 'type', 'module', 'risk', 'total', 'fp_total', 'last_in'],
+            "scan_instance_id = ?"),
+        ('tbl_scan_correlation_summary', [
+            'scan_instance_id', 'rule_id', 'rule_name', 'rule_risk', 'rule_descr', 'total'],
+            "scan_instance_id = ?"),
+        ('tbl_scan_value_index', ['type', 'value', 'scan_instance_id', 'hash', 'total', 'fp_total'],
+            "scan_instance_id = ?")
+    ]
 
-    # Prevent multithread access to database
-    dbhLock = threading.RLock()
+    # Longest data, once normalised, added to the value index. Longer data,
+    # like page content, is rarely shared between scans and would bloat it.
+    valueIndexMaxLength = 255
+
+    # PostgreSQL advisory lock taken while the value index is added to an
+    # existing database, so that only one process fills it
+    valueIndexLockId = 0x5346564958
 
     # Queries for creating the SpiderFoot database
     createSchemaQueries = [
+        # must be set before any table is created
+        "PRAGMA auto_vacuum=INCREMENTAL",
         "PRAGMA journal_mode=WAL",
         "CREATE TABLE tbl_event_types ( \
             event       VARCHAR NOT NULL PRIMARY KEY, \
@@ -100,17 +180,51 @@ class SpiderFootDb:
             correlation_id      VARCHAR NOT NULL REFERENCES tbl_scan_correlation_results(id), \
             event_hash          VARCHAR NOT NULL REFERENCES tbl_scan_results(hash) \
         )",
+        "CREATE TABLE tbl_scan_result_summary ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            type                VARCHAR NOT NULL, \
+            module              VARCHAR NOT NULL, \
+            risk                INT NOT NULL DEFAULT 0, \
+            total               INT NOT NULL DEFAULT 0, \
+            fp_total            INT NOT NULL DEFAULT 0, \
+            last_in             INT NOT NULL DEFAULT 0, \
+            PRIMARY KEY (scan_instance_id, type, module, risk) \
+        )",
+        "CREATE TABLE tbl_scan_correlation_summary ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            rule_id             VARCHAR NOT NULL, \
+            rule_name           VARCHAR NOT NULL, \
+            rule_risk           VARCHAR NOT NULL, \
+            rule_descr          VARCHAR NOT NULL, \
+            total               INT NOT NULL DEFAULT 0, \
+            PRIMARY KEY (scan_instance_id, rule_id) \
+        )",
+        "CREATE TABLE tbl_scan_value_index ( \
+            type                VARCHAR NOT NULL, \
+            value               VARCHAR NOT NULL, \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            hash                VARCHAR NOT NULL, \
+            total               INT NOT NULL DEFAULT 0, \
+            fp_total            INT NOT NULL DEFAULT 0, \
+            PRIMARY KEY (type, value, scan_instance_id) \
+        )",
+        "CREATE INDEX idx_scan_value_index_scan ON tbl_scan_value_index (scan_instance_id)",
         "CREATE INDEX idx_scan_results_id ON tbl_scan_results (scan_instance_id)",
         "CREATE INDEX idx_scan_results_type ON tbl_scan_results (scan_instance_id, type)",
         "CREATE INDEX idx_scan_results_hash ON tbl_scan_results (scan_instance_id, hash)",
         "CREATE INDEX idx_scan_results_module ON tbl_scan_results(scan_instance_id, module)",
         "CREATE INDEX idx_scan_results_srchash ON tbl_scan_results (scan_instance_id, source_event_hash)",
+        "CREATE INDEX idx_scan_results_generated ON tbl_scan_results (scan_instance_id, generated, hash)",
+        "CREATE INDEX idx_scan_results_type_generated ON tbl_scan_results (scan_instance_id, type, generated, hash)",
         "CREATE INDEX idx_scan_logs ON tbl_scan_log (scan_instance_id)",
         "CREATE INDEX idx_scan_correlation ON tbl_scan_correlation_results (scan_instance_id, id)",
         "CREATE INDEX idx_scan_correlation_events ON tbl_scan_correlation_results_events (correlation_id)"
     ]
 
-    # PostgreSQL-specific schema queries
+    # PostgreSQL-specific schema queries. Results and logs are partitioned
+    # with a partition per scan, so that a scan is deleted by dropping its
+    # partitions. There are no default partitions, as every scan has its
+    # own, and they would keep partitions from being detached concurrently.
     createPostgreSQLSchemaQueries = [
         "CREATE TABLE IF NOT EXISTS tbl_event_types ( \
             event       VARCHAR NOT NULL PRIMARY KEY, \
@@ -134,12 +248,13 @@ class SpiderFootDb:
             status      VARCHAR NOT NULL \
         )",
         "CREATE TABLE IF NOT EXISTS tbl_scan_log ( \
+            rowid               BIGSERIAL, \
             scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
             generated           BIGINT NOT NULL, \
             component           VARCHAR, \
             type                VARCHAR NOT NULL, \
             message             VARCHAR \
-        )",
+        ) PARTITION BY LIST (scan_instance_id)",
         "CREATE TABLE IF NOT EXISTS tbl_scan_config ( \
             scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
             component           VARCHAR NOT NULL, \
@@ -147,10 +262,11 @@ class SpiderFootDb:
             val                 VARCHAR NOT NULL \
         )",
         "CREATE TABLE IF NOT EXISTS tbl_scan_results ( \
+            rowid               BIGSERIAL, \
             scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
             hash                VARCHAR NOT NULL, \
             type                VARCHAR NOT NULL REFERENCES tbl_event_types(event), \
-            generated           BIGINT NOT NULL, \
+            generated           DOUBLE PRECISION NOT NULL, \
             confidence          INT NOT NULL DEFAULT 100, \
             visibility          INT NOT NULL DEFAULT 100, \
             risk                INT NOT NULL DEFAULT 0, \
@@ -158,7 +274,7 @@ class SpiderFootDb:
             data                TEXT, \
             false_positive      INT NOT NULL DEFAULT 0, \
             source_event_hash  VARCHAR DEFAULT 'ROOT' \
-        )",
+        ) PARTITION BY LIST (scan_instance_id)",
         "CREATE TABLE IF NOT EXISTS tbl_scan_correlation_results ( \
             id                  VARCHAR NOT NULL PRIMARY KEY, \
             scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
@@ -171,18 +287,85 @@ class SpiderFootDb:
         )",
         "CREATE TABLE IF NOT EXISTS tbl_scan_correlation_results_events ( \
             correlation_id      VARCHAR NOT NULL REFERENCES tbl_scan_correlation_results(id), \
-            event_hash          VARCHAR NOT NULL REFERENCES tbl_scan_results(hash) \
+            event_hash          VARCHAR NOT NULL \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_result_summary ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            type                VARCHAR NOT NULL, \
+            module              VARCHAR NOT NULL, \
+            risk                INT NOT NULL DEFAULT 0, \
+            total               INT NOT NULL DEFAULT 0, \
+            fp_total            INT NOT NULL DEFAULT 0, \
+            last_in             DOUBLE PRECISION NOT NULL DEFAULT 0, \
+            PRIMARY KEY (scan_instance_id, type, module, risk) \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_correlation_summary ( \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            rule_id             VARCHAR NOT NULL, \
+            rule_name           VARCHAR NOT NULL, \
+            rule_risk           VARCHAR NOT NULL, \
+            rule_descr          VARCHAR NOT NULL, \
+            total               INT NOT NULL DEFAULT 0, \
+            PRIMARY KEY (scan_instance_id, rule_id) \
+        )",
+        "CREATE TABLE IF NOT EXISTS tbl_scan_value_index ( \
+            type                VARCHAR NOT NULL, \
+            value               VARCHAR NOT NULL, \
+            scan_instance_id    VARCHAR NOT NULL REFERENCES tbl_scan_instance(guid), \
+            hash                VARCHAR NOT NULL, \
+            total               INT NOT NULL DEFAULT 0, \
+            fp_total            INT NOT NULL DEFAULT 0, \
+            PRIMARY KEY (type, value, scan_instance_id) \
         )",
+        "CREATE INDEX IF NOT EXISTS idx_scan_value_index_scan ON tbl_scan_value_index (scan_instance_id)",
         "CREATE INDEX IF NOT EXISTS idx_scan_results_id ON tbl_scan_results (scan_instance_id)",
         "CREATE INDEX IF NOT EXISTS idx_scan_results_type ON tbl_scan_results (scan_instance_id, type)",
         "CREATE INDEX IF NOT EXISTS idx_scan_results_hash ON tbl_scan_results (scan_instance_id, hash)",
         "CREATE INDEX IF NOT EXISTS idx_scan_results_module ON tbl_scan_results(scan_instance_id, module)",
         "CREATE INDEX IF NOT EXISTS idx_scan_results_srchash ON tbl_scan_results (scan_instance_id, source_event_hash)",
+        "CREATE INDEX IF NOT EXISTS idx_scan_results_generated ON tbl_scan_results (scan_instance_id, generated, hash)",
+        "CREATE INDEX IF NOT EXISTS idx_scan_results_type_generated ON tbl_scan_results (scan_instance_id, type, generated, hash)",
+        "CREATE INDEX IF NOT EXISTS idx_scan_results_rowid ON tbl_scan_results (scan_instance_id, rowid)",
         "CREATE INDEX IF NOT EXISTS idx_scan_logs ON tbl_scan_log (scan_instance_id)",
         "CREATE INDEX IF NOT EXISTS idx_scan_correlation ON tbl_scan_correlation_results (scan_instance_id, id)",
         "CREATE INDEX IF NOT EXISTS idx_scan_correlation_events ON tbl_scan_correlation_results_events (correlation_id)"
     ]
 
+    # Full-text index of result data, created when the _dbfulltext option
+    # is set. The trigram tokenizer matches substrings, as LIKE does, and
+    # the triggers keep the index in step with tbl_scan_results.
+    createFullTextQueries = [
+        "CREATE VIRTUAL TABLE tbl_scan_results_fts USING fts5( \
+            data, content='tbl_scan_results', content_rowid='rowid', tokenize='trigram' \
+        )",
+        "CREATE TRIGGER trg_scan_results_fts_insert AFTER INSERT ON tbl_scan_results BEGIN \
+            INSERT INTO tbl_scan_results_fts (rowid, data) VALUES (new.rowid, new.data); \
+        END",
+        "CREATE TRIGGER trg_scan_results_fts_delete AFTER DELETE ON tbl_scan_results BEGIN \
+            INSERT INTO tbl_scan_results_fts (tbl_scan_results_fts, rowid, data) \
+            VALUES ('delete', old.rowid, old.data); \
+        END",
+        "CREATE TRIGGER trg_scan_results_fts_update AFTER UPDATE OF data ON tbl_scan_results BEGIN \
+            INSERT INTO tbl_scan_results_fts (tbl_scan_results_fts, rowid, data) \
+            VALUES ('delete', old.rowid, old.data); \
+            INSERT INTO tbl_scan_results_fts (rowid, data) VALUES (new.rowid, new.data); \
+        END"
+    ]
+
+    # Numbers results in the order they were stored, for PostgreSQL
+    # databases created before results had a rowid column as in SQLite
+    createPostgreSQLRowIdQueries = [
+        "ALTER TABLE tbl_scan_results ADD COLUMN IF NOT EXISTS rowid BIGSERIAL",
+        "CREATE INDEX IF NOT EXISTS idx_scan_results_rowid ON tbl_scan_results (scan_instance_id, rowid)"
+    ]
+
+    # PostgreSQL computes the generated column itself on every write
+    createPostgreSQLFullTextQueries = [
+        "ALTER TABLE tbl_scan_results ADD COLUMN IF NOT EXISTS data_tsv TSVECTOR \
+            GENERATED ALWAYS AS (to_tsvector('simple', COALESCE(data, ''))) STORED",
+        "CREATE INDEX IF NOT EXISTS idx_scan_results_data_tsv ON tbl_scan_results USING GIN (data_tsv)"
+    ]
+
     eventDetails = [
         ['ROOT', 'Internal SpiderFoot Root event', 1, 'INTERNAL'],
         ['ACCOUNT_EXTERNAL_OWNED', 'Account on External Site', 0, 'ENTITY'],
@@ -402,7 +585,17 @@ class SpiderFootDb:
         if not opts.get('__database'):
             raise ValueError("opts['__database'] is empty") from None
 
+        # Prevent multithread access to this instance's connection. Other
+        # instances have their own connection, so are not held up by it.
+        self.dbhLock = threading.RLock()
+
         self.db_type = opts.get('__dbtype', 'sqlite')
+        self.database = opts['__database']
+
+        if self.db_type == 'postgresql':
+            self.dialect = SpiderFootPostgreSQLDialect()
+        else:
+            self.dialect = SpiderFootDbDialect()
 
         if self.db_type == 'sqlite':
             database_path = opts['__database']
@@ -414,7 +607,7 @@ class SpiderFootDb:
             # at least we can use this opportunity to ensure we have permissions to
             # read and write to such a file.
             try:
-                dbh = sqlite3.connect(database_path)
+                dbh = sqlite3.connect(database_path, timeout=self.busyTimeout, check_same_thread=False)
             except Exception as e:
                 raise IOError(
                     f"Error connecting to internal database {database_path}") from e
@@ -440,19 +633,24 @@ class SpiderFootDb:
                     bool: matches
                 """
 
+                # called for every row searched, so the pattern must not be
+                # compiled each time
+                rx = _compileRegex(qry)
+                if rx is None:
+                    return False
                 try:
-                    rx = re.compile(qry, re.IGNORECASE | re.DOTALL)
                     ret = rx.match(data)
                 except Exception:
                     return False
                 return ret is not None
 
+            self.conn.create_function("REGEXP", 2, __dbregex__, deterministic=True)
+
             # Now we actually check to ensure the database file has the schema set
             # up correctly.
-            with self.dbhLock:
+            with self._schemaLock, self.dbhLock:
                 try:
                     self.dbh.execute('SELECT COUNT(*) FROM tbl_scan_config')
-                    self.conn.create_function("REGEXP", 2, __dbregex__)
                 except sqlite3.Error:
                     init = True
                     try:
@@ -477,6 +675,33 @@ class SpiderFootDb:
                                       "SpiderFoot wasn't able to migrate you, so you'll need to delete "
                                       "your SpiderFoot database in order to proceed.") from None
 
+                # Databases created before results could be paged in the
+                # order they were generated lack the indexes paging uses.
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name = 'idx_scan_results_type_generated'")
+                if not self.dbh.fetchone()[0]:
+                    try:
+                        for query in self.createSchemaQueries:
+                            if "_generated ON" in query:
+                                self.dbh.execute(query.replace("CREATE INDEX", "CREATE INDEX IF NOT EXISTS"))
+                        self.conn.commit()
+                    except sqlite3.Error as e:
+                        raise IOError("Failed to add result paging indexes to the database") from e
+
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'tbl_scan_result_summary'")
+                if not self.dbh.fetchone()[0]:
+                    self._createSummaries()
+
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'tbl_scan_value_index'")
+                if not self.dbh.fetchone()[0]:
+                    self._createValueIndex()
+
+                self.fullText = self._fullTextExists()
+                if not self.fullText and opts.get('_dbfulltext'):
+                    self.fullText = self._createFullText()
+
                 if init:
                     for row in self.eventDetails:
                         event = row[0]
@@ -497,16 +722,18 @@ class SpiderFootDb:
         elif self.db_type == 'postgresql':
             try:
                 self.conn = psycopg2.connect(opts['__database'])
-                self.dbh = self.conn.cursor(
-                    cursor_factory=psycopg2.extras.DictCursor)
+                self.dbh = SpiderFootDbCursor(
+                    self.conn.cursor(cursor_factory=psycopg2.extras.DictCursor), self.dialect)
             except Exception as e:
-                raise IOError(
-                    f"Error connecting to PostgreSQL database {opts['__database']}") from e
+                # the connection string may hold a password, so isn't shown
+                raise IOError("Error connecting to PostgreSQL database") from e
 
-            with self.dbhLock:
+            with self._schemaLock, self.dbhLock:
                 try:
                     self.dbh.execute('SELECT COUNT(*) FROM tbl_scan_config')
                 except psycopg2.Error:
+                    # the failed query aborted the transaction
+                    self.conn.rollback()
                     init = True
                     try:
                         self.create()
@@ -514,13 +741,68 @@ class SpiderFootDb:
                         raise IOError(
                             "Tried to set up the SpiderFoot database schema, but failed") from e
 
+                # Databases created before results could be paged in the
+                # order they were generated lack the indexes paging uses.
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM pg_indexes WHERE indexname = 'idx_scan_results_type_generated'")
+                if not self.dbh.fetchone()[0]:
+                    try:
+                        for query in self.createPostgreSQLSchemaQueries:
+                            if "_generated ON" in query:
+                                self.dbh.execute(query)
+                        self.conn.commit()
+                    except psycopg2.Error as e:
+                        raise IOError("Failed to add result paging indexes to the database") from e
+
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM information_schema.columns \
+                    WHERE table_name = 'tbl_scan_results' AND column_name = 'rowid'")
+                if not self.dbh.fetchone()[0]:
+                    try:
+                        for query in self.createPostgreSQLRowIdQueries:
+                            self.dbh.execute(query)
+                        self.conn.commit()
+                    except psycopg2.Error as e:
+                        raise IOError("Failed to number the results in the database") from e
+
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'tbl_scan_result_summary'")
+                if not self.dbh.fetchone()[0]:
+                    self._createSummaries()
+
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'tbl_scan_value_index'")
+                if not self.dbh.fetchone()[0]:
+                    self._createValueIndex()
+
+                self.fullText = self._fullTextExists()
+                if not self.fullText and opts.get('_dbfulltext'):
+                    self.fullText = self._createFullText()
+
+                # databases created before results were partitioned by scan
+                # keep deleting scans row by row
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM pg_partitioned_table p, pg_class c \
+                    WHERE c.oid = p.partrelid AND c.relname = 'tbl_scan_results'")
+                self.partitioned = bool(self.dbh.fetchone()[0])
+
+                # databases partitioned before scans had partitions of their
+                # own have default partitions
+                if self.partitioned and self.conn.server_version >= 140000:
+                    self.dbh.execute(
+                        "SELECT COUNT(*) FROM pg_partitioned_table p, pg_class c \
+                        WHERE c.oid = p.partrelid AND p.partdefid <> 0 \
+                        AND c.relname IN ('tbl_scan_results', 'tbl_scan_log')")
+                    self.detachConcurrently = not self.dbh.fetchone()[0]
+
                 if init:
                     for row in self.eventDetails:
                         event = row[0]
                         event_descr = row[1]
                         event_raw = row[2]
                         event_type = row[3]
-                        qry = "INSERT INTO tbl_event_types (event, event_descr, event_raw, event_type) VALUES (%s, %s, %s, %s)"
+                        qry = "INSERT INTO tbl_event_types (event, event_descr, event_raw, event_type) VALUES (?, ?, ?, ?) \
+                            ON CONFLICT (event) DO NOTHING"
 
                         try:
                             self.dbh.execute(qry, (
@@ -562,12 +844,9 @@ class SpiderFootDb:
                     event_raw = row[2]
                     event_type = row[3]
                     
-                    if self.db_type == 'sqlite':
-                        qry = "INSERT INTO tbl_event_types (event, event_descr, event_raw, event_type) VALUES (?, ?, ?, ?)"
-                        params = (event, event_descr, event_raw, event_type)
-                    else:  # postgresql
-                        qry = "INSERT INTO tbl_event_types (event, event_descr, event_raw, event_type) VALUES (%s, %s, %s, %s) ON CONFLICT (event) DO NOTHING"
-                        params = (event, event_descr, event_raw, event_type)
+                    qry = "INSERT INTO tbl_event_types (event, event_descr, event_raw, event_type) VALUES (?, ?, ?, ?) \
+                        ON CONFLICT (event) DO NOTHING"
+                    params = (event, event_descr, event_raw, event_type)
 
                     self.dbh.execute(qry, params)
                 self.conn.commit()
@@ -575,6 +854,162 @@ class SpiderFootDb:
                 raise IOError(
                     "SQL error encountered when setting up database") from e
 
+    def _createSummaries(self) -> None:
+        """Add the scan summary tables to a database created before they
+        existed, and fill them from the scans already stored.
+
+        Raises:
+            IOError: database I/O failed
+        """
+
+        if self.db_type == 'sqlite':
+            queries = self.createSchemaQueries
+        else:
+            queries = self.createPostgreSQLSchemaQueries
+
+        with self.dbhLock:
+            try:
+                if self.db_type == 'sqlite':
+                    # take the write lock before checking again, so that
+                    # only one process fills the tables
+                    self.dbh.execute("BEGIN IMMEDIATE")
+                    self.dbh.execute(
+                        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'tbl_scan_result_summary'")
+                    if self.dbh.fetchone()[0]:
+                        self.conn.commit()
+                        return
+
+                for query in queries:
+                    if "_summary (" in query:
+                        self.dbh.execute(query)
+
+                self.dbh.execute("INSERT INTO tbl_scan_result_summary \
+                    (scan_instance_id, type, module, risk, total, fp_total, last_in) \
+                    SELECT scan_instance_id, type, module, risk, COUNT(*), \
+                    SUM(CASE WHEN false_positive = 1 THEN 1 ELSE 0 END), MAX(generated) \
+                    FROM tbl_scan_results GROUP BY scan_instance_id, type, module, risk")
+                self.dbh.execute("INSERT INTO tbl_scan_correlation_summary \
+                    (scan_instance_id, rule_id, rule_name, rule_risk, rule_descr, total) \
+                    SELECT scan_instance_id, rule_id, MIN(rule_name), MIN(rule_risk), \
+                    MIN(rule_descr), COUNT(*) \
+                    FROM tbl_scan_correlation_results GROUP BY scan_instance_id, rule_id")
+                self.conn.commit()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
+                raise IOError("Failed to add scan summary tables to the database") from e
+
+    def _createValueIndex(self) -> None:
+        """Add the value index to a database created before it existed, and
+        fill it from the scans already stored.
+
+        Raises:
+            IOError: database I/O failed
+        """
+
+        if self.db_type == 'sqlite':
+            queries = self.createSchemaQueries
+        else:
+            queries = self.createPostgreSQLSchemaQueries
+
+        with self.dbhLock:
+            try:
+                if self.db_type == 'sqlite':
+                    # take the write lock before checking again, so that
+                    # only one process fills the index
+                    self.dbh.execute("BEGIN IMMEDIATE")
+                    self.dbh.execute(
+                        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'tbl_scan_value_index'")
+                    if self.dbh.fetchone()[0]:
+                        self.conn.commit()
+                        return
+                else:
+                    # PostgreSQL has no database-wide write lock, so take a
+                    # lock of our own for the rest of the transaction
+                    self.dbh.execute("SELECT pg_advisory_xact_lock(?)", [self.valueIndexLockId])
+                    self.dbh.execute(
+                        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'tbl_scan_value_index'")
+                    if self.dbh.fetchone()[0]:
+                        self.conn.commit()
+                        return
+
+                for query in queries:
+                    if "tbl_scan_value_index (" in query:
+                        self.dbh.execute(query)
+
+                # values are normalised in Python, as they are when stored.
+                # The table is created and filled in a single transaction,
+                # so an index which exists is always complete.
+                rows = self._iterQuery(
+                    "SELECT scan_instance_id, hash, type, data, false_positive \
+                    FROM tbl_scan_results ORDER BY scan_instance_id, generated",
+                    [], 10000, "Failed to add the value index to the database", hold=False)
+                while True:
+                    batch = list(itertools.islice(rows, 10000))
+                    if not batch:
+                        break
+                    self._scanValueIndexAdd(batch)
+                self.conn.commit()
+            except (sqlite3.Error, psycopg2.Error, IOError) as e:
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
+                if isinstance(e, IOError):
+                    raise
+                raise IOError("Failed to add the value index to the database") from e
+
+    def _fullTextExists(self) -> bool:
+        """Check whether result data has a full-text index.
+
+        Returns:
+            bool: the index exists
+        """
+
+        with self.dbhLock:
+            if self.db_type == 'sqlite':
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'tbl_scan_results_fts'")
+            else:
+                self.dbh.execute(
+                    "SELECT COUNT(*) FROM information_schema.columns \
+                    WHERE table_name = 'tbl_scan_results' AND column_name = 'data_tsv'")
+            return bool(self.dbh.fetchone()[0])
+
+    def _createFullText(self) -> bool:
+        """Add the full-text index of result data, and index the results
+        already stored.
+
+        The index is optional, so failing to create it, for instance on
+        SQLite builds without the trigram tokenizer (before 3.34), leaves
+        searches to work as they did without it.
+
+        Returns:
+            bool: the index was created
+        """
+
+        with self.dbhLock:
+            try:
+                if self.db_type == 'sqlite':
+                    # take the write lock before checking again, so that
+                    # only one process builds the index
+                    self.dbh.execute("BEGIN IMMEDIATE")
+                    if self._fullTextExists():
+                        self.conn.commit()
+                        return True
+
+                    for query in self.createFullTextQueries:
+                        self.dbh.execute(query)
+                    self.dbh.execute("INSERT INTO tbl_scan_results_fts (tbl_scan_results_fts) VALUES ('rebuild')")
+                else:
+                    for query in self.createPostgreSQLFullTextQueries:
+                        self.dbh.execute(query)
+                self.conn.commit()
+            except (sqlite3.Error, psycopg2.Error):
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
+                return False
+
+        return True
+
     def close(self) -> None:
         """Close the database handle and connection."""
 
@@ -597,9 +1032,11 @@ class SpiderFootDb:
         """
         with self.dbhLock:
             try:
-                if ((self.db_type == 'sqlite') or (self.db_type == 'postgresql')):
-                    self.dbh.execute("VACUUM")
-                self.conn.commit()
+                rewritten = self.dialect.vacuum(self.conn, self.dbh)
+                if rewritten and self.db_type == 'sqlite' and self._fullTextExists():
+                    # VACUUM may renumber the rowids the index refers to
+                    self.dbh.execute("INSERT INTO tbl_scan_results_fts (tbl_scan_results_fts) VALUES ('rebuild')")
+                    self.conn.commit()
                 return True
             except (sqlite3.Error, psycopg2.Error) as e:
                 raise IOError(
@@ -626,6 +1063,50 @@ class SpiderFootDb:
             ValueError: arg value was invalid
             IOError: database I/O failed
         """
+        qry, qvars = self._searchQuery(criteria, filterFp)
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                return self.dbh.fetchall()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when fetching search results") from e
+
+    def searchIter(self, criteria: dict, filterFp: bool = False, batchSize: int = 1000):
+        """Search database, yielding the results as they are read rather
+        than loading them all into memory.
+
+        Args:
+            criteria (dict): search criteria, as for search()
+            filterFp (bool): filter out false positives
+            batchSize (int): number of results read from the database at a time
+
+        Yields:
+            search results, in the same format as search()
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+        qry, qvars = self._searchQuery(criteria, filterFp)
+        return self._iterQuery(qry, qvars, batchSize, "SQL error encountered when fetching search results")
+
+    def _searchQuery(self, criteria: dict, filterFp: bool) -> tuple:
+        """Build the query for search().
+
+        Args:
+            criteria (dict): search criteria
+            filterFp (bool): filter out false positives
+
+        Returns:
+            tuple: SQL, query parameters
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
         if not isinstance(criteria, dict):
             raise TypeError(
                 f"criteria is {type(criteria)}; expected dict()") from None
@@ -655,10 +1136,10 @@ class SpiderFootDb:
 
         qvars = list()
         qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+            s.data AS source_data, \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, c.scan_instance_id, \
-            c.false_positive as 'fp', s.false_positive as 'parent_fp' \
+            c.false_positive AS fp, s.false_positive AS parent_fp \
             FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t \
             WHERE s.scan_instance_id = c.scan_instance_id AND \
             t.event = c.type AND c.source_event_hash = s.hash "
@@ -674,18 +1155,127 @@ class SpiderFootDb:
             qry += " AND c.type = ? "
             qvars.append(criteria['type'])
 
-        if criteria.get('value') is not None:
-            qry += " AND (c.data LIKE ? OR s.data LIKE ?) "
+        if criteria.get('value') is not None and self._fullTextLike(criteria['value']):
+            # results matching themselves, and results whose source matches,
+            # found through the index rather than by checking every result
+            qry += " AND c.rowid IN ( \
+                SELECT rowid FROM tbl_scan_results_fts WHERE data LIKE ? \
+                UNION \
+                SELECT r.rowid FROM tbl_scan_results r, tbl_scan_results p \
+                WHERE p.rowid IN (SELECT rowid FROM tbl_scan_results_fts WHERE data LIKE ?) \
+                AND r.scan_instance_id = p.scan_instance_id AND r.source_event_hash = p.hash) "
+            qvars.append(criteria['value'])
+            qvars.append(criteria['value'])
+        elif criteria.get('value') is not None:
+            qry += f" AND ({self.dialect.like('c.data')} OR {self.dialect.like('s.data')}) "
             qvars.append(criteria['value'])
             qvars.append(criteria['value'])
 
         if criteria.get('regex') is not None:
-            qry += " AND (c.data REGEXP ? OR s.data REGEXP ?) "
-            qvars.append(criteria['regex'])
-            qvars.append(criteria['regex'])
+            childRegexp, childVars = self.dialect.regexp('c.data', criteria['regex'])
+            sourceRegexp, sourceVars = self.dialect.regexp('s.data', criteria['regex'])
+            qry += f" AND ({childRegexp} OR {sourceRegexp}) "
+            qvars.extend(childVars)
+            qvars.extend(sourceVars)
 
         qry += " ORDER BY c.data"
 
+        return qry, qvars
+
+    def _fullTextLike(self, pattern: str) -> bool:
+        """Check whether a LIKE pattern can be looked up in the full-text
+        index. The trigram index only narrows down patterns with at least
+        three characters between wildcards; others would read all of it.
+
+        Args:
+            pattern (str): LIKE pattern
+
+        Returns:
+            bool: the index can be used
+        """
+        if not self.fullText or self.db_type != 'sqlite':
+            return False
+        return re.search(r'[^%_]{3}', pattern) is not None
+
+    def searchText(self, query: str, scanIds: list = None, eventTypes: list = None,
+                   filterFp: bool = False, limit: int = 0) -> list:
+        """Search result data for text, best matches first.
+
+        Uses the full-text index where the database has one. On SQLite this
+        matches the text anywhere in the data, ranked by BM25; on PostgreSQL
+        it matches the words of the text, ranked by ts_rank(). Without the
+        index, or for text too short to look up in it, results containing
+        the text are returned in the order they were found.
+
+        Args:
+            query (str): text to search for
+            scanIds (list): search within these scans, if omitted search all
+            eventTypes (list): search these event types, if omitted search all
+            filterFp (bool): filter out false positives
+            limit (int): maximum number of results (0 = no limit)
+
+        Returns:
+            list: search results, in the same format as search()
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(query, str):
+            raise TypeError(f"query is {type(query)}; expected str()") from None
+
+        if not query.strip():
+            raise ValueError("query is empty") from None
+
+        qvars = list()
+        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
+            s.data AS source_data, \
+            c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
+            c.source_event_hash, t.event_descr, t.event_type, c.scan_instance_id, \
+            c.false_positive AS fp, s.false_positive AS parent_fp "
+
+        if self.fullText and self.db_type == 'sqlite' and len(query) >= 3:
+            qry += "FROM tbl_scan_results_fts f, tbl_scan_results c, tbl_scan_results s, tbl_event_types t \
+                WHERE tbl_scan_results_fts MATCH ? AND c.rowid = f.rowid "
+            # a quoted string is matched as a whole, rather than as a query
+            qvars.append('"' + query.replace('"', '""') + '"')
+            order, orderVars = " ORDER BY f.rank", []
+        elif self.fullText and self.db_type == 'postgresql':
+            qry += "FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t \
+                WHERE c.data_tsv @@ plainto_tsquery('simple', ?) "
+            qvars.append(query)
+            order, orderVars = " ORDER BY ts_rank(c.data_tsv, plainto_tsquery('simple', ?)) DESC", [query]
+        else:
+            qry += "FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t \
+                WHERE " + self.dialect.like('c.data') + " ESCAPE '\\' "
+            qvars.append('%' + re.sub(r'([\\%_])', r'\\\1', query) + '%')
+            order, orderVars = "", []
+
+        qry += "AND s.scan_instance_id = c.scan_instance_id AND \
+            t.event = c.type AND c.source_event_hash = s.hash "
+
+        if filterFp:
+            qry += " AND c.false_positive <> 1 "
+
+        if scanIds:
+            listSql, listVar = self.dialect.listSql(scanIds)
+            qry += f" AND c.scan_instance_id IN ({listSql}) "
+            qvars.append(listVar)
+
+        if eventTypes:
+            listSql, listVar = self.dialect.listSql(eventTypes)
+            qry += f" AND c.type IN ({listSql}) "
+            qvars.append(listVar)
+
+        qry += order
+        qvars.extend(orderVars)
+
+        if limit:
+            qry += " LIMIT ?"
+            qvars.append(int(limit))
+
         with self.dbhLock:
             try:
                 self.dbh.execute(qry, qvars)
@@ -761,22 +1351,16 @@ class SpiderFootDb:
         if not inserts:
             return True
 
-        if self.db_type == 'sqlite':
-            qry = "INSERT INTO tbl_scan_log \
-                (scan_instance_id, generated, component, type, message) \
-                VALUES (?, ?, ?, ?, ?)"
-        else:  # postgresql
-            qry = "INSERT INTO tbl_scan_log \
-                (scan_instance_id, generated, component, type, message) \
-                VALUES (%s, %s, %s, %s, %s)"
-
         with self.dbhLock:
             try:
                 # Ensure connection is alive
                 if not self.conn:
                     return False
                     
-                self.dbh.executemany(qry, inserts)
+                self.dialect.insertRows(
+                    self.dbh, "tbl_scan_log",
+                    ["scan_instance_id", "generated", "component", "type", "message"],
+                    inserts)
                 self.conn.commit()
                 return True
             except (sqlite3.Error, psycopg2.Error) as e:
@@ -876,6 +1460,7 @@ class SpiderFootDb:
                 self.dbh.execute(qry, (
                     instanceId, scanName, scanTarget, time.time() * 1000, 'CREATED'
                 ))
+                self._scanPartitionsCreate(instanceId)
                 self.conn.commit()
             except (sqlite3.Error, psycopg2.Error) as e:
                 raise IOError(
@@ -986,17 +1571,8 @@ class SpiderFootDb:
         if by not in ["type", "module", "entity"]:
             raise ValueError(f"Invalid filter by value: {by}") from None
 
-        if by == "type":
-            qry = "SELECT r.type, e.event_descr, MAX(ROUND(generated)) AS last_in, \
-                count(*) AS total, count(DISTINCT r.data) as utotal FROM \
-                tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
-                AND r.scan_instance_id = ? GROUP BY r.type ORDER BY e.event_descr"
-
-        if by == "module":
-            qry = "SELECT r.module, '', MAX(ROUND(generated)) AS last_in, \
-                count(*) AS total, count(DISTINCT r.data) as utotal FROM \
-                tbl_scan_results r, tbl_event_types e WHERE e.event = r.type \
-                AND r.scan_instance_id = ? GROUP BY r.module ORDER BY r.module DESC"
+        if by in ["type", "module"]:
+            return self._scanResultSummaryRollup(instanceId, by)
 
         if by == "entity":
             qry = "SELECT r.data, e.event_descr, MAX(ROUND(generated)) AS last_in, \
@@ -1016,6 +1592,72 @@ class SpiderFootDb:
                 raise IOError(
                     "SQL error encountered when fetching result summary") from e
 
+    def _scanResultSummaryRollup(self, instanceId: str, by: str) -> list:
+        """Summary of the results by event type or module, from the result
+        summary table rather than the results themselves.
+
+        Args:
+            instanceId (str): scan instance ID
+            by (str): "type" or "module"
+
+        Returns:
+            list: scan result summary
+
+        Raises:
+            IOError: database I/O failed
+        """
+
+        if by == "type":
+            qry = "SELECT s.type, e.event_descr, MAX(ROUND(s.last_in)) AS last_in, \
+                SUM(s.total) AS total FROM \
+                tbl_scan_result_summary s, tbl_event_types e WHERE e.event = s.type \
+                AND s.scan_instance_id = ? GROUP BY s.type, e.event_descr ORDER BY e.event_descr"
+            uqry = "SELECT type, COUNT(DISTINCT data) FROM tbl_scan_results \
+                WHERE scan_instance_id = ? GROUP BY type"
+        else:
+            qry = "SELECT s.module, '', MAX(ROUND(s.last_in)) AS last_in, \
+                SUM(s.total) AS total FROM \
+                tbl_scan_result_summary s, tbl_event_types e WHERE e.event = s.type \
+                AND s.scan_instance_id = ? GROUP BY s.module ORDER BY s.module DESC"
+            uqry = "SELECT module, COUNT(DISTINCT data) FROM tbl_scan_results \
+                WHERE scan_instance_id = ? GROUP BY module"
+
+        qvars = [instanceId]
+        cacheKey = (self.db_type, self.database, instanceId, by)
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                rows = self.dbh.fetchall()
+
+                with self._uniqueCountsLock:
+                    cached = self._uniqueCounts.get(cacheKey, dict())
+                    if cacheKey in self._uniqueCounts:
+                        self._uniqueCounts.move_to_end(cacheKey)
+
+                # distinct counts can't be maintained as results are stored,
+                # so count them again, for the whole scan, once any group has
+                # changed since they were last counted
+                if any(cached.get(row[0], (None, None))[0] != row[3] for row in rows):
+                    totals = {row[0]: row[3] for row in rows}
+                    self.dbh.execute(uqry, qvars)
+                    cached = {
+                        key: (totals.get(key), utotal) for key, utotal in self.dbh.fetchall()
+                    }
+                    with self._uniqueCountsLock:
+                        self._uniqueCounts[cacheKey] = cached
+                        self._uniqueCounts.move_to_end(cacheKey)
+                        while len(self._uniqueCounts) > self.uniqueCountsSize:
+                            self._uniqueCounts.popitem(last=False)
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when fetching result summary") from e
+
+        return [
+            (key, descr, lastIn, total, cached.get(key, (None, 0))[1])
+            for key, descr, lastIn, total in rows
+        ]
+
     def scanCorrelationSummary(self, instanceId: str, by: str = "rule") -> list:
         """Obtain a summary of the correlations, filtered by rule or risk.
 
@@ -1043,15 +1685,14 @@ class SpiderFootDb:
             raise ValueError(f"Invalid filter by value: {by}") from None
 
         if by == "risk":
-            qry = "SELECT rule_risk, count(*) AS total FROM \
-                tbl_scan_correlation_results \
-                WHERE scan_instance_id = ? GROUP BY rule_risk ORDER BY rule_id"
+            qry = "SELECT rule_risk, SUM(total) AS total FROM \
+                tbl_scan_correlation_summary \
+                WHERE scan_instance_id = ? GROUP BY rule_risk ORDER BY rule_risk"
 
         if by == "rule":
-            qry = "SELECT rule_id, rule_name, rule_risk, rule_descr, \
-                count(*) AS total FROM \
-                tbl_scan_correlation_results \
-                WHERE scan_instance_id = ? GROUP BY rule_id ORDER BY rule_id"
+            qry = "SELECT rule_id, rule_name, rule_risk, rule_descr, total FROM \
+                tbl_scan_correlation_summary \
+                WHERE scan_instance_id = ? ORDER BY rule_id"
 
         qvars = [instanceId]
 
@@ -1125,21 +1766,261 @@ class SpiderFootDb:
             TypeError: arg type was invalid
             IOError: database I/O failed
         """
+        qry, qvars = self._scanResultEventQuery(
+            instanceId, eventType, srcModule, data, sourceId, correlationId, filterFp)
+        qry += " ORDER BY c.data"
 
-        if not isinstance(instanceId, str):
-            raise TypeError(
-                f"instanceId is {type(instanceId)}; expected str()") from None
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                return self.dbh.fetchall()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when fetching result events") from e
 
-        if not isinstance(eventType, str) and not isinstance(eventType, list):
-            raise TypeError(
-                f"eventType is {type(eventType)}; expected str() or list()") from None
+    def scanResultEventPage(
+        self,
+        instanceId: str,
+        eventType: str = 'ALL',
+        filterFp: bool = False,
+        limit: int = 100,
+        after: tuple = None,
+        offset: int = 0
+    ) -> list:
+        """Obtain one page of the data for a scan and event type, in the
+        order the events were generated.
 
-        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
-            c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
+        A page starts after the last event of the previous page, rather than
+        at an offset, so every page costs the same to fetch however far into
+        the results it is.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            filterFp (bool): filter false positives
+            limit (int): maximum number of results
+            after (tuple): key of the previous page, as returned by this function
+            offset (int): number of results to skip (slow for large offsets; prefer after)
+
+        Returns:
+            list: [scan results in the same format as scanResultEvent(),
+                   key of this page, or None if the page is empty]
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(limit, int):
+            raise TypeError(f"limit is {type(limit)}; expected int()") from None
+
+        if limit < 1:
+            raise ValueError("limit must be at least 1") from None
+
+        qry, qvars = self._scanResultEventQuery(
+            instanceId, eventType, None, None, None, None, filterFp, pageKey=True)
+
+        if after:
+            qry += " AND (c.generated, c.hash) > (?, ?)"
+            qvars.extend(after)
+
+        qry += " ORDER BY c.generated, c.hash LIMIT ?"
+        qvars.append(limit)
+
+        if offset:
+            qry += " OFFSET ?"
+            qvars.append(offset)
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                rows = self.dbh.fetchall()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when fetching result events") from e
+
+        if not rows:
+            return [[], None]
+
+        # the exact generated time, not the rounded one, and the hash
+        # identify the last event of the page
+        return [[row[:-1] for row in rows], (rows[-1][-1], rows[-1][8])]
+
+    def scanResultEventStored(self, instanceId: str, after: int = 0, limit: int = 1000) -> list:
+        """Obtain the results for a scan stored since an earlier call, in
+        the order they were stored, e.g. to follow a running scan.
+
+        Events are stored out of the order they were generated in, so a
+        running scan can't be followed with scanResultEventPage(), which
+        would pass over results stored late.
+
+        Args:
+            instanceId (str): scan instance ID
+            after (int): key returned by the previous call (0 for the first)
+            limit (int): maximum number of results
+
+        Returns:
+            list: [scan results in the same format as scanResultEvent(),
+                   key to pass to the next call]
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(limit, int):
+            raise TypeError(f"limit is {type(limit)}; expected int()") from None
+
+        if limit < 1:
+            raise ValueError("limit must be at least 1") from None
+
+        qry, qvars = self._scanResultEventQuery(
+            instanceId, 'ALL', None, None, None, None, False, rowId=True)
+        qry += " AND c.rowid > ? ORDER BY c.rowid LIMIT ?"
+        qvars.extend([after or 0, limit])
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                rows = self.dbh.fetchall()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when fetching result events") from e
+
+        if not rows:
+            return [[], after or 0]
+
+        return [[row[:-1] for row in rows], rows[-1][-1]]
+
+    def scanResultEventIter(self, instanceId: str, eventType: str = 'ALL', filterFp: bool = False, batchSize: int = 1000):
+        """Obtain the data for a scan and event type, yielding the results
+        a page at a time in the order the events were generated, rather than
+        loading them all into memory.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            filterFp (bool): filter false positives
+            batchSize (int): number of results fetched from the database at a time
+
+        Yields:
+            scan results, in the same format as scanResultEvent()
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+        after = None
+        while True:
+            rows, after = self.scanResultEventPage(instanceId, eventType, filterFp, batchSize, after)
+            yield from rows
+            if len(rows) < batchSize:
+                return
+
+    def scanResultEventCount(self, instanceId: str, eventType: str = 'ALL', filterFp: bool = False) -> int:
+        """Count the results for a scan and event type, without fetching
+        them.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            filterFp (bool): filter false positives
+
+        Returns:
+            int: number of results
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(
+                f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(eventType, str) and not isinstance(eventType, list):
+            raise TypeError(
+                f"eventType is {type(eventType)}; expected str() or list()") from None
+
+        if filterFp:
+            qry = "SELECT COALESCE(SUM(total - fp_total), 0) FROM tbl_scan_result_summary \
+                WHERE scan_instance_id = ?"
+        else:
+            qry = "SELECT COALESCE(SUM(total), 0) FROM tbl_scan_result_summary \
+                WHERE scan_instance_id = ?"
+        qvars = [instanceId]
+
+        if eventType != "ALL":
+            if isinstance(eventType, list):
+                qry += " AND type in (" + ','.join(['?'] * len(eventType)) + ")"
+                qvars.extend(eventType)
+            else:
+                qry += " AND type = ?"
+                qvars.append(eventType)
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                return int(self.dbh.fetchone()[0])
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when counting result events") from e
+
+    def _scanResultEventQuery(
+        self,
+        instanceId: str,
+        eventType,
+        srcModule,
+        data,
+        sourceId,
+        correlationId: str,
+        filterFp: bool,
+        pageKey: bool = False,
+        rowId: bool = False
+    ) -> tuple:
+        """Build the query for scanResultEvent(), without an ORDER BY clause.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            srcModule (str): filter by the generating module
+            data (list): filter by the data
+            sourceId (list): filter by the ID of the source event
+            correlationId (str): filter by the ID of a correlation result
+            filterFp (bool): filter false positives
+            pageKey (bool): also select the exact generated time, as the last column
+            rowId (bool): also select the row ID, as the last column
+
+        Returns:
+            tuple: SQL, query parameters
+
+        Raises:
+            TypeError: arg type was invalid
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(
+                f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not isinstance(eventType, str) and not isinstance(eventType, list):
+            raise TypeError(
+                f"eventType is {type(eventType)}; expected str() or list()") from None
+
+        qry = "SELECT ROUND(c.generated) AS generated, c.data, \
+            s.data AS source_data, \
+            c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
-            c.false_positive as 'fp', s.false_positive as 'parent_fp' \
-            FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t "
+            c.false_positive AS fp, s.false_positive AS parent_fp "
+
+        if pageKey:
+            qry += ", c.generated "
+
+        if rowId:
+            qry += ", c.rowid "
+
+        qry += "FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t "
 
         if correlationId:
             qry += ", tbl_scan_correlation_results_events ce "
@@ -1191,7 +2072,24 @@ class SpiderFootDb:
                 qry += " AND c.source_event_hash = ?"
                 qvars.append(sourceId)
 
-        qry += " ORDER BY c.data"
+        return qry, qvars
+
+    def scanResultEventUnique(self, instanceId: str, eventType: str = 'ALL', filterFp: bool = False) -> list:
+        """Obtain a unique list of elements.
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            filterFp (bool): filter false positives
+
+        Returns:
+            list: unique scan results
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+        qry, qvars = self._scanResultEventUniqueQuery(instanceId, eventType, filterFp)
 
         with self.dbhLock:
             try:
@@ -1199,23 +2097,42 @@ class SpiderFootDb:
                 return self.dbh.fetchall()
             except (sqlite3.Error, psycopg2.Error) as e:
                 raise IOError(
-                    "SQL error encountered when fetching result events") from e
+                    "SQL error encountered when fetching unique result events") from e
 
-    def scanResultEventUnique(self, instanceId: str, eventType: str = 'ALL', filterFp: bool = False) -> list:
-        """Obtain a unique list of elements.
+    def scanResultEventUniqueIter(self, instanceId: str, eventType: str = 'ALL', filterFp: bool = False, batchSize: int = 1000):
+        """Obtain a unique list of elements, yielding them as they are read
+        rather than loading them all into memory.
 
         Args:
             instanceId (str): scan instance ID
             eventType (str): filter by event type
             filterFp (bool): filter false positives
+            batchSize (int): number of results read from the database at a time
 
-        Returns:
-            list: unique scan results
+        Yields:
+            unique scan results, in the same format as scanResultEventUnique()
 
         Raises:
             TypeError: arg type was invalid
             IOError: database I/O failed
         """
+        qry, qvars = self._scanResultEventUniqueQuery(instanceId, eventType, filterFp)
+        return self._iterQuery(qry, qvars, batchSize, "SQL error encountered when fetching unique result events")
+
+    def _scanResultEventUniqueQuery(self, instanceId: str, eventType: str, filterFp: bool) -> tuple:
+        """Build the query for scanResultEventUnique().
+
+        Args:
+            instanceId (str): scan instance ID
+            eventType (str): filter by event type
+            filterFp (bool): filter false positives
+
+        Returns:
+            tuple: SQL, query parameters
+
+        Raises:
+            TypeError: arg type was invalid
+        """
 
         if not isinstance(instanceId, str):
             raise TypeError(
@@ -1238,16 +2155,56 @@ class SpiderFootDb:
 
         qry += " GROUP BY type, data ORDER BY COUNT(*)"
 
+        return qry, qvars
+
+    def scanLogs(self, instanceId: str, limit: int = None, fromRowId: int = 0, reverse: bool = False) -> list:
+        """Get scan logs.
+
+        Args:
+            instanceId (str): scan instance ID
+            limit (int): limit number of results
+            fromRowId (int): retrieve logs starting from row ID
+            reverse (bool): search result order
+
+        Returns:
+            list: scan logs
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+        qry, qvars = self._scanLogsQuery(instanceId, limit, fromRowId, reverse)
+
         with self.dbhLock:
             try:
                 self.dbh.execute(qry, qvars)
                 return self.dbh.fetchall()
             except (sqlite3.Error, psycopg2.Error) as e:
                 raise IOError(
-                    "SQL error encountered when fetching unique result events") from e
+                    "SQL error encountered when fetching scan logs") from e
 
-    def scanLogs(self, instanceId: str, limit: int = None, fromRowId: int = 0, reverse: bool = False) -> list:
-        """Get scan logs.
+    def scanLogsIter(self, instanceId: str, fromRowId: int = 0, reverse: bool = False, batchSize: int = 1000):
+        """Get scan logs, yielding them as they are read rather than loading
+        them all into memory.
+
+        Args:
+            instanceId (str): scan instance ID
+            fromRowId (int): retrieve logs starting from row ID
+            reverse (bool): search result order
+            batchSize (int): number of logs read from the database at a time
+
+        Yields:
+            scan logs, in the same format as scanLogs()
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+        qry, qvars = self._scanLogsQuery(instanceId, None, fromRowId, reverse)
+        return self._iterQuery(qry, qvars, batchSize, "SQL error encountered when fetching scan logs")
+
+    def _scanLogsQuery(self, instanceId: str, limit: int, fromRowId: int, reverse: bool) -> tuple:
+        """Build the query for scanLogs().
 
         Args:
             instanceId (str): scan instance ID
@@ -1256,11 +2213,10 @@ class SpiderFootDb:
             reverse (bool): search result order
 
         Returns:
-            list: scan logs
+            tuple: SQL, query parameters
 
         Raises:
             TypeError: arg type was invalid
-            IOError: database I/O failed
         """
 
         if not isinstance(instanceId, str):
@@ -1286,13 +2242,68 @@ class SpiderFootDb:
             qry += " LIMIT ?"
             qvars.append(str(limit))
 
+        return qry, qvars
+
+    def _iterQuery(self, qry: str, qvars: list, batchSize: int, errorMessage: str, hold: bool = True):
+        """Run a query on a cursor of its own, and yield its results
+        batchSize rows at a time.
+
+        The connection lock is only held while rows are being read, so the
+        handle can be used for other queries while the results are consumed.
+
+        Args:
+            qry (str): SQL query
+            qvars (list): query parameters
+            batchSize (int): number of rows read at a time
+            errorMessage (str): message of the IOError raised if the query fails
+            hold (bool): on PostgreSQL, commit the open transaction and keep
+                         the cursor open past the end of later ones. Callers
+                         which write in the same transaction as they read
+                         pass False, and must read every row before it ends.
+
+        Yields:
+            query results
+
+        Raises:
+            IOError: database I/O failed
+        """
         with self.dbhLock:
             try:
-                self.dbh.execute(qry, qvars)
-                return self.dbh.fetchall()
+                if self.db_type == 'postgresql':
+                    # a named cursor keeps the results on the server until
+                    # read. It is held past the end of its transaction, so
+                    # commits and rollbacks on the handle do not close it.
+                    cursor = self.conn.cursor(
+                        name=f"sf_iter_{random.getrandbits(64):x}",
+                        cursor_factory=psycopg2.extras.DictCursor,
+                        withhold=hold)
+                    cursor.execute(self.dialect.sql(qry), qvars)
+                    if hold:
+                        self.conn.commit()
+                else:
+                    cursor = self.conn.cursor()
+                    cursor.execute(self.dialect.sql(qry), qvars)
             except (sqlite3.Error, psycopg2.Error) as e:
-                raise IOError(
-                    "SQL error encountered when fetching scan logs") from e
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
+                raise IOError(errorMessage) from e
+
+        try:
+            while True:
+                with self.dbhLock:
+                    try:
+                        rows = cursor.fetchmany(batchSize)
+                    except (sqlite3.Error, psycopg2.Error) as e:
+                        raise IOError(errorMessage) from e
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            with self.dbhLock, suppress(sqlite3.Error, psycopg2.Error):
+                cursor.close()
+                if self.db_type == 'postgresql' and hold:
+                    # closing a held cursor opens a transaction
+                    self.conn.commit()
 
     def scanErrors(self, instanceId: str, limit: int = 0) -> list:
         """Get scan errors.
@@ -1352,25 +2363,228 @@ class SpiderFootDb:
             raise TypeError(
                 f"instanceId is {type(instanceId)}; expected str()") from None
 
-        qry1 = "DELETE FROM tbl_scan_instance WHERE guid = ?"
-        qry2 = "DELETE FROM tbl_scan_config WHERE scan_instance_id = ?"
-        qry3 = "DELETE FROM tbl_scan_results WHERE scan_instance_id = ?"
-        qry4 = "DELETE FROM tbl_scan_log WHERE scan_instance_id = ?"
         qvars = [instanceId]
 
         with self.dbhLock:
             try:
-                self.dbh.execute(qry1, qvars)
-                self.dbh.execute(qry2, qvars)
-                self.dbh.execute(qry3, qvars)
-                self.dbh.execute(qry4, qvars)
+                if self.partitioned:
+                    self._scanPartitionsDrop(instanceId)
+
+                # the scan instance goes last, so that a deletion which fails
+                # part way can be run again
+                self.dbh.execute(
+                    "DELETE FROM tbl_scan_correlation_results_events WHERE correlation_id IN \
+                    (SELECT id FROM tbl_scan_correlation_results WHERE scan_instance_id = ?)", qvars)
+                self.dbh.execute("DELETE FROM tbl_scan_correlation_results WHERE scan_instance_id = ?", qvars)
+                for table in self._partitionedTables:
+                    self._scanRowsDelete(table, instanceId)
+                self.dbh.execute("DELETE FROM tbl_scan_config WHERE scan_instance_id = ?", qvars)
+                self.dbh.execute("DELETE FROM tbl_scan_result_summary WHERE scan_instance_id = ?", qvars)
+                self.dbh.execute("DELETE FROM tbl_scan_correlation_summary WHERE scan_instance_id = ?", qvars)
+                self._scanRowsDelete("tbl_scan_value_index", instanceId)
+                self.dbh.execute("DELETE FROM tbl_scan_instance WHERE guid = ?", qvars)
                 self.conn.commit()
             except (sqlite3.Error, psycopg2.Error) as e:
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
                 raise IOError(
                     "SQL error encountered when deleting scan") from e
+            finally:
+                self._uniqueCountsDrop(instanceId)
 
         return True
 
+    def _uniqueCountsDrop(self, instanceId: str) -> None:
+        """Forget the distinct data counts of a scan in this database.
+
+        Args:
+            instanceId (str): scan instance ID
+        """
+        with self._uniqueCountsLock:
+            for key in [k for k in self._uniqueCounts if k[:3] == (self.db_type, self.database, instanceId)]:
+                del self._uniqueCounts[key]
+
+    def _scanPartitionsDrop(self, instanceId: str) -> None:
+        """Drop a scan's partitions. The caller must hold dbhLock, and
+        commit.
+
+        Dropping an attached partition locks the whole partitioned table, so
+        it waits for queries on other scans to finish, and holds up every
+        running scan's writes while it does. Partitions are detached
+        concurrently first where the database allows it, which does not
+        block the other scans. On other databases, see detachConcurrently,
+        deleting a scan stalls running scans until the drop gets its lock.
+
+        Args:
+            instanceId (str): scan instance ID
+        """
+        for table in self._partitionedTables:
+            partition = self._scanPartition(table, instanceId)
+            if self.detachConcurrently:
+                # DETACH ... CONCURRENTLY can't run inside a transaction
+                self.conn.commit()
+                autocommit = self.conn.autocommit
+                self.conn.autocommit = True
+                try:
+                    # a deletion which failed part way may have detached it
+                    self.dbh.execute(
+                        "SELECT COUNT(*) FROM pg_inherits i, pg_class c \
+                        WHERE c.oid = i.inhrelid AND c.relname = ?", [partition])
+                    if self.dbh.fetchone()[0]:
+                        self.dbh.execute(f"ALTER TABLE {table} DETACH PARTITION {partition} CONCURRENTLY")
+                finally:
+                    self.conn.autocommit = autocommit
+            self.dbh.execute(f"DROP TABLE IF EXISTS {partition}")
+
+    def _scanRowsDelete(self, table: str, instanceId: str) -> None:
+        """Delete a scan's rows from a table. On SQLite, rows are deleted
+        and committed a batch at a time, as a single transaction would keep
+        other connections from writing until the whole scan was deleted.
+
+        Args:
+            table (str): table with a scan_instance_id column
+            instanceId (str): scan instance ID
+        """
+
+        if self.db_type != 'sqlite':
+            # on a partitioned database, only rows from a default partition
+            # are left
+            self.dbh.execute(f"DELETE FROM {table} WHERE scan_instance_id = ?", [instanceId])
+            return
+
+        while True:
+            self.dbh.execute(
+                f"DELETE FROM {table} WHERE rowid IN \
+                (SELECT rowid FROM {table} WHERE scan_instance_id = ? LIMIT ?)",
+                [instanceId, self.deleteBatchSize])
+            deleted = self.dbh.rowcount
+            self.conn.commit()
+            if deleted < self.deleteBatchSize:
+                return
+
+    def _scanPartition(self, table: str, instanceId: str) -> str:
+        """Name of the partition of a table holding a scan's rows.
+
+        Args:
+            table (str): partitioned table
+            instanceId (str): scan instance ID
+
+        Returns:
+            str: table name
+        """
+        # scan IDs may hold characters which can't be used in a table name
+        return f"{table}_{hashlib.sha256(instanceId.encode('utf-8')).hexdigest()[:16]}"
+
+    def _scanPartitionsCreate(self, instanceId: str) -> None:
+        """Create a scan's partitions, if the database is partitioned. The
+        caller must hold dbhLock, and commit.
+
+        Args:
+            instanceId (str): scan instance ID
+        """
+        if not self.partitioned:
+            return
+
+        for table in self._partitionedTables:
+            self.dbh.execute(
+                f"CREATE TABLE IF NOT EXISTS {self._scanPartition(table, instanceId)} \
+                PARTITION OF {table} FOR VALUES IN (?)", [instanceId])
+
+    def scanInstanceArchive(self, instanceId: str, path: str) -> None:
+        """Move a scan out of the database, into an SQLite database file of
+        its own from which it can be restored with scanInstanceRestore().
+
+        The archive file is a SpiderFoot database, and may hold other
+        archived scans.
+
+        Args:
+            instanceId (str): scan instance ID
+            path (str): archive database file path
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: the scan does not exist, or is already archived
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(
+                f"instanceId is {type(instanceId)}; expected str()") from None
+
+        archive = SpiderFootDb({'__database': path})
+        try:
+            self._scanCopy(archive, instanceId)
+        finally:
+            archive.close()
+
+        self.scanInstanceDelete(instanceId)
+
+    def scanInstanceRestore(self, path: str, instanceId: str) -> None:
+        """Restore an archived scan into the database. The scan is left in
+        the archive.
+
+        Args:
+            path (str): archive database file path, from scanInstanceArchive()
+            instanceId (str): scan instance ID
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: the scan is not in the archive, or already exists
+            IOError: database I/O failed
+        """
+
+        if not isinstance(instanceId, str):
+            raise TypeError(
+                f"instanceId is {type(instanceId)}; expected str()") from None
+
+        if not Path(path).is_file():
+            raise ValueError(f"Archive {path} does not exist") from None
+
+        archive = SpiderFootDb({'__database': path})
+        try:
+            archive._scanCopy(self, instanceId)
+        finally:
+            archive.close()
+
+    def _scanCopy(self, dst: 'SpiderFootDb', instanceId: str, batchSize: int = 10000) -> None:
+        """Copy a scan to another database, in a single transaction.
+
+        Args:
+            dst (SpiderFootDb): database copied to
+            instanceId (str): scan instance ID
+            batchSize (int): number of rows read and written at a time
+
+        Raises:
+            ValueError: the scan does not exist, or already exists in dst
+            IOError: database I/O failed
+        """
+
+        if not self.scanInstanceGet(instanceId):
+            raise ValueError(f"Scan {instanceId} does not exist") from None
+
+        if dst.scanInstanceGet(instanceId):
+            raise ValueError(f"Scan {instanceId} already exists in {dst.database}") from None
+
+        with dst.dbhLock:
+            try:
+                dst._scanPartitionsCreate(instanceId)
+                for table, columns, condition in self._scanTables:
+                    rows = self._iterQuery(
+                        f"SELECT {', '.join(columns)} FROM {table} WHERE {condition}",
+                        [instanceId], batchSize, "SQL error encountered when copying scan")
+                    while True:
+                        batch = [tuple(row) for row in itertools.islice(rows, batchSize)]
+                        if not batch:
+                            break
+                        dst.dialect.insertRows(dst.dbh, table, columns, batch)
+                dst.conn.commit()
+            except (sqlite3.Error, psycopg2.Error, IOError) as e:
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    dst.conn.rollback()
+                if isinstance(e, IOError):
+                    raise
+                raise IOError("SQL error encountered when copying scan") from e
+
     def scanResultsUpdateFP(self, instanceId: str, resultHashes: list, fpFlag: int) -> bool:
         """Set the false positive flag for a result.
 
@@ -1395,8 +2609,33 @@ class SpiderFootDb:
             raise TypeError(
                 f"resultHashes is {type(resultHashes)}; expected list()") from None
 
+        isFp = str(fpFlag) == "1"
+
         with self.dbhLock:
+            # the change in the number of false positives in each summary
+            # group and each indexed value
+            fpChanges = dict()
+            valueFpChanges = dict()
+
             for resultHash in resultHashes:
+                qry = "SELECT type, module, risk, false_positive, data FROM tbl_scan_results \
+                    WHERE scan_instance_id = ? AND hash = ?"
+                qvars = [instanceId, resultHash]
+                try:
+                    self.dbh.execute(qry, qvars)
+                    for eventType, module, risk, falsePositive, data in self.dbh.fetchall():
+                        if (str(falsePositive) == "1") != isFp:
+                            change = 1 if isFp else -1
+                            key = (eventType, module, risk)
+                            fpChanges[key] = fpChanges.get(key, 0) + change
+                            value = self._valueIndexKey(eventType, data)
+                            if value is not None:
+                                key = (eventType, value)
+                                valueFpChanges[key] = valueFpChanges.get(key, 0) + change
+                except (sqlite3.Error, psycopg2.Error) as e:
+                    raise IOError(
+                        "SQL error encountered when updating false-positive") from e
+
                 qry = "UPDATE tbl_scan_results SET false_positive = ? WHERE \
                     scan_instance_id = ? AND hash = ?"
                 qvars = [fpFlag, instanceId, resultHash]
@@ -1406,7 +2645,17 @@ class SpiderFootDb:
                     raise IOError(
                         "SQL error encountered when updating false-positive") from e
 
+            qry = "UPDATE tbl_scan_result_summary SET fp_total = fp_total + ? \
+                WHERE scan_instance_id = ? AND type = ? AND module = ? AND risk = ?"
             try:
+                self.dbh.executemany(qry, [
+                    (change, instanceId) + key for key, change in fpChanges.items() if change
+                ])
+                self.dbh.executemany(
+                    "UPDATE tbl_scan_value_index SET fp_total = fp_total + ? \
+                    WHERE scan_instance_id = ? AND type = ? AND value = ?", [
+                        (change, instanceId) + key for key, change in valueFpChanges.items() if change
+                    ])
                 self.conn.commit()
             except (sqlite3.Error, psycopg2.Error) as e:
                 raise IOError(
@@ -1435,7 +2684,8 @@ class SpiderFootDb:
         if not optMap:
             raise ValueError("optMap is empty") from None
 
-        qry = "REPLACE INTO tbl_config (scope, opt, val) VALUES (?, ?, ?)"
+        qry = "INSERT INTO tbl_config (scope, opt, val) VALUES (?, ?, ?) \
+            ON CONFLICT (scope, opt) DO UPDATE SET val = excluded.val"
 
         with self.dbhLock:
             for opt in list(optMap.keys()):
@@ -1526,7 +2776,7 @@ class SpiderFootDb:
         if not optMap:
             raise ValueError("optMap is empty") from None
 
-        qry = "REPLACE INTO tbl_scan_config \
+        qry = "INSERT INTO tbl_scan_config \
                 (scan_instance_id, component, opt, val) VALUES (?, ?, ?, ?)"
 
         with self.dbhLock:
@@ -1601,6 +2851,201 @@ class SpiderFootDb:
             ValueError: arg value was invalid
             IOError: database I/O failed
         """
+        qvals = self._scanEventValues(instanceId, sfEvent, truncateSize)
+
+        qry = "INSERT INTO tbl_scan_results \
+            (scan_instance_id, hash, type, generated, confidence, \
+            visibility, risk, module, data, source_event_hash) \
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvals)
+                self._scanResultSummaryAdd([qvals])
+                self._scanValueIndexAdd([(qvals[0], qvals[1], qvals[2], qvals[8], 0)])
+                self.conn.commit()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
+                raise IOError(
+                    f"SQL error encountered when storing event data ({self.dbh})") from e
+
+    def scanEventStoreMany(self, instanceId: str, sfEvents: list, truncateSize: int = 0) -> None:
+        """Store several events in the database in a single transaction.
+        No events are stored if any of them is invalid.
+
+        Args:
+            instanceId (str): scan instance ID
+            sfEvents (list): events (SpiderFootEvent) to be stored in the database
+            truncateSize (int): truncate size for event data
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+            IOError: database I/O failed
+        """
+        if not isinstance(sfEvents, (list, tuple)):
+            raise TypeError(
+                f"sfEvents is {type(sfEvents)}; expected list()") from None
+
+        qvals = [self._scanEventValues(instanceId, sfEvent, truncateSize) for sfEvent in sfEvents]
+        if not qvals:
+            return
+
+        with self.dbhLock:
+            try:
+                self.dialect.insertRows(self.dbh, "tbl_scan_results", self._scanEventColumns, qvals)
+                self._scanResultSummaryAdd(qvals)
+                self._scanValueIndexAdd([(q[0], q[1], q[2], q[8], 0) for q in qvals])
+                self.conn.commit()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
+                raise IOError(
+                    f"SQL error encountered when storing event data ({self.dbh})") from e
+
+    def _scanResultSummaryAdd(self, qvals: list) -> None:
+        """Count stored events in the scan result summary. Must be called
+        with dbhLock held, in the transaction which stored the events.
+
+        Args:
+            qvals (list): column values of the stored events, from _scanEventValues()
+        """
+        groups = dict()
+        for instanceId, _, eventType, generated, _, _, risk, module, _, _ in qvals:
+            key = (instanceId, eventType, module, risk)
+            total, lastIn = groups.get(key, (0, 0))
+            groups[key] = (total + 1, max(lastIn, generated))
+
+        qry = "INSERT INTO tbl_scan_result_summary \
+            (scan_instance_id, type, module, risk, total, last_in) \
+            VALUES (?, ?, ?, ?, ?, ?) \
+            ON CONFLICT (scan_instance_id, type, module, risk) DO UPDATE SET \
+            total = tbl_scan_result_summary.total + excluded.total, \
+            last_in = " + self.dialect.greatest("tbl_scan_result_summary.last_in", "excluded.last_in")
+
+        self.dialect.executeMany(self.dbh, qry, [key + value for key, value in groups.items()])
+
+    def _scanValueIndexAdd(self, rows: list) -> None:
+        """Add stored events to the value index. Must be called with
+        dbhLock held, in the transaction which stored the events.
+
+        Args:
+            rows (list): scan instance ID, hash, type, data and false
+                positive flag of each stored event
+        """
+        groups = dict()
+        for instanceId, eventHash, eventType, data, falsePositive in rows:
+            value = self._valueIndexKey(eventType, data)
+            if value is None:
+                continue
+            key = (eventType, value, instanceId)
+            # the first event stored with the value represents it
+            first, total, fpTotal = groups.get(key, (eventHash, 0, 0))
+            groups[key] = (first, total + 1, fpTotal + (1 if str(falsePositive) == "1" else 0))
+
+        if not groups:
+            return
+
+        qry = "INSERT INTO tbl_scan_value_index \
+            (type, value, scan_instance_id, hash, total, fp_total) \
+            VALUES (?, ?, ?, ?, ?, ?) \
+            ON CONFLICT (type, value, scan_instance_id) DO UPDATE SET \
+            total = tbl_scan_value_index.total + excluded.total, \
+            fp_total = tbl_scan_value_index.fp_total + excluded.fp_total"
+
+        self.dialect.executeMany(self.dbh, qry, [key + value for key, value in groups.items()])
+
+    def _valueIndexKey(self, eventType: str, data: str) -> str:
+        """Normalised value an event is indexed by.
+
+        Args:
+            eventType (str): event type
+            data (str): event data
+
+        Returns:
+            str: value, or None if the event is not indexed
+        """
+        if eventType == 'ROOT' or not isinstance(data, str):
+            return None
+        value = data.strip().lower()
+        if not value or len(value) > self.valueIndexMaxLength:
+            return None
+        return value
+
+    def scanValueIndexSearch(self, eventTypes: list, scanIds: list, minScans: int = 1, maxScans: int = 0) -> list:
+        """Find the values of events found in a number of scans, from the
+        value index rather than the results themselves. False positives
+        are left out.
+
+        Args:
+            eventTypes (list): event types
+            scanIds (list): scan instance IDs
+            minScans (int): fewest scans a value must be found in
+            maxScans (int): most scans a value may be found in (0 for any number)
+
+        Returns:
+            list: value, event type, scan instance ID, hash of the first
+            event with the value and number of events with it, for each
+            event type and scan a value is found in, ordered by value
+
+        Raises:
+            TypeError: arg type was invalid
+            IOError: database I/O failed
+        """
+
+        if not isinstance(eventTypes, list):
+            raise TypeError(
+                f"eventTypes is {type(eventTypes)}; expected list()") from None
+
+        if not isinstance(scanIds, list):
+            raise TypeError(
+                f"scanIds is {type(scanIds)}; expected list()") from None
+
+        if not eventTypes or not scanIds:
+            return []
+
+        typeSql, typeVar = self.dialect.listSql(eventTypes)
+        scanSql, scanVar = self.dialect.listSql(scanIds)
+        match = f"type IN ({typeSql}) AND scan_instance_id IN ({scanSql}) AND total > fp_total"
+
+        having = "COUNT(DISTINCT scan_instance_id) >= ?"
+        havingVars = [int(minScans)]
+        if maxScans:
+            having += " AND COUNT(DISTINCT scan_instance_id) <= ?"
+            havingVars.append(int(maxScans))
+
+        qry = f"SELECT value, type, scan_instance_id, hash, total - fp_total \
+            FROM tbl_scan_value_index WHERE {match} AND value IN \
+            (SELECT value FROM tbl_scan_value_index WHERE {match} \
+            GROUP BY value HAVING {having}) \
+            ORDER BY value, scan_instance_id, type"
+        qvars = [typeVar, scanVar, typeVar, scanVar] + havingVars
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                return self.dbh.fetchall()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when searching the value index") from e
+
+    def _scanEventValues(self, instanceId: str, sfEvent, truncateSize: int) -> list:
+        """Check an event can be stored, and build its tbl_scan_results
+        column values.
+
+        Args:
+            instanceId (str): scan instance ID
+            sfEvent (SpiderFootEvent): event to be stored in the database
+            truncateSize (int): truncate size for event data
+
+        Returns:
+            list: column values
+
+        Raises:
+            TypeError: arg type was invalid
+            ValueError: arg value was invalid
+        """
         from spiderfoot import SpiderFootEvent
 
         if not isinstance(instanceId, str):
@@ -1683,23 +3128,9 @@ class SpiderFootDb:
         if isinstance(truncateSize, int) and truncateSize > 0:
             storeData = storeData[0:truncateSize]
 
-        # retrieve scan results
-        qry = "INSERT INTO tbl_scan_results \
-            (scan_instance_id, hash, type, generated, confidence, \
-            visibility, risk, module, data, source_event_hash) \
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
-
-        qvals = [instanceId, sfEvent.hash, sfEvent.eventType, sfEvent.generated,
-                 sfEvent.confidence, sfEvent.visibility, sfEvent.risk,
-                 sfEvent.module, storeData, sfEvent.sourceEventHash]
-
-        with self.dbhLock:
-            try:
-                self.dbh.execute(qry, qvals)
-                self.conn.commit()
-            except (sqlite3.Error, psycopg2.Error) as e:
-                raise IOError(
-                    f"SQL error encountered when storing event data ({self.dbh})") from e
+        return [instanceId, sfEvent.hash, sfEvent.eventType, sfEvent.generated,
+                sfEvent.confidence, sfEvent.visibility, sfEvent.risk,
+                sfEvent.module, storeData, sfEvent.sourceEventHash]
 
     def scanInstanceList(self) -> list:
         """List all previously run scans.
@@ -1711,19 +3142,13 @@ class SpiderFootDb:
             IOError: database I/O failed
         """
 
-        # SQLite doesn't support OUTER JOINs, so we need a work-around that
-        # does a UNION of scans with results and scans without results to
-        # get a complete listing.
+        # result counts come from the result summary, so listing scans does
+        # not have to count every result of every scan
         qry = "SELECT i.guid, i.name, i.seed_target, ROUND(i.created/1000), \
-            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, COUNT(r.type) \
-            FROM tbl_scan_instance i, tbl_scan_results r WHERE i.guid = r.scan_instance_id \
-            AND r.type <> 'ROOT' GROUP BY i.guid \
-            UNION ALL \
-            SELECT i.guid, i.name, i.seed_target, ROUND(i.created/1000), \
-            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, '0' \
-            FROM tbl_scan_instance i  WHERE i.guid NOT IN ( \
-            SELECT distinct scan_instance_id FROM tbl_scan_results WHERE type <> 'ROOT') \
-            ORDER BY started DESC"
+            ROUND(i.started)/1000 as started, ROUND(i.ended)/1000, i.status, \
+            COALESCE((SELECT SUM(s.total) FROM tbl_scan_result_summary s \
+            WHERE s.scan_instance_id = i.guid AND s.type <> 'ROOT'), 0) \
+            FROM tbl_scan_instance i ORDER BY started DESC"
 
         with self.dbhLock:
             try:
@@ -1751,7 +3176,7 @@ class SpiderFootDb:
             raise TypeError(
                 f"instanceId is {type(instanceId)}; expected str()") from None
 
-        qry = "SELECT STRFTIME('%H:%M %w', generated, 'unixepoch') AS hourmin, \
+        qry = f"SELECT {self.dialect.hourMinute('generated')} AS hourmin, \
                 type, COUNT(*) FROM tbl_scan_results \
                 WHERE scan_instance_id = ? GROUP BY hourmin, type"
         qvars = [instanceId]
@@ -1798,11 +3223,11 @@ class SpiderFootDb:
         # the output of this needs to be aligned with scanResultEvent,
         # as other functions call both expecting the same output.
         qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+            s.data AS source_data, \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
-            c.false_positive as 'fp', s.false_positive as 'parent_fp', \
-            s.type, s.module, st.event_type as 'source_entity_type' \
+            c.false_positive AS fp, s.false_positive AS parent_fp, \
+            s.type, s.module, st.event_type AS source_entity_type \
             FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t, \
             tbl_event_types st \
             WHERE c.scan_instance_id = ? AND c.source_event_hash = s.hash AND \
@@ -1852,10 +3277,10 @@ class SpiderFootDb:
         # the output of this needs to be aligned with scanResultEvent,
         # as other functions call both expecting the same output.
         qry = "SELECT ROUND(c.generated) AS generated, c.data, \
-            s.data as 'source_data', \
+            s.data AS source_data, \
             c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
             c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
-            c.false_positive as 'fp', s.false_positive as 'parent_fp' \
+            c.false_positive AS fp, s.false_positive AS parent_fp \
             FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t \
             WHERE c.scan_instance_id = ? AND c.source_event_hash = s.hash AND \
             s.scan_instance_id = c.scan_instance_id AND \
@@ -1870,20 +3295,33 @@ class SpiderFootDb:
                 raise IOError(
                     "SQL error encountered when getting child element IDs") from e
 
+    def _hashListSql(self, hashIds: list) -> tuple:
+        """SQL selecting each of a list of event hashes as a row, so that the
+        list can be passed as a single query parameter however long it is.
+
+        Args:
+            hashIds (list): event hashes
+
+        Returns:
+            tuple: SQL, query parameter
+        """
+        return self.dialect.listSql(hashIds)
+
     def scanElementSourcesAll(self, instanceId: str, childData: list) -> list:
         """Get the full set of upstream IDs which are parents to the supplied
         set of IDs.
 
         Args:
             instanceId (str): scan instance ID
-            childData (list): TBD
+            childData (list): rows of events, as returned by scanResultEvent()
 
         Returns:
-            list: TBD
+            list: [dict of event hash to event row, dict of parent hash to child hashes]
 
         Raises:
             TypeError: arg type was invalid
             ValueError: arg value was invalid
+            IOError: database I/O failed
         """
 
         if not isinstance(instanceId, str):
@@ -1896,51 +3334,50 @@ class SpiderFootDb:
         if not childData:
             raise ValueError("childData is empty")
 
-        # Get the first round of source IDs for the leafs
-        keepGoing = True
-        nextIds = list()
+        seedSql, seedIds = self._hashListSql({row[9] for row in childData})
+
+        # Walk up the event graph in one query. UNION discards hashes already
+        # visited, so the walk ends at ROOT, which is its own source.
+        qry = f"WITH RECURSIVE ancestors(hash) AS ( \
+            {seedSql} \
+            UNION \
+            SELECT r.source_event_hash FROM tbl_scan_results r, ancestors a \
+            WHERE r.scan_instance_id = ? AND r.hash = a.hash) \
+            SELECT ROUND(c.generated) AS generated, c.data, \
+            s.data AS source_data, \
+            c.module, c.type, c.confidence, c.visibility, c.risk, c.hash, \
+            c.source_event_hash, t.event_descr, t.event_type, s.scan_instance_id, \
+            c.false_positive AS fp, s.false_positive AS parent_fp, \
+            s.type, s.module, st.event_type AS source_entity_type \
+            FROM tbl_scan_results c, tbl_scan_results s, tbl_event_types t, \
+            tbl_event_types st \
+            WHERE c.scan_instance_id = ? AND c.hash IN (SELECT hash FROM ancestors) AND \
+            c.source_event_hash = s.hash AND s.scan_instance_id = c.scan_instance_id AND \
+            st.event = s.type AND t.event = c.type"
+        qvars = [seedIds, instanceId, instanceId]
+
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                parentSet = self.dbh.fetchall()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when getting source element IDs") from e
+
         datamap = dict()
         pc = dict()
+        linked = set()
 
-        for row in childData:
-            # these must be unique values!
+        for row in childData + parentSet:
             parentId = row[9]
             childId = row[8]
             datamap[childId] = row
 
-            if parentId in pc:
-                if childId not in pc[parentId]:
-                    pc[parentId].append(childId)
-            else:
-                pc[parentId] = [childId]
-
-            # parents of the leaf set
-            if parentId not in nextIds:
-                nextIds.append(parentId)
-
-        while keepGoing:
-            parentSet = self.scanElementSourcesDirect(instanceId, nextIds)
-            nextIds = list()
-            keepGoing = False
-
-            for row in parentSet:
-                parentId = row[9]
-                childId = row[8]
-                datamap[childId] = row
-
-                if parentId in pc:
-                    if childId not in pc[parentId]:
-                        pc[parentId].append(childId)
-                else:
-                    pc[parentId] = [childId]
-                if parentId not in nextIds:
-                    nextIds.append(parentId)
-
-                # Prevent us from looping at root
-                if parentId != "ROOT":
-                    keepGoing = True
+            if parentId == childId or (parentId, childId) in linked:
+                continue
+            linked.add((parentId, childId))
+            pc.setdefault(parentId, list()).append(childId)
 
-        datamap[parentId] = row
         return [datamap, pc]
 
     def scanElementChildrenAll(self, instanceId: str, parentIds: list) -> list:
@@ -1949,13 +3386,14 @@ class SpiderFootDb:
 
         Args:
             instanceId (str): scan instance ID
-            parentIds (list): TBD
+            parentIds (list): event hashes
 
         Returns:
-            list: TBD
+            list: hashes of all events descended from the supplied events
 
         Raises:
             TypeError: arg type was invalid
+            IOError: database I/O failed
 
         Note: This function is not the same as the scanElementParent* functions.
               This function returns only ids.
@@ -1968,31 +3406,31 @@ class SpiderFootDb:
         if not isinstance(parentIds, list):
             raise TypeError(f"parentIds is {type(parentIds)}; expected list()")
 
-        datamap = list()
-       
-        keepGoing = True
-        nextIds = list()
-
-        nextSet = self.scanElementChildrenDirect(instanceId, parentIds)
-        for row in nextSet:
-            datamap.append(row[8])
-
-        for row in nextSet:
-            if row[8] not in nextIds:
-                nextIds.append(row[8])
+        if not parentIds:
+            return list()
 
-        while keepGoing:
-            nextSet = self.scanElementChildrenDirect(instanceId, nextIds)
-            if nextSet is None or len(nextSet) == 0:
-                keepGoing = False
-                break
+        seedSql, seedIds = self._hashListSql(set(parentIds))
 
-            for row in nextSet:
-                datamap.append(row[8])
-                nextIds = list()
-                nextIds.append(row[8])
+        # Walk down the event graph in one query. ROOT is its own source, so
+        # is excluded to stop it being returned as a child of itself.
+        qry = f"WITH RECURSIVE descendants(hash) AS ( \
+            SELECT r.hash FROM tbl_scan_results r \
+            WHERE r.scan_instance_id = ? AND r.hash != 'ROOT' \
+            AND r.source_event_hash IN ({seedSql}) \
+            UNION \
+            SELECT r.hash FROM tbl_scan_results r, descendants d \
+            WHERE r.scan_instance_id = ? AND r.source_event_hash = d.hash \
+            AND r.hash != 'ROOT') \
+            SELECT hash FROM descendants"
+        qvars = [instanceId, seedIds, instanceId]
 
-        return datamap
+        with self.dbhLock:
+            try:
+                self.dbh.execute(qry, qvars)
+                return [row[0] for row in self.dbh.fetchall()]
+            except (sqlite3.Error, psycopg2.Error) as e:
+                raise IOError(
+                    "SQL error encountered when getting child element IDs") from e
 
     def correlationResultCreate(self, instanceId: str, event_hash: str, ruleId: str,
         ruleName: str,
@@ -2032,8 +3470,16 @@ class SpiderFootDb:
 
             try:
                 self.dbh.execute(qry, qvars)
+                self.dbh.execute("INSERT INTO tbl_scan_correlation_summary \
+                    (scan_instance_id, rule_id, rule_name, rule_risk, rule_descr, total) \
+                    VALUES (?, ?, ?, ?, ?, 1) \
+                    ON CONFLICT (scan_instance_id, rule_id) DO UPDATE SET \
+                    total = tbl_scan_correlation_summary.total + 1",
+                    [instanceId, ruleId, ruleName, ruleRisk, ruleDescr])
                 self.conn.commit()
             except (sqlite3.Error, psycopg2.Error) as e:
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
                 raise IOError(
                     "Unable to create correlation result in database") from e
 
@@ -2052,9 +3498,33 @@ class SpiderFootDb:
                     raise IOError("Unable to create correlation result events in database") from e
 
             self.conn.commit()
-        
+
         return str(correlationId)
 
+    def correlationResultEventsAdd(self, correlationId: str, eventHashes: list) -> None:
+        """Add events to a correlation result already in the database.
+
+        Args:
+            correlationId (str): correlation ID
+            eventHashes (list): events to map to the correlation result
+
+        Raises:
+            IOError: database I/O failed
+        """
+        if not eventHashes:
+            return
+
+        with self.dbhLock:
+            try:
+                self.dialect.insertRows(
+                    self.dbh, "tbl_scan_correlation_results_events", ['correlation_id', 'event_hash'],
+                    [(correlationId, eventHash) for eventHash in eventHashes])
+                self.conn.commit()
+            except (sqlite3.Error, psycopg2.Error) as e:
+                with suppress(sqlite3.Error, psycopg2.Error):
+                    self.conn.rollback()
+                raise IOError("Unable to add correlation result events to database") from e
+
     def get_sources(self, scan_id: str, event_hash: str) -> list:
         """Return the list of source events for a given event in a scan.
 
@@ -2065,34 +3535,48 @@ class SpiderFootDb:
         Returns:
             list: List of dicts with source event details (hash, type, data, module, etc.)
         """
-        qry = """
-            SELECT s.hash, s.type, s.data, s.module, s.generated, s.source_event_hash
+        return self.get_sources_many(scan_id, [event_hash])[event_hash]
+
+    def get_sources_many(self, scan_id: str, event_hashes: list) -> dict:
+        """Return the source events of many events in a scan, in a single query.
+
+        Args:
+            scan_id (str): The scan instance ID
+            event_hashes (list): The hashes of the events whose sources to retrieve
+
+        Returns:
+            dict: List of source event dicts, as from get_sources(), by event hash
+        """
+        listSql, listVar = self._hashListSql(event_hashes)
+        qry = f"""
+            SELECT c.hash, s.hash, s.type, s.data, s.module, s.generated, s.source_event_hash
             FROM tbl_scan_results c
             JOIN tbl_scan_results s
-              ON c.source_event_hash = s.hash
+              ON s.scan_instance_id = c.scan_instance_id AND c.source_event_hash = s.hash
             WHERE c.scan_instance_id = ?
-              AND c.hash = ?
+              AND c.hash IN ({listSql})
               AND c.source_event_hash != 'ROOT'
         """
-        qvars = [scan_id, event_hash]
+        qvars = [scan_id, listVar]
         with self.dbhLock:
             try:
                 self.dbh.execute(qry, qvars)
                 rows = self.dbh.fetchall()
-                sources = []
-                for row in rows:
-                    sources.append({
-                        'hash': row[0],
-                        'type': row[1],
-                        'data': row[2],
-                        'module': row[3],
-                        'generated': row[4],
-                        'source_event_hash': row[5]
-                    })
-                return sources
             except (sqlite3.Error, psycopg2.Error) as e:
                 raise IOError("SQL error encountered when fetching event sources") from e
 
+        sources = {event_hash: [] for event_hash in event_hashes}
+        for row in rows:
+            sources[row[0]].append({
+                'hash': row[1],
+                'type': row[2],
+                'data': row[3],
+                'module': row[4],
+                'generated': row[5],
+                'source_event_hash': row[6]
+            })
+        return sources
+
     def get_entities(self, scan_id: str, event_hash: str) -> list:
         """Return the list of entity events that are children of a given event in a scan.
 
@@ -2103,30 +3587,60 @@ class SpiderFootDb:
         Returns:
             list: List of dicts with entity event details (hash, type, data, module, etc.)
         """
-        qry = """
-            SELECT c.hash, c.type, c.data, c.module, c.generated, c.source_event_hash
+        return self.get_entities_many(scan_id, [event_hash])[event_hash]
+
+    def get_entities_many(self, scan_id: str, event_hashes: list) -> dict:
+        """Return the child entity events of many events in a scan, in a single query.
+
+        Args:
+            scan_id (str): The scan instance ID
+            event_hashes (list): The hashes of the events whose child entities to retrieve
+
+        Returns:
+            dict: List of entity event dicts, as from get_entities(), by event hash
+        """
+        listSql, listVar = self._hashListSql(event_hashes)
+        qry = f"""
+            SELECT c.source_event_hash, c.hash, c.type, c.data, c.module, c.generated
             FROM tbl_scan_results c
+            JOIN tbl_event_types t
+              ON t.event = c.type
             WHERE c.scan_instance_id = ?
-              AND c.source_event_hash = ?
-              AND c.type IN (
-                SELECT event FROM tbl_event_types WHERE event_type = 'ENTITY'
-              )
+              AND c.source_event_hash IN ({listSql})
+              AND t.event_type = 'ENTITY'
         """
-        qvars = [scan_id, event_hash]
+        qvars = [scan_id, listVar]
         with self.dbhLock:
             try:
                 self.dbh.execute(qry, qvars)
                 rows = self.dbh.fetchall()
-                entities = []
-                for row in rows:
-                    entities.append({
-                        'hash': row[0],
-                        'type': row[1],
-                        'data': row[2],
-                        'module': row[3],
-                        'generated': row[4],
-                        'source_event_hash': row[5]
-                    })
-                return entities
             except (sqlite3.Error, psycopg2.Error) as e:
-                raise IOError("SQL error encountered when fetching entity events") from e
\ No newline at end of file
+                raise IOError("SQL error encountered when fetching entity events") from e
+
+        entities = {event_hash: [] for event_hash in event_hashes}
+        for row in rows:
+            entities[row[0]].append({
+                'hash': row[1],
+                'type': row[2],
+                'data': row[3],
+                'module': row[4],
+                'generated': row[5],
+                'source_event_hash': row[0]
+            })
+        return entities
+
+@functools.lru_cache(maxsize=256)
+def _compileRegex(pattern: str):
+    """Compile a pattern for the SQLite REGEXP function, keeping the most
+    recently used patterns.
+
+    Args:
+        pattern (str): regular expression
+
+    Returns:
+        re.Pattern: compiled pattern, or None if it is invalid
+    """
+    try:
+        return re.compile(pattern, re.IGNORECASE | re.DOTALL)
+    except Exception:
+        return None
@@ -0,0 +1,327 @@
+"""SpiderFoot database dialects.
+
+SpiderFootDb queries are written once, in SQLite's dialect with ? for
+parameters. The PostgreSQL dialect translates them, and provides the SQL
+for the few operations which have no common syntax, so that the same
+SpiderFootDb methods work on either back-end.
+"""
+
+import functools
+import io
+import json
+import re
+
+import psycopg2.extras
+
+try:
+    import re._parser as _regexParser
+except ImportError:
+    import sre_parse as _regexParser
+
+
+class SpiderFootDbDialect:
+    """SQLite dialect, which queries are written in. Also the base for the
+    other dialects.
+
+    Methods which take a cursor expect the SpiderFootDb handle's cursor,
+    SpiderFootDb.dbh.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, regexPrefilter: bool = True) -> None:
+        """Initialize the dialect.
+
+        Args:
+            regexPrefilter (bool): narrow regular expression searches with
+                                   LIKE on text every match must contain,
+                                   where the back-end's regular expressions
+                                   are slow
+        """
+        self.regexPrefilter = regexPrefilter
+
+    def sql(self, qry: str) -> str:
+        """Translate a query to this dialect.
+
+        Args:
+            qry (str): query, with ? placeholders
+
+        Returns:
+            str: query
+        """
+        return qry
+
+    def like(self, column: str) -> str:
+        """Case-insensitive LIKE condition on a column.
+
+        Args:
+            column (str): column expression
+
+        Returns:
+            str: SQL condition, with a placeholder for the pattern
+        """
+        return f"{column} LIKE ?"
+
+    def regexp(self, column: str, pattern: str) -> tuple:
+        """Case-insensitive regular expression condition on a column,
+        matching from the start of the value.
+
+        REGEXP calls back into Python for every row, so where the pattern
+        has literal text which every match contains, rows without it are
+        ruled out with LIKE first.
+
+        Args:
+            column (str): column expression
+            pattern (str): regular expression
+
+        Returns:
+            tuple: SQL condition, query parameters
+        """
+        literal = _requiredLiteral(pattern) if self.regexPrefilter else ''
+        if not literal:
+            return f"{column} REGEXP ?", [pattern]
+
+        like = '%' + re.sub(r'([\\%_])', r'\\\1', literal) + '%'
+        return f"({column} LIKE ? ESCAPE '\\' AND {column} REGEXP ?)", [like, pattern]
+
+    def greatest(self, *exprs: str) -> str:
+        """Largest of several values in a row.
+
+        Args:
+            exprs (str): SQL expressions
+
+        Returns:
+            str: SQL expression
+        """
+        return f"MAX({', '.join(exprs)})"
+
+    def hourMinute(self, column: str) -> str:
+        """Time of day and day of the week of a timestamp column, as
+        "HH:MM D" where D is 0 for Sunday.
+
+        Args:
+            column (str): column of UNIX timestamps in seconds
+
+        Returns:
+            str: SQL expression
+        """
+        return f"STRFTIME('%H:%M %w', {column}, 'unixepoch')"
+
+    def listSql(self, values: list) -> tuple:
+        """SQL selecting each of a list of strings as a row, so that the
+        list can be passed as a single query parameter however long it is.
+
+        Args:
+            values (list): strings
+
+        Returns:
+            tuple: SQL, query parameter
+        """
+        return "SELECT value FROM json_each(?)", json.dumps(list(values))
+
+    def executeMany(self, cursor, qry: str, rows: list) -> None:
+        """Run a statement for each of a list of parameter rows.
+
+        Args:
+            cursor: database cursor
+            qry (str): statement, with ? placeholders
+            rows (list): query parameters for each run
+        """
+        cursor.executemany(qry, rows)
+
+    def insertRows(self, cursor, table: str, columns: list, rows: list) -> None:
+        """Insert rows into a table, as fast as the back-end allows.
+
+        Args:
+            cursor: database cursor
+            table (str): table name
+            columns (list): column names
+            rows (list): column values for each row
+        """
+        placeholders = ', '.join(['?'] * len(columns))
+        cursor.executemany(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", rows)
+
+    def vacuum(self, conn, cursor) -> bool:
+        """Reclaim unused space in the database.
+
+        A database in incremental auto-vacuum mode gives its free pages
+        back without being rewritten. Others are rewritten with VACUUM,
+        which also switches them to incremental auto-vacuum from then on.
+
+        Args:
+            conn: database connection
+            cursor: database cursor
+
+        Returns:
+            bool: the database was rewritten, which may renumber rowids
+        """
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] == 2:
+            # execute() would only free a single page; executescript()
+            # runs the pragma to completion
+            cursor.executescript("PRAGMA incremental_vacuum")
+            return False
+
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        cursor.execute("VACUUM")
+        conn.commit()
+        return True
+
+
+class SpiderFootPostgreSQLDialect(SpiderFootDbDialect):
+    """PostgreSQL dialect.
+
+    Multi-row inserts use execute_values(), and plain inserts of new rows
+    use COPY, rather than running one INSERT per row.
+    """
+
+    name = 'postgresql'
+
+    # rows per INSERT sent by executeMany()
+    pageSize = 1000
+
+    _valuesPattern = re.compile(r"VALUES\s*\(\s*%s(?:\s*,\s*%s)*\s*\)", re.IGNORECASE)
+
+    def sql(self, qry: str) -> str:
+        return _translate(qry)
+
+    def like(self, column: str) -> str:
+        return f"{column} ILIKE ?"
+
+    def regexp(self, column: str, pattern: str) -> tuple:
+        # REGEXP in SQLite is re.match(), so is anchored at the start
+        return f"{column} ~* ?", [f"^(?:{pattern})"]
+
+    def greatest(self, *exprs: str) -> str:
+        return f"GREATEST({', '.join(exprs)})"
+
+    def hourMinute(self, column: str) -> str:
+        timestamp = f"(TO_TIMESTAMP({column}) AT TIME ZONE 'UTC')"
+        return f"TO_CHAR({timestamp}, 'HH24:MI ') || EXTRACT(DOW FROM {timestamp})::INT"
+
+    def listSql(self, values: list) -> tuple:
+        return "SELECT unnest(?::text[])", list(values)
+
+    def executeMany(self, cursor, qry: str, rows: list) -> None:
+        # send many rows per INSERT rather than one statement per row
+        values, count = self._valuesPattern.subn("VALUES %s", _translate(qry), count=1)
+        if not count:
+            cursor.executemany(qry, rows)
+            return
+        psycopg2.extras.execute_values(cursor.cursor, values, rows, page_size=self.pageSize)
+
+    def insertRows(self, cursor, table: str, columns: list, rows: list) -> None:
+        buf = io.StringIO()
+        for row in rows:
+            buf.write('\t'.join(_copyValue(value) for value in row))
+            buf.write('\n')
+        buf.seek(0)
+        cursor.cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+
+    def vacuum(self, conn, cursor) -> bool:
+        # VACUUM can't run inside the transaction psycopg2 opens for queries
+        conn.commit()
+        autocommit = conn.autocommit
+        conn.autocommit = True
+        try:
+            cursor.execute("VACUUM")
+        finally:
+            conn.autocommit = autocommit
+        return False
+
+
+class SpiderFootDbCursor:
+    """Cursor which translates the queries run on it to a dialect, for the
+    back-ends whose placeholders differ from SQLite's.
+
+    Attributes:
+        cursor: the back-end's own cursor
+        dialect (SpiderFootDbDialect): dialect queries are translated to
+    """
+
+    def __init__(self, cursor, dialect: SpiderFootDbDialect) -> None:
+        self.cursor = cursor
+        self.dialect = dialect
+
+    def __getattr__(self, name: str):
+        return getattr(self.cursor, name)
+
+    def __iter__(self):
+        return iter(self.cursor)
+
+    def execute(self, qry: str, params=None):
+        """Run a query.
+
+        Args:
+            qry (str): query, with ? placeholders
+            params: query parameters
+        """
+        if params is None:
+            return self.cursor.execute(qry)
+        return self.cursor.execute(self.dialect.sql(qry), params)
+
+    def executemany(self, qry: str, rows: list):
+        """Run a query for each of a list of parameter rows.
+
+        Args:
+            qry (str): query, with ? placeholders
+            rows (list): query parameters for each run
+        """
+        return self.cursor.executemany(self.dialect.sql(qry), rows)
+
+
+@functools.lru_cache(maxsize=512)
+def _translate(qry: str) -> str:
+    # ? placeholders outside string literals become %s, and literal % signs
+    # are doubled so psycopg2 does not take them for placeholders
+    out = list()
+    quoted = False
+    for c in qry:
+        if c == "'":
+            quoted = not quoted
+        elif c == '%':
+            c = '%%'
+        elif c == '?' and not quoted:
+            c = '%s'
+        out.append(c)
+    return ''.join(out)
+
+
+# ASCII characters which also match non-ASCII characters when ignoring case
+# in Python, but not in SQLite's LIKE
+_foldedChars = frozenset('IiKkSs')
+
+
+@functools.lru_cache(maxsize=256)
+def _requiredLiteral(pattern: str) -> str:
+    # longest run of literal text outside repeats and alternatives, which
+    # every match must therefore contain
+    try:
+        parsed = _regexParser.parse(pattern, re.IGNORECASE | re.DOTALL)
+    except Exception:
+        return ''
+
+    runs = ['']
+
+    def walk(items) -> None:
+        run = ''
+        for op, av in items:
+            if op is _regexParser.LITERAL and av < 128 and chr(av) not in _foldedChars:
+                run += chr(av)
+                continue
+            runs.append(run)
+            run = ''
+            if op is _regexParser.SUBPATTERN:
+                walk(av[-1])
+        runs.append(run)
+
+    walk(parsed)
+    return max(runs, key=len)
+
+
+def _copyValue(value) -> str:
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
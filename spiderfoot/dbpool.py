@@ -0,0 +1,199 @@
+"""SpiderFoot database connection pool.
+
+Keeps open database handles for long-lived processes which serve many
+short requests, such as the web UI and the REST API, so that a request
+does not pay for opening a connection and checking the schema each time.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2.extensions
+
+from .db import SpiderFootDb
+
+
+class SpiderFootDbPool:
+    """A bounded pool of SpiderFootDb handles, for SQLite or PostgreSQL.
+
+    A handle is checked out with acquire() and must be given back with
+    release(). Any transaction left open is rolled back when a handle is
+    released, and a handle which has been idle for longer than maxIdle
+    seconds is checked before being handed out again, so that a broken
+    connection is replaced rather than returned to a caller.
+    """
+
+    def __init__(self, opts: dict, maxSize: int = 10, timeout: float = 30,
+                 maxIdle: float = 60, factory=None) -> None:
+        """Initialize the pool. No connections are opened until needed.
+
+        Args:
+            opts (dict): SpiderFoot configuration
+            maxSize (int): maximum number of open handles
+            timeout (float): seconds acquire() waits for a handle to be released
+            maxIdle (float): seconds a handle may be idle before it is checked
+            factory: function which creates a new handle (default: SpiderFootDb(opts))
+        """
+        self.log = logging.getLogger(f"spiderfoot.{__name__}")
+        self.opts = opts
+        self.maxSize = max(int(maxSize), 1)
+        self.timeout = timeout
+        self.maxIdle = maxIdle
+        self._factory = factory
+        self._idle = list()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Number of open handles, in use or idle.
+
+        Returns:
+            int: number of handles
+        """
+        with self._cond:
+            return self._size
+
+    @property
+    def idle(self) -> int:
+        """Number of open handles waiting to be acquired.
+
+        Returns:
+            int: number of handles
+        """
+        with self._cond:
+            return len(self._idle)
+
+    def acquire(self) -> SpiderFootDb:
+        """Check out a database handle, opening a new one if none are idle
+        and the pool is not full.
+
+        Returns:
+            SpiderFootDb: database handle
+
+        Raises:
+            IOError: no handle became available within the timeout, or the
+                     database could not be opened
+        """
+        deadline = time.monotonic() + self.timeout
+        dbh = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise IOError("Database connection pool is closed")
+                if self._idle:
+                    # most recently used first, so that surplus handles age out
+                    dbh, released = self._idle.pop()
+                    break
+                if self._size < self.maxSize:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise IOError(f"Timed out waiting for a database connection ({self.maxSize} in use)")
+                self._cond.wait(remaining)
+
+        if dbh is not None:
+            if time.monotonic() - released < self.maxIdle or self._healthy(dbh):
+                return dbh
+            self.log.debug("Replacing broken database connection")
+            self._close(dbh)
+
+        try:
+            return self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, dbh: SpiderFootDb, discard: bool = False) -> None:
+        """Return a handle to the pool.
+
+        Args:
+            dbh (SpiderFootDb): database handle, from acquire()
+            discard (bool): close the handle rather than keep it
+        """
+        if not discard and not self._reset(dbh):
+            discard = True
+
+        with self._cond:
+            if discard or self._closed:
+                self._size -= 1
+            else:
+                self._idle.append((dbh, time.monotonic()))
+                dbh = None
+            self._cond.notify()
+
+        if dbh is not None:
+            self._close(dbh)
+
+    @contextmanager
+    def connection(self):
+        """Check out a handle for the duration of a with block.
+
+        Yields:
+            SpiderFootDb: database handle
+        """
+        dbh = self.acquire()
+        try:
+            yield dbh
+        finally:
+            self.release(dbh)
+
+    def close(self) -> None:
+        """Close the idle handles, and the others as they are released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, list()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for dbh, _ in idle:
+            self._close(dbh)
+
+    def _connect(self) -> SpiderFootDb:
+        if self._factory is not None:
+            return self._factory()
+        return SpiderFootDb(self.opts)
+
+    @staticmethod
+    def _healthy(dbh: SpiderFootDb) -> bool:
+        try:
+            with dbh.dbhLock:
+                dbh.dbh.execute('SELECT 1')
+                dbh.dbh.fetchall()
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _reset(dbh: SpiderFootDb) -> bool:
+        # roll back whatever the last user left uncommitted, so that it is
+        # neither committed by the next user nor holds locks in the meantime
+        conn = getattr(dbh, 'conn', None)
+        if conn is None:
+            return False
+
+        try:
+            with dbh.dbhLock:
+                if dbh.db_type == 'sqlite':
+                    if conn.in_transaction:
+                        conn.rollback()
+                elif conn.closed:
+                    return False
+                elif conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _close(self, dbh: SpiderFootDb) -> None:
+        try:
+            dbh.close()
+        except Exception as e:
+            self.log.debug(f"Error closing database connection: {e}")
@@ -10,6 +10,7 @@
 # Licence:     MIT
 # -------------------------------------------------------------------------------
 
+import copy
 import hashlib
 import random
 import time
@@ -33,6 +34,8 @@ class SpiderFootEvent:
         hash (str): Unique SHA256 hash of the event, or "ROOT"
         moduleDataSource (str): Module data source
         actualSource (str): Source data of parent event
+        frozen (bool): Event is read-only and may be shared between modules
+        storeOnly (bool): Event repeats an element already reported in the scan, so is only stored
         __id (str): Unique ID of the event, generated using eventType, generated, module, and a random integer
     """
 
@@ -47,6 +50,8 @@ class SpiderFootEvent:
     _sourceEventHash = None
     _moduleDataSource = None
     _actualSource = None
+    _frozen = False
+    _storeOnly = False
     __id = None
 
     def __init__(self, eventType: str, data: str, module: str, sourceEvent: Optional['SpiderFootEvent'] = None) -> None:
@@ -167,6 +172,24 @@ class SpiderFootEvent:
         """
         return self._moduleDataSource
 
+    @property
+    def frozen(self) -> bool:
+        """Whether the event is read-only.
+
+        Returns:
+            bool: event is read-only
+        """
+        return self._frozen
+
+    @property
+    def storeOnly(self) -> bool:
+        """Whether the event is only passed to storage modules.
+
+        Returns:
+            bool: event is only stored
+        """
+        return self._storeOnly
+
     @property
     def hash(self) -> str:
         """Unique SHA256 hash of the event, or "ROOT".
@@ -191,6 +214,8 @@ class SpiderFootEvent:
             TypeError: confidence type was invalid
             ValueError: confidence value was invalid
         """
+        self._checkWritable()
+
         if not isinstance(eventType, str):
             raise TypeError(f"eventType is {type(eventType)}; expected str()")
 
@@ -210,6 +235,8 @@ class SpiderFootEvent:
             TypeError: confidence type was invalid
             ValueError: confidence value was invalid
         """
+        self._checkWritable()
+
         if not isinstance(confidence, int):
             raise TypeError(
                 f"confidence is {type(confidence)}; expected int()")
@@ -231,6 +258,8 @@ class SpiderFootEvent:
             TypeError: visibility type was invalid
             ValueError: visibility value was invalid
         """
+        self._checkWritable()
+
         if not isinstance(visibility, int):
             raise TypeError(
                 f"visibility is {type(visibility)}; expected int()")
@@ -252,6 +281,8 @@ class SpiderFootEvent:
             TypeError: risk type was invalid
             ValueError: risk value was invalid
         """
+        self._checkWritable()
+
         if not isinstance(risk, int):
             raise TypeError(f"risk is {type(risk)}; expected int()")
 
@@ -271,6 +302,8 @@ class SpiderFootEvent:
             TypeError: module type was invalid
             ValueError: module value was invalid
         """
+        self._checkWritable()
+
         if not isinstance(module, str):
             raise TypeError(f"module is {type(module )}; expected str()")
 
@@ -288,6 +321,8 @@ class SpiderFootEvent:
             TypeError: data type was invalid
             ValueError: data value was invalid
         """
+        self._checkWritable()
+
         if not isinstance(data, str):
             raise TypeError(f"data is {type(data)}; expected str()")
 
@@ -306,6 +341,8 @@ class SpiderFootEvent:
         Raises:
             TypeError: sourceEvent type was invalid
         """
+        self._checkWritable()
+
         # "ROOT" is a special "hash" reserved for elements with no parent,
         # such as targets provided via the web UI or CLI.
         if self.eventType == "ROOT":
@@ -333,6 +370,8 @@ class SpiderFootEvent:
         Args:
             actualSource (str): actual source
         """
+        self._checkWritable()
+
         self._actualSource = actualSource
 
     @moduleDataSource.setter
@@ -342,8 +381,55 @@ class SpiderFootEvent:
         Args:
             moduleDataSource (str): module data source
         """
+        self._checkWritable()
+
         self._moduleDataSource = moduleDataSource
 
+    @storeOnly.setter
+    def storeOnly(self, storeOnly: bool) -> None:
+        """Whether the event is only passed to storage modules.
+
+        Args:
+            storeOnly (bool): event is only stored
+        """
+        self._checkWritable()
+
+        self._storeOnly = storeOnly
+
+    def _checkWritable(self) -> None:
+        """Refuse to modify a frozen event.
+
+        Raises:
+            AttributeError: event is frozen
+        """
+        if self._frozen:
+            raise AttributeError(
+                f"{self.eventType} event is read-only; use copy() to obtain a mutable copy")
+
+    def freeze(self) -> 'SpiderFootEvent':
+        """Make the event read-only, so that a single instance can be
+        handed to every subscribed module instead of a copy per module.
+
+        Returns:
+            SpiderFootEvent: this event
+        """
+        self._frozen = True
+        return self
+
+    def copy(self) -> 'SpiderFootEvent':
+        """Mutable shallow copy of the event.
+
+        The copy shares the data payload and the source event chain with the
+        original, so the cost does not depend on the size of the data or
+        the depth of the chain. The copy keeps the hash of the original.
+
+        Returns:
+            SpiderFootEvent: mutable copy of this event
+        """
+        evt = copy.copy(self)
+        evt._frozen = False
+        return evt
+
     def asDict(self) -> dict:
         """Event object as dictionary.
 
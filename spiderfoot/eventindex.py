@@ -0,0 +1,224 @@
+"""SpiderFoot scan event index.
+
+Records every event produced during a scan, keyed by event type and
+case-insensitive data, so that modules can tell whether an element has
+already been reported further up an event's chain of source events
+without comparing the data of every event in the chain.
+
+Also tracks the events delivered to each module which only wants events
+with data it has not seen before, so that the scan can skip delivering the
+rest.
+"""
+
+import hashlib
+import ipaddress
+import threading
+
+from .event import SpiderFootEvent
+
+
+class SpiderFootEventIndex:
+    """Index of the events produced during a scan, shared by all of the
+    scan's modules.
+
+    Only a digest of each event's data is kept, so the index stays small
+    even for large events such as web content.
+    """
+
+    # no event with this type and data further up the chain of source events
+    NEW = 0
+    # an ancestor of the event, above its own source, has this type and data
+    REPEAT = 1
+    # the same module has already produced this type and data from the same source event
+    DUPLICATE = 2
+
+    def __init__(self) -> None:
+        # sequence number and hash of the first event with each key
+        self._first = dict()
+        # key and sequence number of each event recorded, by hash
+        self._events = dict()
+        self._emitted = set()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._first)
+
+    @staticmethod
+    def _key(eventType: str, data: str) -> tuple:
+        digest = hashlib.blake2b(
+            data.lower().encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        return (eventType, digest)
+
+    def classify(self, sfEvent: SpiderFootEvent) -> int:
+        """Record an event, and report whether its type and data repeat an
+        element reported further up its chain of source events.
+
+        As in the chain walk this replaces, the event's own source is not
+        compared, only the source's ancestors. Events with the same type
+        and data elsewhere in the scan are NEW.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+
+        Returns:
+            int: NEW, REPEAT or DUPLICATE
+        """
+        if sfEvent.eventType == 'ROOT':
+            return self.NEW
+
+        key = self._key(sfEvent.eventType, sfEvent.data)
+        emission = (sfEvent.module, sfEvent.sourceEventHash, key)
+        eventHash = sfEvent.hash
+
+        with self._lock:
+            if emission in self._emitted:
+                return self.DUPLICATE
+            self._emitted.add(emission)
+
+            seq = len(self._events)
+            self._events.setdefault(eventHash, (key, seq))
+            first = self._first.get(key)
+            if first is None:
+                # nothing earlier has this key, so no ancestor can
+                self._first[key] = (seq, eventHash)
+                return self.NEW
+
+            if self._inChain(sfEvent, key, first[0]):
+                return self.REPEAT
+            return self.NEW
+
+    def _inChain(self, sfEvent: SpiderFootEvent, key: tuple, firstSeq: int) -> bool:
+        # must be called with self._lock held
+        source = sfEvent.sourceEvent
+        ancestor = source.sourceEvent if source is not None else None
+        while ancestor is not None:
+            recorded = self._events.get(ancestor.hash)
+            if recorded is None:
+                # not produced by a module, e.g. the scan's ROOT event
+                if ancestor.eventType == sfEvent.eventType and ancestor.data.lower() == sfEvent.data.lower():
+                    return True
+            elif recorded[0] == key:
+                return True
+            elif recorded[1] < firstSeq:
+                # ancestors are recorded before their descendants, so none
+                # further up can have been recorded with this key
+                return False
+            ancestor = ancestor.sourceEvent
+        return False
+
+    def first(self, eventType: str, data: str) -> str:
+        """Hash of the first event with the specified type and data.
+
+        Args:
+            eventType (str): event type
+            data (str): event data (case-insensitive)
+
+        Returns:
+            str: event hash, or None if no such event has been recorded
+        """
+        key = self._key(eventType, data)
+        with self._lock:
+            first = self._first.get(key)
+        return first[1] if first else None
+
+
+class SpiderFootEventDedup:
+    """Tracks which events the scan has delivered to each module which sets
+    SpiderFootPlugin._uniqueEvents, so that events with data the module has
+    already been given are not put on its queue at all.
+
+    Event data is compared in canonical form, so that, for example,
+    "Example.com." and "example.com" are the same host name.
+
+    Only used by the scan's event dispatch loop, so is not thread-safe.
+    """
+
+    _hostTypes = frozenset([
+        'INTERNET_NAME', 'INTERNET_NAME_UNRESOLVED', 'DOMAIN_NAME', 'DOMAIN_NAME_PARENT',
+        'AFFILIATE_INTERNET_NAME', 'AFFILIATE_INTERNET_NAME_UNRESOLVED', 'AFFILIATE_DOMAIN_NAME',
+        'CO_HOSTED_SITE', 'CO_HOSTED_SITE_DOMAIN', 'SIMILARDOMAIN',
+        'PROVIDER_DNS', 'PROVIDER_MAIL'
+    ])
+    _addressTypes = frozenset([
+        'IP_ADDRESS', 'IPV6_ADDRESS', 'AFFILIATE_IPADDR', 'AFFILIATE_IPV6_ADDRESS'
+    ])
+    _networkTypes = frozenset([
+        'NETBLOCK_OWNER', 'NETBLOCK_MEMBER', 'NETBLOCKV6_OWNER', 'NETBLOCKV6_MEMBER'
+    ])
+
+    def __init__(self) -> None:
+        self._delivered = dict()
+
+    @classmethod
+    def canonical(cls, eventType: str, data: str) -> str:
+        """Canonical form of event data.
+
+        Args:
+            eventType (str): event type
+            data (str): event data
+
+        Returns:
+            str: canonical event data
+        """
+        if eventType in cls._hostTypes:
+            return data.strip().rstrip('.').lower()
+
+        try:
+            if eventType in cls._addressTypes:
+                return str(ipaddress.ip_address(data.strip()))
+            if eventType in cls._networkTypes:
+                return str(ipaddress.ip_network(data.strip(), strict=False))
+        except ValueError:
+            pass
+
+        return data
+
+    @classmethod
+    def key(cls, sfEvent: SpiderFootEvent) -> bytes:
+        """Key identifying the event's type and canonical data.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+
+        Returns:
+            bytes: key
+        """
+        digest = hashlib.blake2b(sfEvent.eventType.encode('utf-8'), digest_size=16)
+        digest.update(b'\0')
+        digest.update(cls.canonical(sfEvent.eventType, sfEvent.data).encode('utf-8', 'surrogatepass'))
+        return digest.digest()
+
+    @staticmethod
+    def wantsUnique(mod, eventType: str) -> bool:
+        """Whether a module only wants the first event with given data for
+        the event type.
+
+        Args:
+            mod (SpiderFootPlugin): module
+            eventType (str): event type
+
+        Returns:
+            bool: module wants unique events of this type
+        """
+        unique = getattr(mod, '_uniqueEvents', False)
+        if unique is True:
+            return True
+        return bool(unique) and eventType in unique
+
+    def firstDelivery(self, modName: str, key: bytes) -> bool:
+        """Record the delivery of an event to a module.
+
+        Args:
+            modName (str): module name
+            key (bytes): event key, from key()
+
+        Returns:
+            bool: the module has not been given an event with this key before
+        """
+        delivered = self._delivered.get(modName)
+        if delivered is None:
+            delivered = self._delivered[modName] = set()
+        if key in delivered:
+            return False
+        delivered.add(key)
+        return True
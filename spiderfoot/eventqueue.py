@@ -0,0 +1,204 @@
+"""SpiderFoot scan event queues.
+
+Event queues which keep count of the events in flight in a scan, so that
+the scanner can block until there is work to do instead of polling, and
+can tell when the scan has gone idle without inspecting every module.
+Module queues can also hold a bounded number of events in memory and spill
+the rest to disk.
+"""
+
+import pickle
+import queue
+import tempfile
+import threading
+from collections import deque
+
+from .event import SpiderFootEvent
+
+
+class SpiderFootScanActivity:
+    """Count of events queued or being handled across all of a scan's event
+    queues.
+
+    Every put() on a SpiderFootEventQueue increments the count and every
+    task_done() decrements it. A consumer calls task_done() only once it
+    has finished handling an item, after any events produced while handling
+    it have been queued, so the count only drops to zero once the scan has
+    nothing left to do.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._inFlight = 0
+
+    @property
+    def inFlight(self) -> int:
+        """Number of events queued or being handled.
+
+        Returns:
+            int: events in flight
+        """
+        return self._inFlight
+
+    def started(self) -> None:
+        """An event is about to be queued.
+
+        The count is raised before the event is put, so the scan can't be
+        seen to go idle in between, but waiters are only woken by queued(),
+        once the event can be taken off the queue.
+        """
+        with self._cond:
+            self._inFlight += 1
+
+    def queued(self) -> None:
+        """An event counted by started() was put on its queue."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def finished(self) -> None:
+        """An event was handled."""
+        with self._cond:
+            self._inFlight -= 1
+            if self._inFlight <= 0:
+                self._inFlight = 0
+                self._cond.notify_all()
+
+    def wait(self, q: queue.Queue, timeout: float = None) -> bool:
+        """Block until an item is available on the specified queue or the
+        scan has gone idle.
+
+        Args:
+            q (queue.Queue): queue to watch for items
+            timeout (float): maximum number of seconds to wait
+
+        Returns:
+            bool: True if the queue has items or the scan is idle, False on timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self._inFlight == 0 or q.qsize() > 0, timeout)
+
+
+class SpiderFootEventQueue(queue.Queue):
+    """A queue.Queue which reports items put on it and items marked done
+    to the scan's SpiderFootScanActivity.
+
+    Consumers must call task_done() once for each item retrieved, when they
+    have finished with it.
+
+    If spillsize is set, only that many items are held in memory. Further
+    items are written to a temporary overflow file, and read back in order
+    as the consumer catches up. put() never blocks on a spilling queue.
+    Spilled events keep a reference to their source event in memory, but
+    not their data.
+    """
+
+    def __init__(self, activity: SpiderFootScanActivity, maxsize: int = 0, spillsize: int = 0) -> None:
+        """Initialize the queue.
+
+        Args:
+            activity (SpiderFootScanActivity): scan activity tracker
+            maxsize (int): maximum queue size, put() blocks when full (0 = unbounded)
+            spillsize (int): maximum number of items held in memory before spilling to disk (0 = never spill)
+        """
+        self.spillsize = max(int(spillsize or 0), 0)
+        self._spillFile = None
+        self._spillReadPos = 0
+        self._spilled = deque()
+        super().__init__(0 if self.spillsize else maxsize)
+        self.activity = activity
+
+    @property
+    def spilled(self) -> int:
+        """Number of items currently held on disk.
+
+        Returns:
+            int: spilled items
+        """
+        return len(self._spilled)
+
+    # The following are called by queue.Queue with self.mutex held.
+
+    def _qsize(self) -> int:
+        return len(self.queue) + len(self._spilled)
+
+    def _put(self, item) -> None:
+        # once anything has been spilled, later items must follow it to disk
+        # to preserve ordering
+        if not self.spillsize or (len(self.queue) < self.spillsize and not self._spilled):
+            self.queue.append(item)
+            return
+        self._spill(item)
+
+    def _get(self):
+        item = self.queue.popleft()
+        while self._spilled and len(self.queue) < self.spillsize:
+            self.queue.append(self._unspill())
+        return item
+
+    def _spill(self, item) -> None:
+        if self._spillFile is None:
+            self._spillFile = tempfile.TemporaryFile(prefix='sf_queue_')
+
+        sourceEvent = None
+        if isinstance(item, SpiderFootEvent):
+            state = dict(vars(item))
+            sourceEvent = state.pop('_sourceEvent', None)
+            record = (True, state)
+        else:
+            record = (False, item)
+
+        self._spillFile.seek(0, 2)
+        pickle.dump(record, self._spillFile, pickle.HIGHEST_PROTOCOL)
+        self._spilled.append(sourceEvent)
+
+    def _unspill(self):
+        sourceEvent = self._spilled.popleft()
+        self._spillFile.seek(self._spillReadPos)
+        isEvent, item = pickle.load(self._spillFile)  # noqa: DUO103,S301
+        self._spillReadPos = self._spillFile.tell()
+
+        if not self._spilled:
+            # reclaim disk space once the overflow has been drained
+            self._spillFile.seek(0)
+            self._spillFile.truncate()
+            self._spillReadPos = 0
+
+        if not isEvent:
+            return item
+
+        evt = SpiderFootEvent.__new__(SpiderFootEvent)
+        evt.__dict__.update(item)
+        evt._sourceEvent = sourceEvent
+        return evt
+
+    def put(self, item, block: bool = True, timeout: float = None) -> None:
+        self.activity.started()
+        try:
+            super().put(item, block, timeout)
+        except queue.Full:
+            self.activity.finished()
+            raise
+        self.activity.queued()
+
+    def task_done(self) -> None:
+        super().task_done()
+        self.activity.finished()
+
+    def clear(self) -> None:
+        """Discard all queued items, marking each of them done."""
+        while True:
+            try:
+                self.get_nowait()
+            except queue.Empty:
+                return
+            self.task_done()
+
+    def close(self) -> None:
+        """Discard the overflow file, if any."""
+        with self.mutex:
+            if self._spillFile is not None:
+                self._spillFile.close()
+                self._spillFile = None
+            self._spilled.clear()
+            self._spillReadPos = 0
@@ -0,0 +1,167 @@
+"""SpiderFoot scan event writer.
+
+Stores scan events in the database in batches, so that a busy scan pays
+for one transaction per batch rather than one per event.
+"""
+
+import logging
+import threading
+import time
+
+
+class SpiderFootEventWriter:
+    """Group-commits scan events to the database from a background thread.
+
+    Events passed to store() are written with SpiderFootDb.scanEventStoreMany()
+    once batchSize events are waiting, or flushInterval seconds after the
+    oldest waiting event was stored, whichever comes first. flush() blocks
+    until every event stored so far has been written.
+
+    The database handle is used from the writer thread, so must not be tied
+    to the thread which created it.
+    """
+
+    # seconds the writer thread waits for events before exiting
+    idleTimeout = 30
+
+    def __init__(self, dbh, instanceId: str, truncateSize: int = 0, batchSize: int = 500,
+                 flushInterval: float = 1.0, name: str = 'eventWriter', fallback=None) -> None:
+        """Initialize the writer.
+
+        Args:
+            dbh (SpiderFootDb): database handle
+            instanceId (str): scan instance ID
+            truncateSize (int): truncate size for event data
+            batchSize (int): number of waiting events which triggers a write
+            flushInterval (float): seconds an event may wait before being written
+            name (str): name of the writer thread
+            fallback: function called, from the writer thread, with the list
+                      of events which could not be written, instead of
+                      flush() raising an IOError for them
+        """
+        self.log = logging.getLogger(f"spiderfoot.{__name__}")
+        self.dbh = dbh
+        self.instanceId = instanceId
+        self.truncateSize = truncateSize
+        self.batchSize = max(int(batchSize), 1)
+        self.flushInterval = flushInterval
+        self.name = name
+        self.fallback = fallback
+        # store() blocks when this many events are waiting, so that a slow
+        # database holds back the storage module rather than filling memory
+        self.maxPending = self.batchSize * 4
+        self._pending = list()
+        self._pendingSince = 0
+        self._writing = 0
+        self._flushRequested = False
+        self._error = None
+        self._thread = None
+        self._cond = threading.Condition()
+
+    @property
+    def pending(self) -> int:
+        """Number of events stored but not yet written.
+
+        Returns:
+            int: number of events
+        """
+        with self._cond:
+            return len(self._pending) + self._writing
+
+    def store(self, sfEvent) -> None:
+        """Queue an event to be written to the database.
+
+        Args:
+            sfEvent (SpiderFootEvent): event
+        """
+        with self._cond:
+            while len(self._pending) >= self.maxPending:
+                self._cond.wait()
+
+            if not self._pending:
+                self._pendingSince = time.monotonic()
+            self._pending.append(sfEvent)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            elif len(self._pending) == 1 or len(self._pending) >= self.batchSize:
+                self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Write all stored events to the database, and wait until they
+        have been written.
+
+        Raises:
+            IOError: database I/O failed for some of the events
+        """
+        with self._cond:
+            if self._pending or self._writing:
+                self._flushRequested = True
+                self._cond.notify_all()
+                while self._pending or self._writing:
+                    self._cond.wait()
+            error, self._error = self._error, None
+
+        if error is not None:
+            raise error
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    if not self._cond.wait(self.idleTimeout) and not self._pending:
+                        self._thread = None
+                        return
+
+                while not self._flushRequested and len(self._pending) < self.batchSize:
+                    remaining = self._pendingSince + self.flushInterval - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch, self._pending = self._pending, list()
+                self._writing = len(batch)
+                self._flushRequested = False
+                # wake store() calls waiting for room
+                self._cond.notify_all()
+
+            try:
+                self._write(batch)
+            finally:
+                with self._cond:
+                    self._writing = 0
+                    self._cond.notify_all()
+
+    def _write(self, batch: list) -> None:
+        try:
+            self.dbh.scanEventStoreMany(self.instanceId, batch, self.truncateSize)
+            return
+        except (TypeError, ValueError):
+            pass
+        except Exception as e:
+            self._failed(e, batch)
+            return
+
+        # an invalid event must not stop the rest of the batch being stored
+        for sfEvent in batch:
+            try:
+                self.dbh.scanEventStore(self.instanceId, sfEvent, self.truncateSize)
+            except (TypeError, ValueError) as e:
+                self.log.error(f"Invalid event not stored: {e}")
+            except Exception as e:
+                self._failed(e, [sfEvent])
+
+    def _failed(self, error: Exception, batch: list) -> None:
+        if self.fallback is not None:
+            self.log.warning(f"Failed to store {len(batch)} events, passing them to fallback: {error}")
+            try:
+                self.fallback(batch)
+                return
+            except Exception as e:
+                error = e
+
+        self.log.error(f"Failed to store {len(batch)} events: {error}")
+        with self._cond:
+            if self._error is None:
+                self._error = error if isinstance(error, IOError) else IOError(str(error))
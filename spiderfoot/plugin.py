@@ -10,18 +10,21 @@
 # Licence:     MIT
 # -------------------------------------------------------------------------------
 
+import asyncio
 from contextlib import suppress
+import inspect
 import io
 import logging
 import os
 import queue
 import sys
 import threading
-from time import sleep
 import traceback
 from typing import List, Dict, Any, Optional
 
 from spiderfoot import SpiderFootEvent, SpiderFootHelpers
+from .asyncloop import SpiderFootAsyncLoop
+from .eventindex import SpiderFootEventIndex
 from .threadpool import SpiderFootThreadPool
 
 # begin logging overrides
@@ -116,6 +119,21 @@ class SpiderFootPlugin:
     _thread = None
     running = False
     maxThreads = 10  # Default maximum threads for this module
+    maxQueueSize = 0  # Max events held in memory for this module (0 = use _maxqueuesize)
+    # Events are delivered to modules read-only and shared between them.
+    # Modules which modify the events they receive must set this to get
+    # their own copy of each event instead.
+    _mutatesEvents = False
+    # Modules which must run in the scan process, rather than in a worker
+    # process when _moduleprocesses is set, must set this to False.
+    _shardable = True
+    # Index of the events produced during the scan, shared by its modules
+    _eventIndex = None
+    # Modules which ignore events with data they have already handled (e.g.
+    # using self.results) set this, so that the scan does not deliver such
+    # events to them at all. True applies to every event type; a list of
+    # event types applies to those types only.
+    _uniqueEvents = False
     
     # Database and listeners
     _dbh = None
@@ -504,12 +522,24 @@ class SpiderFootPlugin:
         # from dest, as we are already operating on dest's original
         # notification from one of the upstream events.
 
-        prevEvent = sfEvent.sourceEvent
-        while prevEvent is not None:
-            if prevEvent.sourceEvent is not None and prevEvent.sourceEvent.eventType == sfEvent.eventType and prevEvent.sourceEvent.data.lower() == eventData.lower():
-                storeOnly = True
-                break
-            prevEvent = prevEvent.sourceEvent
+        if self._eventIndex is not None:
+            # The index only walks the chain when an earlier event in the
+            # scan has the same type and data, and a module reporting the
+            # same element from the same source twice is dropped outright.
+            seen = self._eventIndex.classify(sfEvent)
+            if seen == SpiderFootEventIndex.DUPLICATE:
+                return
+            storeOnly = seen == SpiderFootEventIndex.REPEAT
+        else:
+            prevEvent = sfEvent.sourceEvent
+            while prevEvent is not None:
+                if prevEvent.sourceEvent is not None and prevEvent.sourceEvent.eventType == sfEvent.eventType and prevEvent.sourceEvent.data.lower() == eventData.lower():
+                    storeOnly = True
+                    break
+                prevEvent = prevEvent.sourceEvent
+
+        if storeOnly and not sfEvent.frozen:
+            sfEvent.storeOnly = True
 
         # output to queue if applicable
         if self.outgoingEventQueue is not None:
@@ -675,20 +705,28 @@ class SpiderFootPlugin:
                     "Please set up queues before starting module as thread")
                 return
 
+            incomingEventQueue = self.incomingEventQueue
             while not self.checkForStop():
                 try:
-                    sfEvent = self.incomingEventQueue.get_nowait()
+                    # block until an event arrives, waking periodically to check for stop
+                    sfEvent = incomingEventQueue.get(timeout=1)
                 except queue.Empty:
-                    sleep(.3)
                     continue
                 if sfEvent == 'FINISHED':
                     self.sf.debug(
                         f"{getattr(self, '__name__', self.__class__.__name__)}.threadWorker() got \"FINISHED\" from incomingEventQueue.")
-                    self.poolExecute(self.finish)
+                    self.poolExecute(self.processQueuedItem, incomingEventQueue, self.finish)
                 else:
                     self.sf.debug(
                         f"{getattr(self, '__name__', self.__class__.__name__)}.threadWorker() got event, {sfEvent.eventType}, from incomingEventQueue.")
-                    self.poolExecute(self.handleEvent, sfEvent)
+                    self.poolExecute(self.processQueuedItem, incomingEventQueue, self.handleEvent, sfEvent)
+
+            # events left behind by a module in errorState will never be handled
+            if self.errorState:
+                with suppress(Exception):
+                    while 1:
+                        incomingEventQueue.get_nowait()
+                        incomingEventQueue.task_done()
         except KeyboardInterrupt:
             self.sf.debug(f"Interrupted module {getattr(self, '__name__', self.__class__.__name__)}.")
             self._stopScanning = True
@@ -706,10 +744,27 @@ class SpiderFootPlugin:
                 with suppress(queue.Empty):
                     while 1:
                         self.incomingEventQueue.get_nowait()
+                        self.incomingEventQueue.task_done()
                 # set queue to None to prevent its use
                 # if there are leftover objects in the queue, the scan will hang.
                 self.incomingEventQueue = None
 
+    def processQueuedItem(self, incomingEventQueue, callback, *args) -> None:
+        """Call the callback for an item retrieved from the incoming event
+        queue, then mark the item done so the scanner can tell when all
+        events have been handled.
+
+        Args:
+            incomingEventQueue (queue.Queue): queue the item was retrieved from
+            callback: function to call
+            args: args (passed through to callback)
+        """
+        try:
+            callback(*args)
+        finally:
+            with suppress(ValueError):
+                incomingEventQueue.task_done()
+
     def poolExecute(self, callback, *args, **kwargs) -> None:
         """Execute a callback with the given args. If we're in a storage
         module, execute normally. Otherwise, use the shared thread pool.
@@ -731,4 +786,129 @@ class SpiderFootPlugin:
     def setSharedThreadPool(self, sharedThreadPool) -> None:
         self.sharedThreadPool = sharedThreadPool
 
+    def setEventIndex(self, eventIndex: SpiderFootEventIndex) -> None:
+        """Share the scan's event index, which is used to detect events
+        repeating elements already reported in the scan.
+
+        Args:
+            eventIndex (SpiderFootEventIndex): scan event index
+        """
+        self._eventIndex = eventIndex
+
 # end of SpiderFootPlugin class
+
+
+class SpiderFootAsyncPlugin(SpiderFootPlugin):
+    """Base class for I/O-bound SpiderFoot modules which handle events as
+    coroutines on the scan's shared asyncio event loop, rather than each
+    occupying a thread from the shared thread pool.
+
+    handleEvent() and finish() may be declared with async def. They should
+    use await self.sf.fetchUrlAsync() in place of self.sf.fetchUrl(), and
+    asyncExecute() for any other blocking calls, so as not to hold up the
+    other modules on the loop.
+
+    maxThreads limits the number of events this module handles concurrently.
+    """
+
+    maxThreads = 100
+    sharedAsyncLoop = None
+
+    def __init__(self):
+        """Initialize the plugin."""
+        super().__init__()
+        self._asyncLock = threading.Lock()
+        self._asyncInFlight = 0
+        self._asyncSlots = None
+
+    def setSharedAsyncLoop(self, sharedAsyncLoop: SpiderFootAsyncLoop) -> None:
+        """Set the event loop on which events are handled.
+
+        Args:
+            sharedAsyncLoop (SpiderFootAsyncLoop): shared event loop
+        """
+        self.sharedAsyncLoop = sharedAsyncLoop
+
+    @property
+    def running(self) -> bool:
+        """Indicates whether the module is currently processing data.
+
+        Returns:
+            bool: True if the module is currently processing data.
+        """
+        return self._asyncInFlight > 0
+
+    def poolExecute(self, callback, *args, **kwargs) -> None:
+        """Schedule a callback with the given args on the shared event loop.
+        Blocks while the module already has maxThreads callbacks in flight.
+
+        Args:
+            callback: function or coroutine function to call
+            args: args (passed through to callback)
+            kwargs: kwargs (passed through to callback)
+        """
+        if self.sharedAsyncLoop is None:
+            self.sharedAsyncLoop = SpiderFootAsyncLoop(
+                name=f"{getattr(self, '__name__', self.__class__.__name__)}_asyncLoop")
+
+        with self._asyncLock:
+            if self._asyncSlots is None:
+                self._asyncSlots = threading.BoundedSemaphore(max(int(self.maxThreads), 1))
+
+        self._asyncSlots.acquire()
+        with self._asyncLock:
+            self._asyncInFlight += 1
+
+        try:
+            self.sharedAsyncLoop.submit(self._runAsync(callback, *args, **kwargs))
+        except Exception:
+            self._asyncDone()
+            raise
+
+    def _asyncDone(self) -> None:
+        with self._asyncLock:
+            self._asyncInFlight -= 1
+        self._asyncSlots.release()
+
+    async def _runAsync(self, callback, *args, **kwargs) -> None:
+        try:
+            result = callback(*args, **kwargs)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            self.sf.error(f"Exception ({e.__class__.__name__}) in module {getattr(self, '__name__', self.__class__.__name__)}." +
+                          traceback.format_exc())
+        finally:
+            self._asyncDone()
+
+    async def processQueuedItem(self, incomingEventQueue, callback, *args) -> None:
+        """Await the callback for an item retrieved from the incoming event
+        queue, then mark the item done.
+
+        Args:
+            incomingEventQueue (queue.Queue): queue the item was retrieved from
+            callback: function or coroutine function to call
+            args: args (passed through to callback)
+        """
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+        finally:
+            with suppress(ValueError):
+                incomingEventQueue.task_done()
+
+    async def asyncExecute(self, func, *args):
+        """Run a blocking function in the default executor without blocking
+        the event loop.
+
+        Args:
+            func: function to call
+            args: args (passed through to func)
+
+        Returns:
+            result of func
+        """
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+# end of SpiderFootAsyncPlugin class
@@ -0,0 +1,544 @@
+"""SpiderFoot module shards.
+
+Runs groups of a scan's modules in separate worker processes, so that
+CPU-bound modules are not all confined to the scan process's GIL.
+
+In the scan process, each module placed in a shard is represented by a
+SpiderFootModuleProxy, which the scanner treats like any other module.
+The proxy forwards the events it is sent to the worker process, and the
+events the module produces are fed back into the scan's event queue.
+Storage modules always remain in the scan process.
+
+Events cross the process boundary once in each direction: each side keeps
+the events it has exchanged with the other, keyed by hash, and an event is
+sent with only those of its source events the other side does not already
+hold. Both sides keep the exchanged events for the duration of the scan.
+"""
+
+import logging
+import logging.handlers
+import os
+import queue
+import socket
+import subprocess  # noqa: S404
+import sys
+import threading
+import traceback
+from contextlib import suppress
+from multiprocessing.connection import Connection
+
+from .event import SpiderFootEvent
+from .eventindex import SpiderFootEventIndex
+from .plugin import SpiderFootPlugin
+
+
+def _eventStates(event: SpiderFootEvent, known: dict) -> list:
+    """Serialise an event, and any of its source events the other side does
+    not hold yet, oldest first.
+
+    Args:
+        event (SpiderFootEvent): event
+        known (dict): events held by both sides, by hash (updated)
+
+    Returns:
+        list: event attribute dicts
+    """
+    chain = []
+    while event is not None and event.hash not in known:
+        chain.append(event)
+        event = event.sourceEvent
+
+    states = []
+    for evt in reversed(chain):
+        known[evt.hash] = evt
+        state = dict(vars(evt))
+        state.pop('_sourceEvent', None)
+        states.append(state)
+    return states
+
+
+def _restoreEvents(states: list, known: dict) -> SpiderFootEvent:
+    """Rebuild events serialised by _eventStates().
+
+    Args:
+        states (list): event attribute dicts, oldest first
+        known (dict): events held by both sides, by hash (updated)
+
+    Returns:
+        SpiderFootEvent: the last event
+    """
+    evt = None
+    for state in states:
+        evt = SpiderFootEvent.__new__(SpiderFootEvent)
+        evt.__dict__.update(state)
+        if evt.eventType != 'ROOT':
+            evt._sourceEvent = known.get(evt.sourceEventHash)
+        known[evt.hash] = evt
+    return evt
+
+
+class SpiderFootModuleShard:
+    """A worker process running a group of a scan's modules."""
+
+    def __init__(self, name: str = "") -> None:
+        """Initialize the shard.
+
+        Args:
+            name (str): name of the shard, for logging
+        """
+        self.name = name or "SpiderFootModuleShard"
+        self.log = logging.getLogger(f"spiderfoot.{__name__}")
+        self.alive = False
+        self.proxies = dict()
+        self._conn = None
+        self._proc = None
+        self._reader = None
+        self._lock = threading.Lock()
+        # events exchanged with the worker process, by hash
+        self._events = dict()
+
+    def start(self, config: dict, scanId: str, target, socksProxy: str, modules: dict, timeout: float = 60) -> dict:
+        """Start the worker process and set up the modules in it.
+
+        Args:
+            config (dict): scan configuration
+            scanId (str): scan instance ID
+            target (SpiderFootTarget): scan target
+            socksProxy (str): proxy used by the scan
+            modules (dict): module configuration, by module name
+            timeout (float): seconds to wait for the modules to be set up
+
+        Returns:
+            dict: whether each module was set up successfully, by module name, or None if the worker could not be started
+        """
+        if os.name == 'nt':
+            self.log.error("Running modules in worker processes is not supported on this platform")
+            return None
+
+        parentSock, childSock = socket.socketpair()
+        try:
+            env = dict(os.environ)
+            env['PYTHONPATH'] = os.pathsep.join([p for p in sys.path if isinstance(p, str) and p])
+            self._proc = subprocess.Popen(  # noqa: S603
+                [
+                    sys.executable, '-c',
+                    'import sys; from spiderfoot.shard import shardMain; shardMain(int(sys.argv[1]))',
+                    str(childSock.fileno())
+                ],
+                pass_fds=(childSock.fileno(),),
+                env=env
+            )
+        except Exception as e:
+            self.log.error(f"Failed to start worker process {self.name}: {e}")
+            parentSock.close()
+            return None
+        finally:
+            childSock.close()
+
+        self._conn = Connection(parentSock.detach())
+
+        try:
+            self._conn.send(('init', config, scanId, target, socksProxy, modules))
+            while True:
+                if not self._conn.poll(timeout):
+                    raise TimeoutError(f"no response after {timeout} seconds")
+                msg = self._conn.recv()
+                if msg[0] == 'log':
+                    self._handleLog(msg[1])
+                    continue
+                if msg[0] == 'ready':
+                    break
+        except Exception as e:
+            self.log.error(f"Worker process {self.name} failed to start: {e}")
+            self.shutdown()
+            return None
+
+        self.alive = True
+        return msg[1]
+
+    def attach(self, proxy: 'SpiderFootModuleProxy') -> None:
+        """Register the proxy for a module running in this shard.
+
+        Args:
+            proxy (SpiderFootModuleProxy): module proxy
+        """
+        self.proxies[proxy.__name__] = proxy
+
+    def run(self, eventQueue: queue.Queue, eventIndex: SpiderFootEventIndex = None) -> None:
+        """Start feeding events produced in the worker process into the scan.
+
+        Args:
+            eventQueue (queue.Queue): scan event queue
+            eventIndex (SpiderFootEventIndex): scan event index
+        """
+        self._reader = threading.Thread(
+            target=self._read, args=(eventQueue, eventIndex), name=f"{self.name}_reader", daemon=True)
+        self._reader.start()
+
+    def _read(self, eventQueue: queue.Queue, eventIndex: SpiderFootEventIndex) -> None:
+        try:
+            while True:
+                try:
+                    msg = self._conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                if msg[0] == 'emit':
+                    with self._lock:
+                        sfEvent = _restoreEvents(msg[1], self._events)
+                    # modules in the worker process do not share the scan's
+                    # event index, so their events are checked here
+                    if eventIndex is not None:
+                        seen = eventIndex.classify(sfEvent)
+                        if seen == SpiderFootEventIndex.DUPLICATE:
+                            continue
+                        if seen == SpiderFootEventIndex.REPEAT and not sfEvent.frozen:
+                            sfEvent.storeOnly = True
+                    # the scan may stop dispatching events while we wait
+                    while True:
+                        try:
+                            eventQueue.put(sfEvent, timeout=1)
+                            break
+                        except queue.Full:
+                            if not self.alive:
+                                break
+                elif msg[0] == 'done':
+                    proxy = self.proxies.get(msg[1])
+                    if proxy is not None:
+                        proxy.remoteDone(msg[2])
+                elif msg[0] == 'log':
+                    self._handleLog(msg[1])
+        except Exception:
+            self.log.error(f"Error reading from worker process {self.name}: {traceback.format_exc()}")
+        finally:
+            if self.alive:
+                self.log.debug(f"Worker process {self.name} exited")
+            self.alive = False
+            for proxy in self.proxies.values():
+                proxy.shardLost()
+
+    def _handleLog(self, record: logging.LogRecord) -> None:
+        logging.getLogger(record.name).handle(record)
+
+    def forward(self, modName: str, item) -> bool:
+        """Send an event, or "FINISHED", to a module in the worker process.
+
+        Args:
+            modName (str): module name
+            item (SpiderFootEvent): event, or "FINISHED"
+
+        Returns:
+            bool: item was sent
+        """
+        if not self.alive:
+            return False
+
+        with self._lock:
+            try:
+                if isinstance(item, SpiderFootEvent):
+                    self._conn.send(('event', modName, _eventStates(item, self._events), item.hash))
+                else:
+                    self._conn.send(('event', modName, None, item))
+            except (EOFError, OSError) as e:
+                self.log.error(f"Failed to send event to worker process {self.name}: {e}")
+                self.alive = False
+                return False
+        return True
+
+    def shutdown(self, timeout: float = 10) -> None:
+        """Stop the worker process.
+
+        Args:
+            timeout (float): seconds to wait for the process to exit before killing it
+        """
+        self.alive = False
+        if self._conn is not None:
+            with self._lock:
+                try:
+                    self._conn.send(('stop',))
+                except (EOFError, OSError):
+                    pass
+
+        if self._proc is not None:
+            try:
+                self._proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                self.log.error(f"Worker process {self.name} did not exit, killing it")
+                self._proc.kill()
+                self._proc.wait()
+
+        if self._conn is not None:
+            self._conn.close()
+
+        if self._reader is not None and self._reader is not threading.current_thread():
+            self._reader.join(timeout)
+
+
+class SpiderFootModuleProxy(SpiderFootPlugin):
+    """Stands in, in the scan process, for a module running in a
+    SpiderFootModuleShard worker process.
+
+    Events put on the proxy's incoming event queue are forwarded to the
+    module, and marked done once the module has handled them.
+    """
+
+    def __init__(self, shard: SpiderFootModuleShard, mod: SpiderFootPlugin) -> None:
+        """Initialize the proxy.
+
+        Args:
+            shard (SpiderFootModuleShard): shard the module runs in
+            mod (SpiderFootPlugin): set up instance of the module, which the proxy replaces
+        """
+        super().__init__()
+        self.__name__ = mod.__name__
+        self.shard = shard
+        self.meta = getattr(mod, 'meta', None)
+        self.opts = getattr(mod, 'opts', dict())
+        self._priority = mod._priority
+        self._mutatesEvents = mod._mutatesEvents
+        self._uniqueEvents = mod._uniqueEvents
+        self.maxThreads = mod.maxThreads
+        self._watchedEvents = list(mod.watchedEvents())
+        self._producedEvents = list(mod.producedEvents())
+        self.incomingEventQueue = mod.incomingEventQueue
+        self.outgoingEventQueue = mod.outgoingEventQueue
+        self._queue = None
+        self._remote = threading.Condition()
+        self._remoteInFlight = 0
+
+    def watchedEvents(self) -> list:
+        return self._watchedEvents
+
+    def producedEvents(self) -> list:
+        return self._producedEvents
+
+    def checkForStop(self) -> bool:
+        return self._stopScanning
+
+    @property
+    def running(self) -> bool:
+        return self._remoteInFlight > 0
+
+    def start(self) -> None:
+        self._queue = self.incomingEventQueue
+        self.thread = threading.Thread(
+            target=self._forward, name=f"{self.__name__}_proxy", daemon=True)
+        self.thread.start()
+
+    def _forward(self) -> None:
+        incomingEventQueue = self._queue
+        # limit the events handed to the worker process, so that any
+        # backlog stays in the module's queue, where it can be spilled
+        window = max(int(self.maxThreads), 1) * 2
+        while not self.checkForStop():
+            try:
+                item = incomingEventQueue.get(timeout=1)
+            except queue.Empty:
+                continue
+
+            with self._remote:
+                self._remote.wait_for(
+                    lambda: self._remoteInFlight < window or not self.shard.alive or self._stopScanning)
+                self._remoteInFlight += 1
+
+            if not self.shard.forward(self.__name__, item):
+                self.remoteDone(True)
+
+    def remoteDone(self, errorState: bool = False) -> None:
+        """The module has finished handling an event forwarded to it.
+
+        Args:
+            errorState (bool): the module is in errorState
+        """
+        if errorState:
+            self.errorState = True
+        with self._remote:
+            if self._remoteInFlight <= 0:
+                return
+            self._remoteInFlight -= 1
+            self._remote.notify_all()
+        self._queue.task_done()
+
+    def shardLost(self) -> None:
+        """The worker process has exited. Mark any events it had not
+        finished handling done."""
+        self.errorState = True
+        with self._remote:
+            lost = self._remoteInFlight
+            self._remoteInFlight = 0
+            self._remote.notify_all()
+        for _ in range(lost):
+            self._queue.task_done()
+
+
+class _ShardModuleQueue(queue.Queue):
+    """Module incoming event queue in a worker process, which tells the scan
+    process each time an event has been handled."""
+
+    def __init__(self, worker: '_ShardWorker', modName: str) -> None:
+        super().__init__()
+        self.worker = worker
+        self.modName = modName
+
+    def task_done(self) -> None:
+        super().task_done()
+        mod = self.worker.modules.get(self.modName)
+        self.worker.send(('done', self.modName, bool(mod is None or mod.errorState)))
+
+
+class _ShardEmitter:
+    """Module outgoing event queue in a worker process, which sends events
+    to the scan process."""
+
+    def __init__(self, worker: '_ShardWorker') -> None:
+        self.worker = worker
+
+    def put(self, sfEvent: SpiderFootEvent, block: bool = True, timeout: float = None) -> None:
+        self.worker.emit(sfEvent)
+
+
+class _ShardLogQueue:
+    """Forwards log records to the scan process, for use with
+    logging.handlers.QueueHandler."""
+
+    def __init__(self, worker: '_ShardWorker') -> None:
+        self.worker = worker
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        self.worker.send(('log', record))
+
+
+class _ShardWorker:
+    """Runs in the worker process."""
+
+    def __init__(self, conn: Connection) -> None:
+        self.conn = conn
+        self.modules = dict()
+        self._lock = threading.Lock()
+        self._events = dict()
+
+    def send(self, msg: tuple) -> None:
+        with self._lock:
+            # the connection is closed once the scan process asks us to stop
+            with suppress(OSError):
+                self.conn.send(msg)
+
+    def emit(self, sfEvent: SpiderFootEvent) -> None:
+        with self._lock:
+            with suppress(OSError):
+                self.conn.send(('emit', _eventStates(sfEvent, self._events)))
+
+    def run(self) -> None:
+        msg = self.conn.recv()
+        if msg[0] != 'init':
+            return
+        _, config, scanId, target, socksProxy, modules = msg
+
+        log = logging.getLogger("spiderfoot")
+        log.handlers = [logging.handlers.QueueHandler(_ShardLogQueue(self))]
+        log.setLevel(logging.DEBUG if config.get('_debug') else logging.INFO)
+        log.propagate = False
+
+        # imported here, as the scan process does not need these
+        import dns.resolver
+        from sflib import SpiderFoot
+        from .asyncloop import SpiderFootAsyncLoop
+        from .db import SpiderFootDb
+        from .plugin import SpiderFootAsyncPlugin
+        from .threadpool import SpiderFootThreadPool
+
+        dbh = SpiderFootDb(config)
+        sf = SpiderFoot(config)
+        sf.dbh = dbh
+        sf.scanId = scanId
+        sf.socksProxy = socksProxy
+
+        if config.get('_dnsserver'):
+            res = dns.resolver.Resolver()
+            res.nameservers = [config['_dnsserver']]
+            dns.resolver.override_system_resolver(res)
+
+        pool = SpiderFootThreadPool(threads=config.get("_maxthreads", 3), name='sharedThreadPool')
+        pool.start()
+        asyncLoop = SpiderFootAsyncLoop(name='sharedAsyncLoop')
+
+        ready = dict()
+        for modName, modConfig in modules.items():
+            try:
+                module = __import__('modules.' + modName, globals(), locals(), [modName])
+                mod = getattr(module, modName)()
+                mod.__name__ = modName
+                mod.clearListeners()
+                mod.setScanId(scanId)
+                mod.setSharedThreadPool(pool)
+                if isinstance(mod, SpiderFootAsyncPlugin):
+                    mod.setSharedAsyncLoop(asyncLoop)
+                mod.setDbh(dbh)
+                mod.setup(sf, modConfig)
+                if config.get('_socks1type'):
+                    mod._updateSocket(socket)
+                if config.get('__outputfilter'):
+                    mod.setOutputFilter(config['__outputfilter'])
+                mod.setTarget(target)
+                mod.outgoingEventQueue = _ShardEmitter(self)
+                mod.incomingEventQueue = _ShardModuleQueue(self, modName)
+            except Exception:
+                sf.error(f"Module {modName} setup failed: {traceback.format_exc()}")
+                ready[modName] = False
+                continue
+            self.modules[modName] = mod
+            ready[modName] = True
+
+        self.send(('ready', ready))
+
+        for mod in self.modules.values():
+            mod.start()
+
+        try:
+            while True:
+                try:
+                    msg = self.conn.recv()
+                except (EOFError, OSError):
+                    break
+
+                if msg[0] == 'stop':
+                    break
+                if msg[0] != 'event':
+                    continue
+
+                _, modName, states, eventHash = msg
+                if states:
+                    _restoreEvents(states, self._events)
+
+                mod = self.modules.get(modName)
+                if mod is None or mod.errorState or mod.incomingEventQueue is None:
+                    self.send(('done', modName, True))
+                    continue
+
+                if eventHash == 'FINISHED':
+                    mod.incomingEventQueue.put('FINISHED')
+                    continue
+
+                sfEvent = self._events[eventHash]
+                sfEvent.freeze()
+                if mod._mutatesEvents:
+                    sfEvent = sfEvent.copy()
+                mod.incomingEventQueue.put(sfEvent)
+        finally:
+            for mod in self.modules.values():
+                mod._stopScanning = True
+            pool.shutdown(wait=False)
+            if asyncLoop.running:
+                asyncLoop.shutdown(wait=True)
+            with self._lock:
+                self.conn.close()
+            dbh.close()
+
+
+def shardMain(fd: int) -> None:
+    """Entry point of a worker process.
+
+    Args:
+        fd (int): file descriptor of the connection to the scan process
+    """
+    _ShardWorker(Connection(fd)).run()
@@ -1,7 +1,7 @@
 import queue
 import logging
 import threading
-from time import sleep
+from collections import deque
 from contextlib import suppress
 
 
@@ -9,6 +9,11 @@ class SpiderFootThreadPool:
     """Each thread in the pool is spawned only once, and reused for best
     performance.
 
+    Calls are queued on a deque per task (module) and idle workers take the
+    next call from whichever task is next in round-robin order, so that no
+    single module can starve the others. Workers, and submitters waiting for
+    a free slot, block until there is something to do rather than polling.
+
     Example 1: using map()
         with SpiderFootThreadPool(self.opts["_maxthreads"]) as pool:
             # callback("a", "arg1"), callback("b", "arg1"), ...
@@ -36,7 +41,7 @@ class SpiderFootThreadPool:
 
         Args:
             threads (int): Max number of threads
-            qsize (int): Queue size
+            qsize (int): Max number of queued calls per task
             name (str): Name
         """
         self.log = logging.getLogger(f"spiderfoot.{__name__}")
@@ -49,6 +54,13 @@ class SpiderFootThreadPool:
         self.outputQueues = dict()
         self._stop = False
         self._lock = threading.Lock()
+        # signalled when a call is queued
+        self._workAvailable = threading.Condition(self._lock)
+        # signalled when the pool has no calls queued or executing
+        self._idle = threading.Condition(self._lock)
+        # tasks with queued calls, in the order they will be served
+        self._ready = deque()
+        self._outstanding = 0
 
     def start(self) -> None:
         self.log.debug(
@@ -68,7 +80,14 @@ class SpiderFootThreadPool:
         for t in self.pool:
             with suppress(Exception):
                 t.stop = val
-        self._stop = val
+        with self._lock:
+            self._stop = val
+            if val:
+                # wake everything blocked on the pool so it can exit
+                self._workAvailable.notify_all()
+                self._idle.notify_all()
+                for task in self.inputQueues.values():
+                    task.changed.notify_all()
 
     def shutdown(self, wait: bool = True) -> dict:
         """Shut down the pool.
@@ -83,27 +102,22 @@ class SpiderFootThreadPool:
         self.log.debug(
             f'Shutting down thread pool "{self.name}" with wait={wait}')
         if wait:
-            while not self.finished and not self.stop:
-                with self._lock:
-                    outputQueues = list(self.outputQueues)
-                for taskName in outputQueues:
-                    moduleResults = list(self.results(taskName))
-                    try:
-                        results[taskName] += moduleResults
-                    except KeyError:
-                        results[taskName] = moduleResults
-                sleep(.1)
+            with self._lock:
+                self._idle.wait_for(lambda: self._stop or self._isIdle())
         self.stop = True
-        # make sure input queues are empty
+        if wait:
+            for t in self.pool:
+                if isinstance(t, threading.Thread) and t.is_alive() and t is not threading.current_thread():
+                    t.join()
+        # discard any calls which have not started
         with self._lock:
-            inputQueues = list(self.inputQueues.values())
-        for q in inputQueues:
-            with suppress(Exception):
-                while 1:
-                    q.get_nowait()
-            with suppress(Exception):
-                q.close()
-        # make sure output queues are empty
+            for task in self.inputQueues.values():
+                self._outstanding -= len(task.pending)
+                task.pending.clear()
+                task.generation += 1
+                task.changed.notify_all()
+            self._ready.clear()
+        # collect the results
         with self._lock:
             outputQueues = list(self.outputQueues.items())
         for taskName, q in outputQueues:
@@ -112,28 +126,82 @@ class SpiderFootThreadPool:
                 results[taskName] += moduleResults
             except KeyError:
                 results[taskName] = moduleResults
-            with suppress(Exception):
-                q.close()
         return results
 
     def submit(self, callback, *args, **kwargs) -> None:
         """Submit a function call to the pool. The "taskName" and "maxThreads"
         arguments are optional.
 
+        Blocks while the task already has maxThreads calls queued or
+        executing, or qsize calls queued.
+
         Args:
             callback (function): callback function
             *args: Passed through to callback
-            **kwargs: Passed through to callback, except for taskName and maxThreads
+            **kwargs: Passed through to callback, except for taskName, saveResult and maxThreads
         """
-        taskName = kwargs.get('taskName', 'default')
-        maxThreads = kwargs.pop('maxThreads', 100)
-        # block if this module's thread limit has been reached
-        while self.countQueuedTasks(taskName) >= maxThreads:
-            sleep(.01)
-            continue
+        taskName = kwargs.pop('taskName', 'default')
+        saveResult = kwargs.pop('saveResult', False)
+        maxThreads = max(int(kwargs.pop('maxThreads', 100)), 1)
         self.log.debug(
             f"Submitting function \"{callback.__name__}\" from module \"{taskName}\" to thread pool \"{self.name}\"")
-        self.inputQueue(taskName).put((callback, args, kwargs))
+        with self._lock:
+            task = self._task(taskName)
+            # block if this module's thread limit has been reached
+            task.changed.wait_for(
+                lambda: self._stop or (task.count < maxThreads and len(task.pending) < self.qsize))
+            if self._stop:
+                self.log.debug(
+                    f"Thread pool \"{self.name}\" is stopped, discarding function \"{callback.__name__}\" from module \"{taskName}\"")
+                return
+            task.pending.append((callback, args, kwargs, saveResult))
+            self._outstanding += 1
+            if len(task.pending) == 1:
+                self._ready.append(task)
+            self._workAvailable.notify()
+
+    def nextTask(self, worker: 'ThreadPoolWorker') -> tuple:
+        """Block until a call is available for the worker, and take it.
+
+        Args:
+            worker (ThreadPoolWorker): worker which will execute the call
+
+        Returns:
+            tuple: (taskName, callback, args, kwargs, saveResult), or None if the worker should exit
+        """
+        with self._lock:
+            self._workAvailable.wait_for(
+                lambda: self._stop or worker.stop or self._ready)
+            if self._stop or worker.stop:
+                return None
+            task = self._ready.popleft()
+            callback, args, kwargs, saveResult = task.pending.popleft()
+            task.running += 1
+            if task.pending:
+                # go to the back of the line, behind the other modules
+                self._ready.append(task)
+            worker.taskName = task.name
+            worker.busy = True
+        return task.name, callback, args, kwargs, saveResult
+
+    def finishTask(self, worker: 'ThreadPoolWorker') -> None:
+        """Record that the worker has finished executing its call.
+
+        Args:
+            worker (ThreadPoolWorker): worker which executed the call
+        """
+        with self._lock:
+            task = self.inputQueues.get(worker.taskName)
+            worker.taskName = ""
+            worker.busy = False
+            if task is None:
+                return
+            task.running -= 1
+            task.generation += 1
+            task.changed.notify_all()
+            self._outstanding -= 1
+            if self._isIdle():
+                self._idle.notify_all()
 
     def countQueuedTasks(self, taskName: str) -> int:
         """For the specified task, returns the number of queued function calls
@@ -145,29 +213,40 @@ class SpiderFootThreadPool:
         Returns:
             int: the number of queued function calls plus the number of functions which are currently executing
         """
-        queuedTasks = 0
-        with suppress(Exception):
-            queuedTasks += self.inputQueues[taskName].qsize()
-        runningTasks = 0
-        for t in self.pool:
-            with suppress(Exception):
-                if t.taskName == taskName:
-                    runningTasks += 1
-        return queuedTasks + runningTasks
+        task = self.inputQueues.get(taskName)
+        if task is None:
+            return 0
+        return task.count
 
-    def inputQueue(self, taskName: str = "default") -> str:
+    def _task(self, taskName: str) -> 'ThreadPoolTask':
+        # must be called with self._lock held
         try:
             return self.inputQueues[taskName]
         except KeyError:
-            self.inputQueues[taskName] = queue.Queue(self.qsize)
+            self.inputQueues[taskName] = ThreadPoolTask(taskName, self._lock)
             return self.inputQueues[taskName]
 
-    def outputQueue(self, taskName: str = "default") -> str:
+    def _isIdle(self) -> bool:
+        # must be called with self._lock held
+        return self._outstanding <= 0 and not self._feeding()
+
+    def _feeding(self) -> bool:
         try:
-            return self.outputQueues[taskName]
-        except KeyError:
-            self.outputQueues[taskName] = queue.Queue(self.qsize)
-            return self.outputQueues[taskName]
+            return self.inputThread.is_alive()
+        except AttributeError:
+            return False
+
+    def inputQueue(self, taskName: str = "default") -> 'ThreadPoolTask':
+        with self._lock:
+            return self._task(taskName)
+
+    def outputQueue(self, taskName: str = "default") -> queue.Queue:
+        with self._lock:
+            try:
+                return self.outputQueues[taskName]
+            except KeyError:
+                self.outputQueues[taskName] = queue.Queue()
+                return self.outputQueues[taskName]
 
     def map(self, callback, iterable, *args, **kwargs) -> None:  # noqa: A003
         """map.
@@ -187,41 +266,47 @@ class SpiderFootThreadPool:
         self.inputThread.start()
         self.daemon = True
         self.start()
-        sleep(.1)
         yield from self.results(taskName, wait=True)
 
     def results(self, taskName: str = "default", wait: bool = False) -> None:
         while 1:
-            result = False
-            with suppress(Exception):
+            with self._lock:
+                task = self.inputQueues.get(taskName)
+                generation = task.generation if task is not None else 0
+                done = self._stop or (self.countQueuedTasks(taskName) == 0 and not self._feeding())
+            with suppress(queue.Empty):
                 while 1:
                     yield self.outputQueue(taskName).get_nowait()
-                    result = True
-            if self.countQueuedTasks(taskName) == 0 or not wait:
+            if done or not wait:
                 break
-            if not result:
-                # sleep briefly to save CPU
-                sleep(.1)
+            # block until a call completes
+            with self._lock:
+                task = self._task(taskName)
+                task.changed.wait_for(
+                    lambda: self._stop or task.generation != generation)
 
     def feedQueue(self, callback, iterable, args, kwargs) -> None:
-        for i in iterable:
-            if self.stop:
-                break
-            self.submit(callback, i, *args, **kwargs)
+        taskName = kwargs.get("taskName", "default")
+        try:
+            for i in iterable:
+                if self.stop:
+                    break
+                self.submit(callback, i, *args, **kwargs)
+        finally:
+            with self._lock:
+                # wake anything waiting for the feed to end
+                task = self._task(taskName)
+                task.generation += 1
+                task.changed.notify_all()
+                self._idle.notify_all()
 
     @property
     def finished(self):
         if self.stop:
             return True
 
-        finishedThreads = [not t.busy for t in self.pool if t is not None]
-        try:
-            inputThreadAlive = self.inputThread.is_alive()
-        except AttributeError:
-            inputThreadAlive = False
-
-        inputQueuesEmpty = [q.empty() for q in self.inputQueues.values()]
-        return not inputThreadAlive and all(inputQueuesEmpty) and all(finishedThreads)
+        with self._lock:
+            return self._isIdle()
 
     def __enter__(self):
         return self
@@ -230,6 +315,28 @@ class SpiderFootThreadPool:
         self.shutdown()
 
 
+class ThreadPoolTask:
+    """Calls queued by one task (module), and the number executing."""
+
+    def __init__(self, name: str, lock: threading.Lock) -> None:
+        self.name = name
+        self.pending = deque()
+        self.running = 0
+        # incremented, and changed notified, whenever one of the task's calls completes
+        self.generation = 0
+        self.changed = threading.Condition(lock)
+
+    @property
+    def count(self) -> int:
+        return len(self.pending) + self.running
+
+    def qsize(self) -> int:
+        return len(self.pending)
+
+    def empty(self) -> bool:
+        return not self.pending
+
+
 class ThreadPoolWorker(threading.Thread):
 
     def __init__(self, pool, name: str = None) -> None:
@@ -243,34 +350,18 @@ class ThreadPoolWorker(threading.Thread):
         super().__init__(name=name)
 
     def run(self) -> None:
-        # Round-robin through each module's input queue
         while not self.stop:
-            ran = False
-            with self.pool._lock:
-                inputQueues = list(self.pool.inputQueues.values())
-            for q in inputQueues:
-                if self.stop:
-                    break
-                try:
-                    self.busy = True
-                    callback, args, kwargs = q.get_nowait()
-                    self.taskName = kwargs.pop("taskName", "default")
-                    saveResult = kwargs.pop("saveResult", False)
-                    try:
-                        result = callback(*args, **kwargs)
-                        ran = True
-                    except Exception:  # noqa: B902
-                        import traceback
-                        self.log.error(
-                            f'Error in thread worker {self.name}: {traceback.format_exc()}')
-                        break
-                    if saveResult:
-                        self.pool.outputQueue(self.taskName).put(result)
-                except queue.Empty:
-                    self.busy = False
-                finally:
-                    self.busy = False
-                    self.taskName = ""
-            # sleep briefly to save CPU
-            if not ran:
-                sleep(.05)
+            task = self.pool.nextTask(self)
+            if task is None:
+                break
+            taskName, callback, args, kwargs, saveResult = task
+            try:
+                result = callback(*args, **kwargs)
+                if saveResult:
+                    self.pool.outputQueue(taskName).put(result)
+            except Exception:  # noqa: B902
+                import traceback
+                self.log.error(
+                    f'Error in thread worker {self.name}: {traceback.format_exc()}')
+            finally:
+                self.pool.finishTask(self)
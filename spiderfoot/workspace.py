@@ -601,8 +601,7 @@ class SpiderFootWorkspace:
                     summary['statistics']['failed_scans'] += 1
                 
                 # Count events
-                events = self.db.scanResultEvent(scan_id, 'ALL')
-                summary['statistics']['total_events'] += len(events)
+                summary['statistics']['total_events'] += self.db.scanResultEventCount(scan_id)
                 
                 # Recent activity
                 summary['recent_activity'].append({
@@ -631,31 +630,25 @@ class SpiderFootWorkspace:
         Returns:
             List of matching events
         """
-        matching_events = []
-        
         target_scan_ids = scan_ids or self.get_scan_ids()
-        
-        for scan_id in target_scan_ids:
-            events = self.db.scanResultEvent(scan_id, event_types or 'ALL')
-            
-            for event in events:
-                event_data = event[1]  # event data
-                event_type = event[4]  # event type
-                
-                # Simple text search in event data
-                if query.lower() in event_data.lower():
-                    matching_events.append({
-                        'scan_id': scan_id,
-                        'created': event[0],
-                        'data': event_data,
-                        'module': event[3],
-                        'type': event_type,
-                        'confidence': event[6],
-                        'visibility': event[7],
-                        'risk': event[8]
-                    })
-        
-        return matching_events    # def create_workflow(self):
+        if not target_scan_ids:
+            return []
+
+        # one indexed query across all the scans, best matches first
+        rows = self.db.searchText(query, scanIds=target_scan_ids, eventTypes=event_types)
+
+        return [{
+            'scan_id': row[12],
+            'created': row[0],
+            'data': row[1],
+            'module': row[3],
+            'type': row[4],
+            'confidence': row[5],
+            'visibility': row[6],
+            'risk': row[7]
+        } for row in rows]
+
+    # def create_workflow(self):
     #     """Create a new workflow for this workspace.
     #     
     #     Returns:
@@ -258,6 +258,27 @@ class TestConnectionLoadBalancer(unittest.TestCase):
         self.assertIsNotNone(pool_id)
         self.assertIsNotNone(conn)
 
+    @patch('modules.sfp__stor_db_advanced.SpiderFootDb')
+    @patch('modules.sfp__stor_db_advanced.psycopg2.pool.ThreadedConnectionPool')
+    def test_get_database(self, mock_pool_class, mock_db_class):
+        """Test each pool's database is opened once, with SpiderFootDb."""
+        mock_pool_class.return_value = MagicMock()
+        
+        balancer = ConnectionLoadBalancer(self.test_configs)
+        balancer.metrics['pool_0'].load_factor = 0.8
+        balancer.metrics['pool_1'].load_factor = 0.3
+        
+        pool_id = balancer.get_optimal_pool()
+        self.assertEqual(pool_id, 'pool_1')
+        dbh = balancer.get_database(pool_id)
+        self.assertIs(balancer.get_database(pool_id), dbh)
+        
+        mock_db_class.assert_called_once()
+        opts = mock_db_class.call_args[0][0]
+        self.assertEqual(opts['__dbtype'], 'postgresql')
+        self.assertIn('host=db2.example.com', opts['__database'])
+        self.assertIn('dbname=spiderfoot2', opts['__database'])
+
 
 @skip_if_no_imports
 class TestQueryOptimizer(unittest.TestCase):
@@ -597,27 +618,46 @@ class TestAdvancedStorageModule(unittest.TestCase):
         # Set up mock load balancer
         mock_balancer = Mock()
         mock_pool_id = 'pool_0'
-        mock_conn = Mock()
-        mock_cursor = Mock()
-        mock_conn.cursor.return_value = mock_cursor
-        mock_balancer.get_optimal_connection.return_value = (mock_pool_id, mock_conn)
+        mock_dbh = Mock()
+        mock_dbh.scanInstanceGet.return_value = None
+        mock_balancer.get_optimal_pool.return_value = mock_pool_id
+        mock_balancer.get_database.return_value = mock_dbh
         mock_balancer_class.return_value = mock_balancer
         
         self.module.setup(self.sf, self.test_opts)
         self.module.getScanId = Mock(return_value="test_scan_id")
+        self.sf.dbh.scanInstanceGet.return_value = ["scan name", "target"]
         
         # Test bulk storage
         events = [MockSpiderFootEvent(f"EVENT_{i}") for i in range(3)]
+        self.module._bulk_store_with_load_balancing(events)
+        self.module._bulk_store_with_load_balancing(events)
+        
+        # Events are stored with SpiderFootDb, which keeps the result
+        # summary and value index up to date, in the pool's database
+        mock_balancer.get_database.assert_called_with(mock_pool_id)
+        mock_dbh.scanInstanceCreate.assert_called_once_with("test_scan_id", "scan name", "target")
+        mock_dbh.scanEventStoreMany.assert_called_with("test_scan_id", events, 1024)
+        self.assertEqual(mock_dbh.scanEventStoreMany.call_count, 2)
+        mock_balancer.record_result.assert_called_with(mock_pool_id, True)
+    
+    @patch('modules.sfp__stor_db_advanced.ConnectionLoadBalancer')
+    def test_bulk_store_with_load_balancing_failure(self, mock_balancer_class):
+        """Test a failed bulk store is recorded against its pool."""
+        mock_balancer = Mock()
+        mock_dbh = Mock()
+        mock_dbh.scanEventStoreMany.side_effect = IOError("SQL error")
+        mock_balancer.get_optimal_pool.return_value = 'pool_0'
+        mock_balancer.get_database.return_value = mock_dbh
+        mock_balancer_class.return_value = mock_balancer
         
-        with patch('psycopg2.extras.execute_values') as mock_execute_values:
+        self.module.setup(self.sf, self.test_opts)
+        self.module.getScanId = Mock(return_value="test_scan_id")
+        
+        events = [MockSpiderFootEvent(f"EVENT_{i}") for i in range(3)]
+        with self.assertRaises(IOError):
             self.module._bulk_store_with_load_balancing(events)
-            
-            # Verify connection operations
-            mock_balancer.get_optimal_connection.assert_called_once()
-            mock_conn.cursor.assert_called_once()
-            mock_execute_values.assert_called_once()
-            mock_conn.commit.assert_called_once()
-            mock_balancer.return_connection.assert_called_with(mock_pool_id, mock_conn, True)
+        mock_balancer.record_result.assert_called_once_with('pool_0', False)
     
     def test_bulk_store_sqlite_fallback(self):
         """Test SQLite bulk storage fallback."""
@@ -631,9 +671,10 @@ class TestAdvancedStorageModule(unittest.TestCase):
         # Test SQLite bulk storage
         events = [MockSpiderFootEvent(f"EVENT_{i}") for i in range(3)]
         self.module._bulk_store_sqlite(events)
+        self.module.finish()
         
-        # Verify SQLite storage calls
-        self.assertEqual(self.sf.dbh.scanEventStore.call_count, 3)
+        # Verify the events were stored in a single batch
+        self.sf.dbh.scanEventStoreMany.assert_called_once_with("test_scan_id", events, 1024)
     
     def test_performance_status_reporting(self):
         """Test performance status reporting."""
@@ -751,7 +792,8 @@ class TestPhase2StorageIntegration(unittest.TestCase):
             module.handleEvent(event)
         
         # Verify events were processed
-        self.sf.dbh.scanEventStore.assert_called()
+        module.finish()
+        self.sf.dbh.scanEventStoreMany.assert_called()
         
         # Get performance status
         status = module.get_performance_status()
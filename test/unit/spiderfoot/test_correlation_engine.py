@@ -1,9 +1,15 @@
+import os
+import re
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 from spiderfoot.correlation.rule_loader import RuleLoader
-from spiderfoot.correlation.rule_executor import RuleExecutor
+from spiderfoot.correlation.rule_executor import RuleExecutor, ScanEventIndex, ValueIndexRuleExecutionStrategy
 from spiderfoot.correlation.event_enricher import EventEnricher
 from spiderfoot.correlation.result_aggregator import ResultAggregator
+from spiderfoot.correlation.incremental_correlator import IncrementalCorrelator
+from spiderfoot.correlation.rule_compiler import CompiledRuleSet, compile_filter
+from spiderfoot import SpiderFootEvent
 
 class TestCorrelationEngineUnit(unittest.TestCase):
     def setUp(self):
@@ -67,6 +73,126 @@ class TestCorrelationEngineUnit(unittest.TestCase):
         self.assertIn('test_rule', results)
         self.assertTrue(results['test_rule'].get('matched', True))  # Use get to avoid KeyError
 
+    def test_rule_executor_should_read_each_scan_once_for_all_rules(self):
+        ip_rule = dict(self.sample_rule, id='ip_rule', collections={
+            'collect': [{'method': 'exact', 'field': 'type', 'value': 'IP_ADDRESS'}]
+        })
+        executor = RuleExecutor(self.dbh, [self.sample_rule, ip_rule], scan_ids=['scan1', 'scan2'])
+        results = executor.run()
+
+        self.assertEqual(self.mock_get_scan_events.call_count, 2)
+        for call in self.mock_get_scan_events.call_args_list:
+            self.assertEqual(call.kwargs['event_types'], {'EMAILADDR', 'IP_ADDRESS'})
+        self.assertTrue(results['test_rule']['matched'])
+        self.assertFalse(results['ip_rule']['matched'])
+
+    def test_rule_loader_should_reuse_cached_rules(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rule_dir = os.path.join(tmp, 'rules')
+            os.mkdir(rule_dir)
+            with open(os.path.join(rule_dir, 'test_rule.yaml'), 'w', encoding='utf-8') as f:
+                f.write("id: test_rule\nmeta:\n  name: Test Rule\n  description: d\n  risk: INFO\n"
+                        "collections:\n  collect: []\nheadline: h\n")
+            cache_path = os.path.join(tmp, 'rules.json')
+            rules = RuleLoader(rule_dir, cache_path=cache_path).load_rules()
+            self.assertTrue(os.path.exists(cache_path))
+
+            with patch('spiderfoot.correlation.rule_loader.yaml.safe_load') as safe_load:
+                self.assertEqual(RuleLoader(rule_dir, cache_path=cache_path).load_rules(), rules)
+            safe_load.assert_not_called()
+
+            with open(os.path.join(rule_dir, 'test_rule.yaml'), 'a', encoding='utf-8') as f:
+                f.write("enabled: false\n")
+            self.assertFalse(RuleLoader(rule_dir, cache_path=cache_path).load_rules()[0]['enabled'])
+
+    def test_compiled_filter_should_match_as_each_pattern(self):
+        values = ['devbox.example.com', 'x' * 50 + 'test', '192.168.0.1', 'host:8080', 'a\ndev', '', 'other']
+        for patterns in [['.*dev.*', '.*test.*'], ['^192\\.168\\..*', '.*:8080$'], ['(a)\\1', 'dev'], ['.*'], ['a.*?b', '\\.*']]:
+            with self.subTest(patterns=patterns):
+                compiled = compile_filter({'method': 'regex', 'field': 'data', 'value': patterns})
+                for value in values:
+                    expected = any(re.search(p, value) for p in patterns)
+                    self.assertEqual(compiled.matches({'data': value}), expected, value)
+        collect_rule = {'method': 'regex', 'field': 'data', 'value': ['.*dev.*', '.*test.*']}
+        self.assertIs(compile_filter(collect_rule), compile_filter(dict(collect_rule)))
+
+    def test_compiled_rule_set_should_index_rules_by_type(self):
+        any_rule = dict(self.sample_rule, id='any_rule', collections={'collect': [{'method': 'regex', 'field': 'data', 'value': 'x'}]})
+        compiled = CompiledRuleSet([self.sample_rule, any_rule])
+        self.assertEqual([c.id for c in compiled.for_type('EMAILADDR')], ['test_rule', 'any_rule'])
+        self.assertEqual([c.id for c in compiled.for_type('IP_ADDRESS')], ['any_rule'])
+        self.assertIsNone(compiled.event_types)
+        self.assertEqual(CompiledRuleSet([self.sample_rule]).event_types, {'EMAILADDR'})
+
+    def test_scan_event_index_should_keep_read_order(self):
+        events = [{'hash': str(i), 'type': t} for i, t in enumerate(['A', 'B', 'A', 'C', 'B'])]
+        index = ScanEventIndex()
+        index.add('scan1', events)
+        self.assertEqual(index.events('scan1'), events)
+        self.assertEqual([e['hash'] for e in index.events('scan1', {'A', 'B'})], ['0', '1', '2', '4'])
+        self.assertEqual(index.events('scan1', {'D'}), [])
+        self.assertEqual(index.events('scan2'), [])
+
+    def test_incremental_correlator_should_correlate_once_threshold_is_met(self):
+        rule = dict(self.sample_rule, analysis=[{'method': 'threshold', 'field': 'data', 'minimum': 2}])
+        self.dbh.correlationResultCreate.return_value = 'corr1'
+        correlator = IncrementalCorrelator(self.dbh, [rule], 'scan1')
+        root = SpiderFootEvent('ROOT', 'example.com', '', None)
+        events = [SpiderFootEvent('EMAILADDR', 'test@example.com', 'sfp_test', root) for _ in range(3)]
+
+        correlator.add(root)
+        correlator.add(events[0])
+        self.assertEqual(correlator.flush(), 0)
+        correlator.add(events[1])
+        self.assertEqual(correlator.flush(), 1)
+        self.assertEqual(
+            self.dbh.correlationResultCreate.call_args.kwargs['eventHashes'], [e.hash for e in events[:2]])
+
+        correlator.add(events[2])
+        results = correlator.finalize()
+        self.dbh.correlationResultEventsAdd.assert_called_once_with('corr1', [events[2].hash])
+        self.assertEqual(self.dbh.correlationResultCreate.call_count, 1)
+        self.assertEqual(results['test_rule']['correlations_created'], 1)
+        self.assertEqual([e['hash'] for e in results['test_rule']['correlated_events']], [e.hash for e in events])
+        self.mock_get_scan_events.assert_not_called()
+
+    def test_incremental_correlator_should_leave_other_strategies_to_executor(self):
+        custom_rule = dict(self.sample_rule, id='custom_rule', meta=dict(self.sample_rule['meta'], type='custom_type'))
+        with patch.dict(RuleExecutor._strategy_registry, {'custom_type': MagicMock()}):
+            correlator = IncrementalCorrelator(self.dbh, [self.sample_rule, custom_rule], 'scan1')
+        self.assertEqual(correlator.other_rules, [custom_rule])
+        self.assertEqual(list(correlator.finalize()), ['test_rule'])
+
+    def test_rule_executor_should_run_workspace_rules_from_value_index(self):
+        rule = dict(self.sample_rule, id='shared_rule', meta=dict(self.sample_rule['meta'], scope='workspace'),
+                    analysis=[{'method': 'threshold', 'field': 'data', 'minimum': 2}])
+        self.dbh.scanValueIndexSearch.return_value = [
+            ('shared@example.com', 'EMAILADDR', 'scan1', 'hash1', 1),
+            ('shared@example.com', 'EMAILADDR', 'scan2', 'hash2', 3),
+        ]
+        self.dbh.correlationResultCreate.return_value = 'corr1'
+        results = RuleExecutor(self.dbh, [rule], scan_ids=['scan1', 'scan2']).run()
+
+        self.dbh.scanValueIndexSearch.assert_called_once_with(['EMAILADDR'], ['scan1', 'scan2'], 2, 0)
+        self.dbh.correlationResultCreate.assert_called_once()
+        self.assertEqual(self.dbh.correlationResultCreate.call_args.kwargs['eventHashes'], ['hash1', 'hash2'])
+        self.assertEqual(results['shared_rule']['correlations_created'], 1)
+        self.mock_get_scan_events.assert_not_called()
+
+        # scans the database doesn't hold are read event by event
+        self.dbh.scanInstanceGet.return_value = None
+        RuleExecutor(self.dbh, [rule], scan_ids=['scan1', 'scan2']).run()
+        self.assertEqual(self.mock_get_scan_events.call_count, 2)
+
+    def test_value_index_strategy_should_support_workspace_rules_by_data(self):
+        rule = dict(self.sample_rule, meta=dict(self.sample_rule['meta'], scope='workspace'),
+                    analysis=[{'method': 'outlier', 'maximum_percent': 10}])
+        self.assertTrue(ValueIndexRuleExecutionStrategy.supports(rule))
+        self.assertFalse(ValueIndexRuleExecutionStrategy.supports(self.sample_rule))
+        self.assertFalse(ValueIndexRuleExecutionStrategy.supports(dict(rule, aggregation={'field': 'module'})))
+        self.assertFalse(ValueIndexRuleExecutionStrategy.supports(dict(rule, collections={
+            'collect': [{'method': 'regex', 'field': 'data', 'value': 'x'}]})))
+
     def test_event_enricher(self):
         enricher = EventEnricher(self.dbh)
         events = [{'hash': 'event1', 'type': 'EMAILADDR', 'data': 'test@example.com'}]  # Use 'hash' key
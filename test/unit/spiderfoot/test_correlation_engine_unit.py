@@ -24,6 +24,19 @@ def test_event_enricher_enrich_entities(mock_dbh):
     enriched = enricher.enrich_entities('scan1', events)
     assert isinstance(enriched, list)
 
+def test_event_enricher_should_fetch_each_event_once(mock_dbh):
+    mock_dbh.get_sources_many.side_effect = lambda scan_id, hashes: {h: [{'hash': f"src_{h}"}] for h in hashes}
+    enricher = EventEnricher(mock_dbh)
+    first = [{'hash': 'a', 'scan_id': 'scan1'}, {'hash': 'b'}]
+    second = [{'hash': 'b'}, {'hash': 'c'}]
+
+    enricher.enrich_sources('scan1', first)
+    enricher.enrich_sources('scan1', second)
+
+    assert [call.args for call in mock_dbh.get_sources_many.call_args_list] == [('scan1', ['a', 'b']), ('scan1', ['c'])]
+    assert second[0]['sources'] == [{'hash': 'src_b'}]
+    assert second[1]['sources'] == [{'hash': 'src_c'}]
+
 def test_result_aggregator_count():
     aggregator = ResultAggregator()
     results = [
@@ -0,0 +1,113 @@
+import asyncio
+import queue
+import threading
+from unittest.mock import MagicMock
+
+from spiderfoot import SpiderFootAsyncLoop, SpiderFootAsyncPlugin
+from test.unit.utils.test_base import SpiderFootTestBase
+
+
+class TestSpiderFootAsyncLoop(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.loop = SpiderFootAsyncLoop(name='test')
+
+    def tearDown(self):
+        self.loop.shutdown(wait=True)
+        super().tearDown()
+
+    def test_submit_should_start_loop_and_return_result(self):
+        async def coro():
+            await asyncio.sleep(0)
+            return threading.current_thread().name
+
+        self.assertFalse(self.loop.running)
+        self.assertEqual(self.loop.submit(coro()).result(timeout=5), 'test')
+        self.assertTrue(self.loop.running)
+
+    def test_submit_should_run_coroutines_concurrently(self):
+        started = []
+
+        async def coro(n):
+            started.append(n)
+            while len(started) < 50:
+                await asyncio.sleep(0.01)
+            return n
+
+        futures = [self.loop.submit(coro(n)) for n in range(50)]
+        self.assertEqual([f.result(timeout=5) for f in futures], list(range(50)))
+
+    def test_shutdown_should_cancel_pending_tasks(self):
+        future = self.loop.submit(asyncio.sleep(60))
+        self.loop.shutdown(wait=True)
+        self.assertTrue(future.cancelled())
+        self.assertFalse(self.loop.running)
+
+
+class TestSpiderFootAsyncPlugin(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.loop = SpiderFootAsyncLoop(name='test')
+        self.plugin = SpiderFootAsyncPlugin()
+        self.plugin.__name__ = 'sfp_async_test'
+        self.plugin.sf = MagicMock()
+        self.plugin.setSharedAsyncLoop(self.loop)
+
+    def tearDown(self):
+        self.loop.shutdown(wait=True)
+        super().tearDown()
+
+    def test_poolExecute_should_await_coroutine_and_mark_item_done(self):
+        handled = threading.Event()
+
+        async def handleEvent(evt):
+            await asyncio.sleep(0)
+            handled.set()
+
+        incomingEventQueue = queue.Queue()
+        incomingEventQueue.put('event')
+        incomingEventQueue.get()
+        self.plugin.poolExecute(self.plugin.processQueuedItem, incomingEventQueue, handleEvent, 'event')
+        self.assertTrue(handled.wait(5))
+        incomingEventQueue.join()
+        self.assertEqual(self.plugin._asyncInFlight, 0)
+        self.assertFalse(self.plugin.running)
+
+    def test_poolExecute_should_limit_concurrency_to_maxThreads(self):
+        self.plugin.maxThreads = 2
+        release = threading.Event()
+        active = []
+
+        async def handleEvent():
+            active.append(1)
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+
+        for _ in range(2):
+            self.plugin.poolExecute(handleEvent)
+        self.assertTrue(self.plugin.running)
+
+        blocked = threading.Thread(target=self.plugin.poolExecute, args=(handleEvent,), daemon=True)
+        blocked.start()
+        blocked.join(0.2)
+        self.assertTrue(blocked.is_alive())
+
+        release.set()
+        blocked.join(5)
+        self.assertFalse(blocked.is_alive())
+
+    def test_poolExecute_should_log_callback_exceptions(self):
+        done = threading.Event()
+
+        async def handleEvent():
+            try:
+                raise ValueError("boom")
+            finally:
+                done.set()
+
+        self.plugin.poolExecute(handleEvent)
+        self.assertTrue(done.wait(5))
+        self.loop.submit(asyncio.sleep(0)).result(timeout=5)
+        self.plugin.sf.error.assert_called_once()
@@ -106,6 +106,472 @@ class TestSpiderFootDb(SpiderFootTestBase):
         except Exception:
             self.fail("Search with multiple criteria raised an exception")
 
+    def test_search_regex_should_match_from_start_ignoring_case(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        results = self.db.search({'scan_id': 'test_instance', 'regex': r'WWW\.example\.'})
+        # events whose source event matches are found too
+        self.assertEqual({row[8] for row in results}, {name_event.hash} | {e.hash for e in ip_events})
+        self.assertEqual(self.db.search({'scan_id': 'test_instance', 'regex': r'com'}), [])
+        self.assertEqual(self.db.search({'scan_id': 'test_instance', 'regex': '('}), [])
+
+    def test_search_with_full_text_index_should_match_as_without(self):
+        self.storeEventTree()
+        expected = {
+            value: self.db.search({'scan_id': 'test_instance', 'value': value})
+            for value in ['%WWW.example%', '%0.0.1%', '10.0.0.0', '%:443', '%']
+        }
+
+        self.db = SpiderFootDb(dict(self.opts, _dbfulltext=True))
+        self.assertTrue(self.db.fullText)
+        for value, rows in expected.items():
+            with self.subTest(value=value):
+                self.assertEqual(self.db.search({'scan_id': 'test_instance', 'value': value}), rows)
+
+    def test_searchText_should_rank_matches_across_scans(self):
+        self.db = SpiderFootDb(dict(self.opts, _dbfulltext=True))
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        self.db.scanInstanceCreate('other_instance', 'other scan', 'example.com')
+        other_event = SpiderFootEvent('IP_ADDRESS', '10.0.0.1', 'sfp_test', root_event)
+        self.db.scanEventStoreMany('other_instance', [root_event, other_event])
+
+        results = self.db.searchText('10.0.0.1', scanIds=['test_instance', 'other_instance'])
+        self.assertEqual(len(results), 3)
+        # the shorter, closer matches rank above the port
+        self.assertEqual(results[-1][8], port_events[1].hash)
+        self.assertEqual({row[12] for row in results}, {'test_instance', 'other_instance'})
+
+        results = self.db.searchText('0.0.1', scanIds=['test_instance'], eventTypes=['IP_ADDRESS'])
+        self.assertEqual([row[8] for row in results], [ip_events[1].hash])
+
+        self.db.vacuumDB()
+        self.db.scanInstanceDelete('other_instance')
+        self.assertEqual(len(self.db.searchText('10.0.0.1')), 2)
+
+    def test_searchText_without_full_text_index_should_match_substrings(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        self.assertFalse(self.db.fullText)
+        results = self.db.searchText('0.0.1', eventTypes=['IP_ADDRESS', 'TCP_PORT_OPEN'])
+        self.assertEqual({row[8] for row in results}, {ip_events[1].hash, port_events[1].hash})
+        self.assertEqual(self.db.searchText('100%'), [])
+        with self.assertRaises(ValueError):
+            self.db.searchText(' ')
+
+    def test_scanEventStoreMany_should_store_events(self):
+        self.db.scanInstanceCreate('test_instance', 'test scan', 'example.com')
+        root_event = SpiderFootEvent('ROOT', 'example.com', '', None)
+        events = [root_event] + [
+            SpiderFootEvent('IP_ADDRESS', f"10.0.0.{i}", 'sfp_test', root_event) for i in range(5)
+        ]
+        self.db.scanEventStoreMany('test_instance', events)
+        self.assertEqual(len(self.db.scanResultEvent('test_instance', 'IP_ADDRESS')), 5)
+
+    def test_scanEventStoreMany_invalid_event_should_store_nothing(self):
+        self.db.scanInstanceCreate('test_instance', 'test scan', 'example.com')
+        root_event = SpiderFootEvent('ROOT', 'example.com', '', None)
+        events = [
+            SpiderFootEvent('IP_ADDRESS', '10.0.0.1', 'sfp_test', root_event),
+            'invalid event'
+        ]
+        with self.assertRaises(TypeError):
+            self.db.scanEventStoreMany('test_instance', events)
+        self.assertEqual(self.db.scanResultEvent('test_instance', 'IP_ADDRESS'), [])
+
+    def storeEventTree(self):
+        self.db.scanInstanceCreate('test_instance', 'test scan', 'example.com')
+        root_event = SpiderFootEvent('ROOT', 'example.com', '', None)
+        name_event = SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_test', root_event)
+        ip_events = [
+            SpiderFootEvent('IP_ADDRESS', f"10.0.0.{i}", 'sfp_test', name_event) for i in range(2)
+        ]
+        port_events = [
+            SpiderFootEvent('TCP_PORT_OPEN', f"10.0.0.{i}:443", 'sfp_test', ip_events[i]) for i in range(2)
+        ]
+        self.db.scanEventStoreMany('test_instance', [root_event, name_event] + ip_events + port_events)
+        return root_event, name_event, ip_events, port_events
+
+    def test_scanElementSourcesAll_should_return_all_ancestors(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        leafs = self.db.scanResultEvent('test_instance', 'TCP_PORT_OPEN')
+        datamap, pc = self.db.scanElementSourcesAll('test_instance', leafs)
+
+        self.assertEqual(pc['ROOT'], [name_event.hash])
+        self.assertEqual(sorted(pc[name_event.hash]), sorted(e.hash for e in ip_events))
+        for ip_event, port_event in zip(ip_events, port_events):
+            self.assertEqual(pc[ip_event.hash], [port_event.hash])
+        self.assertEqual(
+            set(datamap),
+            {'ROOT', name_event.hash} | {e.hash for e in ip_events + port_events}
+        )
+
+    def test_scanElementChildrenAll_should_return_all_descendants(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        children = self.db.scanElementChildrenAll('test_instance', [name_event.hash])
+        self.assertEqual(sorted(children), sorted(e.hash for e in ip_events + port_events))
+        self.assertEqual(self.db.scanElementChildrenAll('test_instance', [port_events[0].hash]), [])
+
+    def test_get_sources_many_should_match_get_sources(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        hashes = [name_event.hash, ip_events[0].hash, port_events[1].hash, 'missing']
+        sources = self.db.get_sources_many('test_instance', hashes)
+
+        self.assertEqual(sources, {h: self.db.get_sources('test_instance', h) for h in hashes})
+        self.assertEqual(sources[name_event.hash], [])
+        self.assertEqual([s['hash'] for s in sources[port_events[1].hash]], [ip_events[1].hash])
+
+    def test_get_entities_many_should_match_get_entities(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        hashes = [name_event.hash, ip_events[0].hash]
+        entities = self.db.get_entities_many('test_instance', hashes)
+
+        self.assertEqual(entities, {h: self.db.get_entities('test_instance', h) for h in hashes})
+        self.assertEqual(sorted(e['hash'] for e in entities[name_event.hash]), sorted(e.hash for e in ip_events))
+
+    def test_scanResultEventPage_should_page_through_all_results(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        hashes = list()
+        after = None
+        while True:
+            rows, after = self.db.scanResultEventPage('test_instance', limit=2, after=after)
+            self.assertLessEqual(len(rows), 2)
+            hashes.extend(row[8] for row in rows)
+            if after is None:
+                break
+
+        self.assertEqual(len(hashes), 6)
+        self.assertEqual(
+            set(hashes),
+            {'ROOT', name_event.hash} | {e.hash for e in ip_events + port_events}
+        )
+
+    def test_scanResultEventStored_should_return_results_stored_late(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        rows, after = self.db.scanResultEventStored('test_instance', limit=2)
+        self.assertEqual(len(rows), 2)
+        rows, after = self.db.scanResultEventStored('test_instance', after=after)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(self.db.scanResultEventStored('test_instance', after=after), [[], after])
+
+        # generated before the results already read, but stored after them
+        late = SpiderFootEvent('IP_ADDRESS', '10.0.0.9', 'sfp_test', name_event)
+        late._generated = name_event.generated - 60
+        self.db.scanEventStore('test_instance', late)
+        rows, after = self.db.scanResultEventStored('test_instance', after=after)
+        self.assertEqual([row[8] for row in rows], [late.hash])
+
+    def test_scanResultEventIter_should_match_scanResultEvent(self):
+        self.storeEventTree()
+        expected = sorted(self.db.scanResultEvent('test_instance', 'IP_ADDRESS'))
+        self.assertEqual(sorted(self.db.scanResultEventIter('test_instance', 'IP_ADDRESS', batchSize=1)), expected)
+        self.assertEqual(self.db.scanResultEventCount('test_instance', 'IP_ADDRESS'), len(expected))
+        self.assertEqual(self.db.scanResultEventCount('test_instance'), 6)
+
+    def test_scanResultSummary_should_count_stored_events(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        self.db.scanEventStore('test_instance', SpiderFootEvent('IP_ADDRESS', '10.0.0.0', 'sfp_other', name_event))
+
+        summary = {row[0]: row for row in self.db.scanResultSummary('test_instance', by='type')}
+        self.assertEqual(summary['IP_ADDRESS'][3], 3)
+        self.assertEqual(summary['IP_ADDRESS'][4], 2)
+        self.assertEqual(summary['TCP_PORT_OPEN'][3], 2)
+
+        modules = {row[0]: row[3] for row in self.db.scanResultSummary('test_instance', by='module')}
+        self.assertEqual(modules['sfp_test'], 5)
+        self.assertEqual(modules['sfp_other'], 1)
+
+        scans = self.db.scanInstanceList()
+        self.assertEqual(scans[0][7], 6)
+
+    def test_scanResultSummary_should_forget_counts_of_deleted_scans(self):
+        self.storeEventTree()
+        key = (self.db.db_type, self.db.database, 'test_instance')
+        self.db.scanResultSummary('test_instance', by='type')
+        self.db.scanResultSummary('test_instance', by='module')
+        self.assertEqual(len([k for k in SpiderFootDb._uniqueCounts if k[:3] == key]), 2)
+
+        self.db.scanInstanceDelete('test_instance')
+        self.assertEqual([k for k in SpiderFootDb._uniqueCounts if k[:3] == key], [])
+
+    def test_scanResultSummary_should_keep_most_recently_used_counts(self):
+        self.storeEventTree()
+        with patch.object(SpiderFootDb, 'uniqueCountsSize', 1):
+            self.db.scanResultSummary('test_instance', by='type')
+            self.db.scanResultSummary('test_instance', by='module')
+            self.assertEqual(list(SpiderFootDb._uniqueCounts),
+                             [(self.db.db_type, self.db.database, 'test_instance', 'module')])
+
+    def test_scanResultsUpdateFP_should_update_result_counts(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        self.db.scanResultsUpdateFP('test_instance', [ip_events[0].hash], 1)
+        self.db.scanResultsUpdateFP('test_instance', [ip_events[0].hash], 1)
+        self.assertEqual(self.db.scanResultEventCount('test_instance', 'IP_ADDRESS', filterFp=True), 1)
+        self.assertEqual(self.db.scanResultEventCount('test_instance', 'IP_ADDRESS'), 2)
+
+        self.db.scanResultsUpdateFP('test_instance', [ip_events[0].hash], 0)
+        self.assertEqual(self.db.scanResultEventCount('test_instance', 'IP_ADDRESS', filterFp=True), 2)
+
+    def test_scanCorrelationSummary_should_count_correlations(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        for ip_event in ip_events:
+            self.db.correlationResultCreate(
+                'test_instance', ip_event.hash, 'rule_a', 'Rule A', 'descr', 'HIGH', 'rule', 'title', [ip_event.hash])
+        self.db.correlationResultCreate(
+            'test_instance', name_event.hash, 'rule_b', 'Rule B', 'descr', 'LOW', 'rule', 'title', [name_event.hash])
+
+        self.assertEqual(
+            self.db.scanCorrelationSummary('test_instance', by='rule'),
+            [('rule_a', 'Rule A', 'HIGH', 'descr', 2), ('rule_b', 'Rule B', 'LOW', 'descr', 1)]
+        )
+        self.assertEqual(
+            dict(self.db.scanCorrelationSummary('test_instance', by='risk')),
+            {'HIGH': 2, 'LOW': 1}
+        )
+
+    def test_correlationResultEventsAdd_should_add_events_to_correlation(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        correlationId = self.db.correlationResultCreate(
+            'test_instance', ip_events[0].hash, 'rule_a', 'Rule A', 'descr', 'HIGH', 'rule', 'title', [ip_events[0].hash])
+        self.db.correlationResultEventsAdd(correlationId, [ip_events[1].hash])
+        self.db.correlationResultEventsAdd(correlationId, [])
+
+        self.assertEqual([row[7] for row in self.db.scanCorrelationList('test_instance')], [2])
+
+    def test_init_should_create_summaries_for_existing_database(self):
+        self.storeEventTree()
+        self.db.dbh.execute("DROP TABLE tbl_scan_result_summary")
+        self.db.dbh.execute("DROP TABLE tbl_scan_correlation_summary")
+        self.db.conn.commit()
+
+        other = SpiderFootDb(self.opts)
+        self.assertEqual(other.scanResultEventCount('test_instance'), 6)
+        self.assertEqual(other.scanResultEventCount('test_instance', 'IP_ADDRESS'), 2)
+        other.close()
+
+    def storeSharedValues(self):
+        self.storeEventTree()
+        self.db.scanInstanceCreate('other_instance', 'other scan', 'example.org')
+        root_event = SpiderFootEvent('ROOT', 'example.org', '', None)
+        name_event = SpiderFootEvent('INTERNET_NAME', ' WWW.Example.com', 'sfp_test', root_event)
+        ip_event = SpiderFootEvent('IP_ADDRESS', '10.0.0.9', 'sfp_test', name_event)
+        self.db.scanEventStoreMany('other_instance', [root_event, name_event, ip_event])
+        self.db.scanEventStore('other_instance', SpiderFootEvent('INTERNET_NAME', 'www.example.com', 'sfp_other', root_event))
+        return name_event
+
+    def test_scanValueIndexSearch_should_find_values_shared_by_scans(self):
+        name_event = self.storeSharedValues()
+        scans = ['test_instance', 'other_instance']
+
+        rows = self.db.scanValueIndexSearch(['INTERNET_NAME', 'IP_ADDRESS'], scans, minScans=2)
+        self.assertEqual(
+            [tuple(row[0:3]) + (row[4],) for row in rows],
+            [('www.example.com', 'INTERNET_NAME', 'other_instance', 2),
+             ('www.example.com', 'INTERNET_NAME', 'test_instance', 1)]
+        )
+        self.assertEqual(rows[0][3], name_event.hash)
+
+        rows = self.db.scanValueIndexSearch(['IP_ADDRESS'], scans, minScans=1, maxScans=1)
+        self.assertEqual([row[0] for row in rows], ['10.0.0.0', '10.0.0.1', '10.0.0.9'])
+        self.assertEqual(self.db.scanValueIndexSearch(['ROOT'], scans), [])
+
+    def test_scanValueIndexSearch_should_leave_out_false_positives(self):
+        self.storeSharedValues()
+        scans = ['test_instance', 'other_instance']
+        nameHash = self.db.scanResultEvent('test_instance', 'INTERNET_NAME')[0][8]
+
+        self.db.scanResultsUpdateFP('test_instance', [nameHash], 1)
+        self.assertEqual(self.db.scanValueIndexSearch(['INTERNET_NAME'], scans, minScans=2), [])
+
+        self.db.scanResultsUpdateFP('test_instance', [nameHash], 0)
+        self.assertEqual(len(self.db.scanValueIndexSearch(['INTERNET_NAME'], scans, minScans=2)), 2)
+
+    def test_init_should_create_value_index_for_existing_database(self):
+        self.storeSharedValues()
+        scans = ['test_instance', 'other_instance']
+        expected = self.db.scanValueIndexSearch(['INTERNET_NAME', 'IP_ADDRESS'], scans)
+        self.db.dbh.execute("DROP TABLE tbl_scan_value_index")
+        self.db.conn.commit()
+
+        other = SpiderFootDb(self.opts)
+        self.assertEqual(other.scanValueIndexSearch(['INTERNET_NAME', 'IP_ADDRESS'], scans), expected)
+        other.close()
+
+    def test_scanLogsIter_should_match_scanLogs(self):
+        self.db.scanInstanceCreate('test_instance', 'test scan', 'example.com')
+        for i in range(5):
+            self.db.scanLogEvent('test_instance', 'INFO', f"message {i}")
+        self.assertEqual(list(self.db.scanLogsIter('test_instance', batchSize=2)), self.db.scanLogs('test_instance'))
+
+    def test_iterQuery_should_hold_postgresql_cursor_across_commits(self):
+        from spiderfoot.dbdialect import SpiderFootPostgreSQLDialect
+        self.db.close()
+        self.db.db_type = 'postgresql'
+        self.db.dialect = SpiderFootPostgreSQLDialect()
+        self.db.conn = MagicMock()
+        cursor = self.db.conn.cursor.return_value
+        cursor.fetchmany.side_effect = [[('a',), ('b',)], [('c',)], []]
+
+        rows = self.db._iterQuery("SELECT data FROM tbl_scan_results WHERE scan_instance_id = ?", ['x'], 2, "error")
+        self.assertEqual(next(rows), ('a',))
+        self.assertTrue(self.db.conn.cursor.call_args.kwargs['withhold'])
+        cursor.execute.assert_called_once_with("SELECT data FROM tbl_scan_results WHERE scan_instance_id = %s", ['x'])
+        self.db.conn.commit.assert_called_once()
+
+        self.assertEqual(list(rows), [('b',), ('c',)])
+        cursor.close.assert_called_once()
+        self.assertEqual(self.db.conn.commit.call_count, 2)
+        self.db.conn = None
+
+    def test_createValueIndex_should_fill_postgresql_index_in_one_locked_transaction(self):
+        from spiderfoot.dbdialect import SpiderFootPostgreSQLDialect
+        self.db.close()
+        self.db.db_type = 'postgresql'
+        self.db.dialect = SpiderFootPostgreSQLDialect()
+        self.db.conn = MagicMock()
+        self.db.dbh = MagicMock()
+        self.db.dbh.fetchone.return_value = [0]
+        cursor = self.db.conn.cursor.return_value
+        cursor.fetchmany.side_effect = [[('scan', 'hash', 'INTERNET_NAME', 'example.com', 0)], []]
+
+        with patch.object(self.db, '_scanValueIndexAdd') as add:
+            self.db._createValueIndex()
+
+        queries = [c.args[0] for c in self.db.dbh.execute.call_args_list]
+        self.assertIn("pg_advisory_xact_lock", queries[0])
+        self.assertIn("CREATE TABLE", queries[2])
+        self.assertFalse(self.db.conn.cursor.call_args.kwargs['withhold'])
+        add.assert_called_once_with([('scan', 'hash', 'INTERNET_NAME', 'example.com', 0)])
+        # nothing is committed until the index is filled
+        self.db.conn.commit.assert_called_once()
+        self.db.conn = None
+        self.db.dbh = None
+
+    def test_createValueIndex_should_not_fill_postgresql_index_created_meanwhile(self):
+        from spiderfoot.dbdialect import SpiderFootPostgreSQLDialect
+        self.db.close()
+        self.db.db_type = 'postgresql'
+        self.db.dialect = SpiderFootPostgreSQLDialect()
+        self.db.conn = MagicMock()
+        self.db.dbh = MagicMock()
+        self.db.dbh.fetchone.return_value = [1]
+
+        self.db._createValueIndex()
+
+        self.assertEqual(self.db.dbh.execute.call_count, 2)
+        self.db.conn.cursor.assert_not_called()
+        self.db.conn.commit.assert_called_once()
+        self.db.conn = None
+        self.db.dbh = None
+
+    def test_scanPartitionsDrop_should_detach_partitions_concurrently_before_dropping(self):
+        from spiderfoot.dbdialect import SpiderFootPostgreSQLDialect
+        self.db.close()
+        self.db.db_type = 'postgresql'
+        self.db.dialect = SpiderFootPostgreSQLDialect()
+        self.db.conn = MagicMock()
+        self.db.conn.autocommit = False
+        self.db.dbh = MagicMock()
+        self.db.dbh.fetchone.return_value = [1]
+        self.db.detachConcurrently = True
+        autocommit = []
+        self.db.dbh.execute.side_effect = lambda *a: autocommit.append(self.db.conn.autocommit)
+
+        self.db._scanPartitionsDrop('scan')
+
+        queries = [c.args[0] for c in self.db.dbh.execute.call_args_list]
+        for table in self.db._partitionedTables:
+            partition = self.db._scanPartition(table, 'scan')
+            detach = queries.index(f"ALTER TABLE {table} DETACH PARTITION {partition} CONCURRENTLY")
+            self.assertTrue(autocommit[detach])
+            self.assertLess(detach, queries.index(f"DROP TABLE IF EXISTS {partition}"))
+        self.assertFalse(self.db.conn.autocommit)
+        self.db.conn = None
+        self.db.dbh = None
+
+    def test_scanPartitionsDrop_should_drop_partitions_without_concurrent_detach(self):
+        from spiderfoot.dbdialect import SpiderFootPostgreSQLDialect
+        self.db.close()
+        self.db.db_type = 'postgresql'
+        self.db.dialect = SpiderFootPostgreSQLDialect()
+        self.db.conn = MagicMock()
+        self.db.dbh = MagicMock()
+        self.db.detachConcurrently = False
+
+        self.db._scanPartitionsDrop('scan')
+
+        queries = [c.args[0] for c in self.db.dbh.execute.call_args_list]
+        self.assertEqual(queries, [
+            f"DROP TABLE IF EXISTS {self.db._scanPartition(table, 'scan')}"
+            for table in self.db._partitionedTables
+        ])
+        self.db.conn.commit.assert_not_called()
+        self.db.conn = None
+        self.db.dbh = None
+
+    def storeCorrelatedScan(self):
+        root_event, name_event, ip_events, port_events = self.storeEventTree()
+        self.db.scanConfigSet('test_instance', {'_debug': '0'})
+        self.db.scanLogEvent('test_instance', 'INFO', 'message')
+        self.db.correlationResultCreate(
+            'test_instance', name_event.hash, 'rule_a', 'Rule A', 'descr', 'HIGH', 'rule', 'title', [name_event.hash])
+
+    def test_scanInstanceDelete_should_delete_scan_in_batches(self):
+        self.storeCorrelatedScan()
+        self.db.deleteBatchSize = 2
+        self.assertTrue(self.db.scanInstanceDelete('test_instance'))
+
+        for table, columns, condition in SpiderFootDb._scanTables:
+            with self.subTest(table=table):
+                self.db.dbh.execute(f"SELECT COUNT(*) FROM {table}")
+                self.assertEqual(self.db.dbh.fetchone()[0], 0)
+
+    def test_scanInstanceArchive_should_move_scan_to_archive(self):
+        self.storeCorrelatedScan()
+        expected = {
+            'results': self.db.scanResultEvent('test_instance'),
+            'logs': self.db.scanLogs('test_instance'),
+            'correlations': self.db.scanCorrelationList('test_instance'),
+            'summary': self.db.scanResultSummary('test_instance'),
+            'config': self.db.scanConfigGet('test_instance'),
+        }
+        archivePath = self.opts['__database'] + '.archive'
+        self.addCleanup(os.remove, archivePath)
+
+        self.db.scanInstanceArchive('test_instance', archivePath)
+        self.assertIsNone(self.db.scanInstanceGet('test_instance'))
+        self.assertEqual(self.db.scanResultEvent('test_instance'), [])
+
+        self.db.scanInstanceRestore(archivePath, 'test_instance')
+        self.assertEqual(self.db.scanInstanceGet('test_instance')[0], 'test scan')
+        self.assertEqual(expected, {
+            'results': self.db.scanResultEvent('test_instance'),
+            'logs': self.db.scanLogs('test_instance'),
+            'correlations': self.db.scanCorrelationList('test_instance'),
+            'summary': self.db.scanResultSummary('test_instance'),
+            'config': self.db.scanConfigGet('test_instance'),
+        })
+
+        with self.assertRaises(ValueError):
+            self.db.scanInstanceArchive('test_instance', archivePath)
+        with self.assertRaises(ValueError):
+            self.db.scanInstanceRestore(archivePath, 'missing_instance')
+
+    def test_dbhLock_should_not_block_other_instances(self):
+        import threading
+        other = SpiderFootDb(self.opts)
+        self.assertIsNot(self.db.dbhLock, other.dbhLock)
+
+        listed = threading.Event()
+
+        def listScans():
+            other.scanInstanceList()
+            listed.set()
+
+        with self.db.dbhLock:
+            t = threading.Thread(target=listScans)
+            t.start()
+            self.assertTrue(listed.wait(5))
+        t.join(5)
+        other.close()
+
     def tearDown(self):
         """Clean up after each test."""
         if hasattr(self, 'db') and self.db:
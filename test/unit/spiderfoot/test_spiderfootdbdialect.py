@@ -0,0 +1,99 @@
+import sqlite3
+import unittest
+from unittest.mock import MagicMock, patch
+
+from spiderfoot.dbdialect import SpiderFootDbCursor, SpiderFootDbDialect, SpiderFootPostgreSQLDialect
+
+
+class TestSpiderFootDbDialect(unittest.TestCase):
+
+    def setUp(self):
+        self.sqlite = SpiderFootDbDialect()
+        self.postgresql = SpiderFootPostgreSQLDialect()
+
+    def test_sql_should_not_change_sqlite_queries(self):
+        qry = "SELECT * FROM tbl_scan_results WHERE hash = ? AND data LIKE '%x'"
+        self.assertEqual(self.sqlite.sql(qry), qry)
+
+    def test_sql_should_translate_placeholders_for_postgresql(self):
+        self.assertEqual(
+            self.postgresql.sql("SELECT * FROM t WHERE a = ? AND b = '?' AND c LIKE '%x' LIMIT ?"),
+            "SELECT * FROM t WHERE a = %s AND b = '?' AND c LIKE '%%x' LIMIT %s"
+        )
+
+    def test_regexp_should_match_from_start_on_postgresql(self):
+        self.assertEqual(self.postgresql.regexp('c.data', 'example'), ("c.data ~* ?", ["^(?:example)"]))
+
+    def test_regexp_should_prefilter_with_required_literal_on_sqlite(self):
+        self.assertEqual(
+            self.sqlite.regexp('c.data', r'.*\.example_com(:\d+)?$'),
+            ("(c.data LIKE ? ESCAPE '\\' AND c.data REGEXP ?)", ['%.example\\_com%', r'.*\.example_com(:\d+)?$'])
+        )
+
+    def test_regexp_should_not_prefilter_without_required_literal(self):
+        for pattern in ['foo|bar', '(abc)+', '[a-z]+', 'kiss', '(']:
+            with self.subTest(pattern=pattern):
+                self.assertEqual(self.sqlite.regexp('c.data', pattern), ("c.data REGEXP ?", [pattern]))
+        self.assertEqual(
+            SpiderFootDbDialect(regexPrefilter=False).regexp('c.data', 'example'),
+            ("c.data REGEXP ?", ['example'])
+        )
+
+    def test_insertRows_should_insert_rows_on_sqlite(self):
+        conn = sqlite3.connect(':memory:')
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE t (a INT, b VARCHAR)")
+        self.sqlite.insertRows(cursor, 't', ['a', 'b'], [(1, 'x'), (2, None)])
+        cursor.execute("SELECT a, b FROM t ORDER BY a")
+        self.assertEqual(cursor.fetchall(), [(1, 'x'), (2, None)])
+
+    def test_insertRows_should_copy_rows_on_postgresql(self):
+        cursor = SpiderFootDbCursor(MagicMock(), self.postgresql)
+        copied = list()
+        cursor.cursor.copy_expert.side_effect = lambda qry, buf: copied.append((qry, buf.read()))
+
+        self.postgresql.insertRows(cursor, 't', ['a', 'b'], [(1, 'x\ty'), (2.5, None), (3, 'a\\b\nc')])
+
+        self.assertEqual(copied, [(
+            "COPY t (a, b) FROM STDIN",
+            "1\tx\\ty\n2.5\t\\N\n3\ta\\\\b\\nc\n"
+        )])
+
+    def test_executeMany_should_use_execute_values_on_postgresql(self):
+        cursor = SpiderFootDbCursor(MagicMock(), self.postgresql)
+        rows = [(1, 2), (3, 4)]
+        with patch('psycopg2.extras.execute_values') as execute_values:
+            self.postgresql.executeMany(
+                cursor, "INSERT INTO t (a, b) VALUES (?, ?) ON CONFLICT (a) DO UPDATE SET b = excluded.b", rows)
+        execute_values.assert_called_once_with(
+            cursor.cursor,
+            "INSERT INTO t (a, b) VALUES %s ON CONFLICT (a) DO UPDATE SET b = excluded.b",
+            rows,
+            page_size=self.postgresql.pageSize
+        )
+
+    def test_executeMany_should_translate_other_statements_on_postgresql(self):
+        cursor = SpiderFootDbCursor(MagicMock(), self.postgresql)
+        self.postgresql.executeMany(cursor, "UPDATE t SET b = ? WHERE a = ?", [(1, 2)])
+        cursor.cursor.executemany.assert_called_once_with("UPDATE t SET b = %s WHERE a = %s", [(1, 2)])
+
+    def test_vacuum_should_switch_sqlite_to_incremental_vacuum(self):
+        conn = sqlite3.connect(':memory:')
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE t (a VARCHAR)")
+        self.assertTrue(self.sqlite.vacuum(conn, cursor))
+
+        cursor.execute("PRAGMA auto_vacuum")
+        self.assertEqual(cursor.fetchone()[0], 2)
+        cursor.executemany("INSERT INTO t (a) VALUES (?)", [('x' * 1000,)] * 100)
+        cursor.execute("DELETE FROM t")
+        conn.commit()
+
+        self.assertFalse(self.sqlite.vacuum(conn, cursor))
+        cursor.execute("PRAGMA freelist_count")
+        self.assertEqual(cursor.fetchone()[0], 0)
+
+    def test_cursor_should_not_translate_queries_without_parameters(self):
+        cursor = SpiderFootDbCursor(MagicMock(), self.postgresql)
+        cursor.execute("SELECT '%'")
+        cursor.cursor.execute.assert_called_once_with("SELECT '%'")
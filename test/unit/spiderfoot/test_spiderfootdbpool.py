@@ -0,0 +1,84 @@
+import threading
+from unittest.mock import MagicMock
+
+from spiderfoot import SpiderFootDb, SpiderFootDbPool
+from test.unit.utils.test_base import SpiderFootTestBase
+
+
+class TestSpiderFootDbPool(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.pool = SpiderFootDbPool(self.default_options, maxSize=2, timeout=0.1)
+
+    def tearDown(self):
+        self.pool.close()
+        super().tearDown()
+
+    def test_acquire_should_return_database_handle(self):
+        dbh = self.pool.acquire()
+        self.assertIsInstance(dbh, SpiderFootDb)
+        self.assertEqual(self.pool.size, 1)
+        self.assertEqual(self.pool.idle, 0)
+        self.pool.release(dbh)
+        self.assertEqual(self.pool.idle, 1)
+
+    def test_acquire_should_reuse_released_handle(self):
+        factory = MagicMock(side_effect=lambda: SpiderFootDb(self.default_options))
+        pool = SpiderFootDbPool(self.default_options, factory=factory)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            self.assertIs(first, second)
+        factory.assert_called_once()
+        pool.close()
+
+    def test_acquire_should_time_out_when_pool_is_full(self):
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        self.assertIsNot(first, second)
+        with self.assertRaises(IOError):
+            self.pool.acquire()
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+
+    def test_acquire_should_wait_for_released_handle(self):
+        pool = SpiderFootDbPool(self.default_options, maxSize=1, timeout=5)
+        dbh = pool.acquire()
+        threading.Timer(0.1, pool.release, args=(dbh,)).start()
+        self.assertIs(pool.acquire(), dbh)
+        pool.close()
+
+    def test_acquire_should_replace_broken_idle_handle(self):
+        pool = SpiderFootDbPool(self.default_options, maxIdle=0)
+        dbh = pool.acquire()
+        pool.release(dbh)
+        dbh.dbh.close()
+
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, dbh)
+        self.assertEqual(pool.size, 1)
+        pool.close()
+
+    def test_release_should_roll_back_open_transaction(self):
+        dbh = self.pool.acquire()
+        dbh.dbh.execute("INSERT INTO tbl_scan_config (scan_instance_id, component, opt, val) VALUES ('pool', 'test', 'opt', 'val')")
+        self.assertTrue(dbh.conn.in_transaction)
+        self.pool.release(dbh)
+
+        self.assertFalse(dbh.conn.in_transaction)
+        self.assertEqual(dbh.scanConfigGet('pool'), {})
+
+    def test_release_with_discard_should_close_handle(self):
+        dbh = self.pool.acquire()
+        self.pool.release(dbh, discard=True)
+        self.assertIsNone(dbh.conn)
+        self.assertEqual(self.pool.size, 0)
+
+    def test_close_should_close_idle_handles(self):
+        dbh = self.pool.acquire()
+        self.pool.release(dbh)
+        self.pool.close()
+        self.assertIsNone(dbh.conn)
+        with self.assertRaises(IOError):
+            self.pool.acquire()
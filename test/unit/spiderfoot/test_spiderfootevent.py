@@ -163,6 +163,26 @@ class TestSpiderFootEvent(SpiderFootTestBase):
         self.assertEqual(event_dict['module'], self.event.module)
         self.assertEqual(event_dict['source'], 'target')
 
+    def test_freeze_should_make_event_read_only(self):
+        self.assertFalse(self.event.frozen)
+        self.assertIs(self.event.freeze(), self.event)
+        self.assertTrue(self.event.frozen)
+        with self.assertRaises(AttributeError):
+            self.event.data = "http://example.org"
+        with self.assertRaises(AttributeError):
+            self.event.moduleDataSource = "new_module_data_source"
+        self.assertEqual(self.event.data, self.data)
+
+    def test_copy_should_return_mutable_copy_sharing_source_event(self):
+        self.event.freeze()
+        evt = self.event.copy()
+        self.assertFalse(evt.frozen)
+        self.assertIs(evt.sourceEvent, self.event.sourceEvent)
+        self.assertEqual(evt.hash, self.event.hash)
+        evt.moduleDataSource = "new_module_data_source"
+        self.assertEqual(evt.moduleDataSource, "new_module_data_source")
+        self.assertIsNone(self.event.moduleDataSource)
+
     def tearDown(self):
         """Clean up after each test."""
         super().tearDown()
@@ -0,0 +1,111 @@
+import threading
+
+from spiderfoot import SpiderFootEvent, SpiderFootEventDedup, SpiderFootEventIndex, SpiderFootPlugin
+from test.unit.utils.test_base import SpiderFootTestBase
+
+
+class TestSpiderFootEventIndex(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.index = SpiderFootEventIndex()
+        self.rootEvent = SpiderFootEvent('ROOT', 'example.com', '', None)
+        self.firstEvent = SpiderFootEvent('INTERNET_NAME', 'example.com', 'SpiderFoot UI', self.rootEvent)
+
+    def test_classify_should_ignore_root_events(self):
+        self.assertEqual(self.index.classify(self.rootEvent), SpiderFootEventIndex.NEW)
+        self.assertEqual(self.index.classify(self.rootEvent), SpiderFootEventIndex.NEW)
+        self.assertEqual(len(self.index), 0)
+
+    def test_classify_should_report_first_event_as_new(self):
+        self.assertEqual(self.index.classify(self.firstEvent), SpiderFootEventIndex.NEW)
+        self.assertEqual(self.index.first('INTERNET_NAME', 'EXAMPLE.com'), self.firstEvent.hash)
+        self.assertIsNone(self.index.first('DOMAIN_NAME', 'example.com'))
+
+    def test_classify_should_report_same_type_and_data_as_repeat(self):
+        ipEvent = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_dnsresolve', self.firstEvent)
+        self.index.classify(self.firstEvent)
+        self.index.classify(ipEvent)
+
+        repeat = SpiderFootEvent('INTERNET_NAME', 'Example.COM', 'sfp_dnsresolve', ipEvent)
+        self.assertEqual(self.index.classify(repeat), SpiderFootEventIndex.REPEAT)
+        other = SpiderFootEvent('DOMAIN_NAME', 'example.com', 'sfp_dnsresolve', ipEvent)
+        self.assertEqual(self.index.classify(other), SpiderFootEventIndex.NEW)
+
+    def test_classify_should_report_same_module_and_source_as_duplicate(self):
+        ipEvent = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_dnsresolve', self.firstEvent)
+        duplicate = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_dnsresolve', self.firstEvent)
+        self.assertEqual(self.index.classify(ipEvent), SpiderFootEventIndex.NEW)
+        self.assertEqual(self.index.classify(duplicate), SpiderFootEventIndex.DUPLICATE)
+
+        otherModule = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_other', self.firstEvent)
+        self.assertEqual(self.index.classify(otherModule), SpiderFootEventIndex.NEW)
+
+    def test_classify_should_only_report_repeats_of_ancestors(self):
+        # the same content served at two URLs must reach modules for both
+        contents = []
+        for url in ['https://example.com/a', 'https://example.com/b']:
+            urlEvent = SpiderFootEvent('LINKED_URL_INTERNAL', url, 'sfp_spider', self.firstEvent)
+            self.index.classify(urlEvent)
+            contents.append(SpiderFootEvent('TARGET_WEB_CONTENT', 'Not found', 'sfp_spider', urlEvent))
+        self.assertEqual([self.index.classify(e) for e in contents], [SpiderFootEventIndex.NEW] * 2)
+
+        # the event's own source is not compared, as in the chain walk
+        child = SpiderFootEvent('TARGET_WEB_CONTENT', 'not found', 'sfp_other', contents[0])
+        self.assertEqual(self.index.classify(child), SpiderFootEventIndex.NEW)
+        grandchild = SpiderFootEvent('TARGET_WEB_CONTENT', 'NOT FOUND', 'sfp_other', child)
+        self.assertEqual(self.index.classify(grandchild), SpiderFootEventIndex.REPEAT)
+
+    def test_classify_should_compare_unrecorded_ancestors_by_data(self):
+        ipEvent = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_dnsresolve', self.firstEvent)
+        self.index.classify(SpiderFootEvent('INTERNET_NAME', 'example.com', 'sfp_other', self.rootEvent))
+        repeat = SpiderFootEvent('INTERNET_NAME', 'example.com', 'sfp_dnsresolve', ipEvent)
+        self.assertEqual(self.index.classify(repeat), SpiderFootEventIndex.REPEAT)
+
+    def test_classify_should_report_one_emission_across_threads(self):
+        events = [SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_dnsresolve', self.firstEvent) for _ in range(8)]
+        results = []
+        threads = [threading.Thread(target=lambda e=e: results.append(self.index.classify(e))) for e in events]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(5)
+        self.assertEqual(results.count(SpiderFootEventIndex.NEW), 1)
+        self.assertEqual(results.count(SpiderFootEventIndex.DUPLICATE), 7)
+
+
+class TestSpiderFootEventDedup(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.dedup = SpiderFootEventDedup()
+        self.rootEvent = SpiderFootEvent('ROOT', 'example.com', '', None)
+
+    def test_canonical_should_normalise_host_names_and_addresses(self):
+        self.assertEqual(SpiderFootEventDedup.canonical('INTERNET_NAME', 'WWW.Example.com.'), 'www.example.com')
+        self.assertEqual(SpiderFootEventDedup.canonical('IPV6_ADDRESS', '2001:DB8:0::1'), '2001:db8::1')
+        self.assertEqual(SpiderFootEventDedup.canonical('NETBLOCK_OWNER', '1.2.3.4/24'), '1.2.3.0/24')
+        self.assertEqual(SpiderFootEventDedup.canonical('IP_ADDRESS', 'not an ip'), 'not an ip')
+        self.assertEqual(SpiderFootEventDedup.canonical('HUMAN_NAME', 'Bob Smith'), 'Bob Smith')
+
+    def test_key_should_depend_on_type_and_canonical_data(self):
+        first = SpiderFootEvent('INTERNET_NAME', 'example.com', 'sfp_a', self.rootEvent)
+        same = SpiderFootEvent('INTERNET_NAME', 'EXAMPLE.com.', 'sfp_b', first)
+        otherType = SpiderFootEvent('DOMAIN_NAME', 'example.com', 'sfp_a', self.rootEvent)
+        self.assertEqual(SpiderFootEventDedup.key(first), SpiderFootEventDedup.key(same))
+        self.assertNotEqual(SpiderFootEventDedup.key(first), SpiderFootEventDedup.key(otherType))
+
+    def test_wantsUnique_should_honour_module_setting(self):
+        mod = SpiderFootPlugin()
+        self.assertFalse(SpiderFootEventDedup.wantsUnique(mod, 'IP_ADDRESS'))
+        mod._uniqueEvents = True
+        self.assertTrue(SpiderFootEventDedup.wantsUnique(mod, 'IP_ADDRESS'))
+        mod._uniqueEvents = ['INTERNET_NAME']
+        self.assertTrue(SpiderFootEventDedup.wantsUnique(mod, 'INTERNET_NAME'))
+        self.assertFalse(SpiderFootEventDedup.wantsUnique(mod, 'IP_ADDRESS'))
+
+    def test_firstDelivery_should_track_each_module_separately(self):
+        key = SpiderFootEventDedup.key(SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_a', self.rootEvent))
+        self.assertTrue(self.dedup.firstDelivery('sfp_x', key))
+        self.assertFalse(self.dedup.firstDelivery('sfp_x', key))
+        self.assertTrue(self.dedup.firstDelivery('sfp_y', key))
@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+
+from spiderfoot import SpiderFootEvent, SpiderFootEventQueue, SpiderFootScanActivity
+from test.unit.utils.test_base import SpiderFootTestBase
+
+
+class TestSpiderFootEventQueue(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.activity = SpiderFootScanActivity()
+        self.queue = SpiderFootEventQueue(self.activity)
+
+    def test_put_and_task_done_should_track_events_in_flight(self):
+        self.queue.put('a')
+        self.queue.put('b')
+        self.assertEqual(self.activity.inFlight, 2)
+        self.queue.get()
+        self.assertEqual(self.activity.inFlight, 2)
+        self.queue.task_done()
+        self.assertEqual(self.activity.inFlight, 1)
+
+    def test_activity_should_be_shared_between_queues(self):
+        other = SpiderFootEventQueue(self.activity)
+        self.queue.put('a')
+        other.put('b')
+        self.assertEqual(self.activity.inFlight, 2)
+
+    def test_put_on_full_queue_should_not_count_event(self):
+        bounded = SpiderFootEventQueue(self.activity, maxsize=1)
+        bounded.put('a')
+        with self.assertRaises(queue.Full):
+            bounded.put('b', block=False)
+        self.assertEqual(self.activity.inFlight, 1)
+
+    def test_clear_should_mark_discarded_events_done(self):
+        self.queue.put('a')
+        self.queue.put('b')
+        self.queue.clear()
+        self.assertTrue(self.queue.empty())
+        self.assertEqual(self.activity.inFlight, 0)
+
+    def test_wait_should_return_when_queue_has_items(self):
+        self.queue.put('a')
+        self.assertTrue(self.activity.wait(self.queue, timeout=1))
+
+    def test_wait_should_return_when_idle(self):
+        self.assertTrue(self.activity.wait(self.queue, timeout=1))
+
+    def test_wait_should_time_out_while_events_are_in_flight(self):
+        other = SpiderFootEventQueue(self.activity)
+        other.put('a')
+        self.assertFalse(self.activity.wait(self.queue, timeout=0.05))
+
+    def test_wait_should_wake_when_last_event_is_done(self):
+        other = SpiderFootEventQueue(self.activity)
+        other.put('a')
+        other.get()
+        timer = threading.Timer(0.05, other.task_done)
+        timer.start()
+        self.assertTrue(self.activity.wait(self.queue, timeout=5))
+        timer.join()
+        self.assertEqual(self.activity.inFlight, 0)
+
+    def test_wait_should_wake_once_put_event_can_be_taken(self):
+        other = SpiderFootEventQueue(self.activity)
+        other.put('a')
+        # the count rises before the event is put, but waiters only wake
+        # once it is on the queue
+        self.activity.started()
+        self.assertFalse(self.activity.wait(self.queue, timeout=0.05))
+        self.activity.finished()
+
+        timer = threading.Timer(0.05, self.queue.put, ['b'])
+        timer.start()
+        started = time.monotonic()
+        self.assertTrue(self.activity.wait(self.queue, timeout=5))
+        self.assertLess(time.monotonic() - started, 1)
+        timer.join()
+
+    def test_spilling_queue_should_preserve_order(self):
+        spilling = SpiderFootEventQueue(self.activity, spillsize=2)
+        for i in range(10):
+            spilling.put(i)
+        self.assertEqual(spilling.qsize(), 10)
+        self.assertEqual(spilling.spilled, 8)
+        self.assertEqual([spilling.get_nowait() for _ in range(10)], list(range(10)))
+        self.assertEqual(spilling.spilled, 0)
+
+    def test_spilling_queue_should_never_block(self):
+        spilling = SpiderFootEventQueue(self.activity, maxsize=1, spillsize=1)
+        spilling.put('a', block=False)
+        spilling.put('b', block=False)
+        self.assertEqual(spilling.qsize(), 2)
+
+    def test_spilled_events_should_keep_source_event(self):
+        spilling = SpiderFootEventQueue(self.activity, spillsize=1)
+        root = SpiderFootEvent("ROOT", "example.com", "", None)
+        events = [SpiderFootEvent("INTERNET_NAME", f"host{i}.example.com", "sfp_test", root).freeze() for i in range(3)]
+        for evt in events:
+            spilling.put(evt)
+        spilling.put('FINISHED')
+
+        for evt in events:
+            restored = spilling.get_nowait()
+            self.assertIsInstance(restored, SpiderFootEvent)
+            self.assertEqual(restored.hash, evt.hash)
+            self.assertEqual(restored.data, evt.data)
+            self.assertIs(restored.sourceEvent, root)
+            self.assertTrue(restored.frozen)
+        self.assertEqual(spilling.get_nowait(), 'FINISHED')
+        spilling.close()
@@ -0,0 +1,76 @@
+import threading
+from unittest.mock import MagicMock
+
+from spiderfoot import SpiderFootEvent, SpiderFootEventWriter
+from test.unit.utils.test_base import SpiderFootTestBase
+
+
+class TestSpiderFootEventWriter(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.dbh = MagicMock()
+        self.rootEvent = SpiderFootEvent('ROOT', 'example.com', '', None)
+
+    def events(self, count):
+        return [SpiderFootEvent('IP_ADDRESS', f"10.0.0.{i}", 'sfp_test', self.rootEvent) for i in range(count)]
+
+    def test_flush_should_write_stored_events_in_one_batch(self):
+        writer = SpiderFootEventWriter(self.dbh, 'scan id', 10, batchSize=100, flushInterval=60)
+        events = self.events(5)
+        for event in events:
+            writer.store(event)
+        writer.flush()
+
+        self.dbh.scanEventStoreMany.assert_called_once_with('scan id', events, 10)
+        self.assertEqual(writer.pending, 0)
+
+    def test_store_should_write_full_batches(self):
+        written = threading.Event()
+        self.dbh.scanEventStoreMany.side_effect = lambda *args: written.set()
+        writer = SpiderFootEventWriter(self.dbh, 'scan id', batchSize=3, flushInterval=60)
+        for event in self.events(3):
+            writer.store(event)
+
+        self.assertTrue(written.wait(5))
+        writer.flush()
+
+    def test_store_should_write_events_after_flushInterval(self):
+        written = threading.Event()
+        self.dbh.scanEventStoreMany.side_effect = lambda *args: written.set()
+        writer = SpiderFootEventWriter(self.dbh, 'scan id', batchSize=100, flushInterval=0.1)
+        writer.store(self.events(1)[0])
+
+        self.assertTrue(written.wait(5))
+        writer.flush()
+
+    def test_invalid_event_should_not_prevent_storing_the_rest(self):
+        self.dbh.scanEventStoreMany.side_effect = TypeError('invalid event')
+        self.dbh.scanEventStore.side_effect = [None, ValueError('invalid event'), None]
+        writer = SpiderFootEventWriter(self.dbh, 'scan id', flushInterval=60)
+        for event in self.events(3):
+            writer.store(event)
+        writer.flush()
+
+        self.assertEqual(self.dbh.scanEventStore.call_count, 3)
+
+    def test_flush_should_raise_database_errors(self):
+        self.dbh.scanEventStoreMany.side_effect = IOError('disk full')
+        writer = SpiderFootEventWriter(self.dbh, 'scan id', flushInterval=60)
+        writer.store(self.events(1)[0])
+
+        with self.assertRaises(IOError):
+            writer.flush()
+        # the error is only reported once
+        writer.flush()
+
+    def test_flush_should_pass_failed_events_to_fallback(self):
+        self.dbh.scanEventStoreMany.side_effect = IOError('connection lost')
+        fallback = MagicMock()
+        writer = SpiderFootEventWriter(self.dbh, 'scan id', flushInterval=60, fallback=fallback)
+        events = self.events(2)
+        for event in events:
+            writer.store(event)
+        writer.flush()
+
+        fallback.assert_called_once_with(events)
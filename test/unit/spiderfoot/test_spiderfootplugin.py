@@ -1,7 +1,7 @@
 import unittest
 from unittest.mock import MagicMock, patch
 from spiderfoot.plugin import SpiderFootPlugin
-from spiderfoot import SpiderFootEvent, SpiderFootTarget
+from spiderfoot import SpiderFootEvent, SpiderFootEventIndex, SpiderFootTarget
 import queue
 from test.unit.utils.test_base import SpiderFootTestBase
 from test.unit.utils.test_helpers import safe_recursion
@@ -231,10 +231,21 @@ class TestSpiderFootPlugin(SpiderFootTestBase):
             # Mock checkForStop to return False first time, True second time to exit loop
             with patch.object(self.plugin, 'checkForStop') as mock_checkForStop:
                 mock_checkForStop.side_effect = [False, True]
-                self.plugin.incomingEventQueue.get_nowait.side_effect = ["FINISHED"]
+                self.plugin.incomingEventQueue.get.side_effect = ["FINISHED"]
                 self.plugin.threadWorker()
                 mock_SpiderFootDb.assert_called_once_with(self.plugin.opts)
-                self.plugin.poolExecute.assert_called_once_with(self.plugin.finish)
+                self.plugin.poolExecute.assert_called_once_with(
+                    self.plugin.processQueuedItem, self.plugin.incomingEventQueue, self.plugin.finish)
+
+    def test_processQueuedItem_should_mark_item_done(self):
+        incomingEventQueue = queue.Queue()
+        incomingEventQueue.put("FINISHED")
+        incomingEventQueue.get()
+        callback = MagicMock(side_effect=ValueError)
+        with self.assertRaises(ValueError):
+            self.plugin.processQueuedItem(incomingEventQueue, callback, "arg")
+        callback.assert_called_once_with("arg")
+        self.assertEqual(incomingEventQueue.unfinished_tasks, 0)
 
     def test_poolExecute(self):
         callback = MagicMock()
@@ -288,6 +299,38 @@ class TestSpiderFootPlugin(SpiderFootTestBase):
         self.plugin.notifyListeners(sfEvent)
         listener.handleEvent.assert_not_called()
 
+    def test_notifyListeners_with_eventIndex_should_mark_repeats_storeOnly(self):
+        self.plugin.setEventIndex(SpiderFootEventIndex())
+        self.plugin.outgoingEventQueue = MagicMock()
+        root_event = SpiderFootEvent("ROOT", "root_data", "module", None)
+        first_event = SpiderFootEvent("IP_ADDRESS", "1.2.3.4", "sfp_a", root_event)
+        other_event = SpiderFootEvent("INTERNET_NAME", "example.com", "sfp_a", first_event)
+        repeat_event = SpiderFootEvent("IP_ADDRESS", "1.2.3.4", "sfp_b", other_event)
+        unrelated_event = SpiderFootEvent("IP_ADDRESS", "1.2.3.4", "sfp_c", root_event)
+
+        self.plugin.notifyListeners(first_event)
+        self.plugin.notifyListeners(other_event)
+        self.plugin.notifyListeners(repeat_event)
+        self.plugin.notifyListeners(unrelated_event)
+
+        self.assertEqual(self.plugin.outgoingEventQueue.put.call_count, 4)
+        self.assertFalse(first_event.storeOnly)
+        self.assertTrue(repeat_event.storeOnly)
+        # the same element elsewhere in the scan is not a repeat
+        self.assertFalse(unrelated_event.storeOnly)
+
+    def test_notifyListeners_with_eventIndex_should_drop_duplicates(self):
+        self.plugin.setEventIndex(SpiderFootEventIndex())
+        self.plugin.outgoingEventQueue = MagicMock()
+        root_event = SpiderFootEvent("ROOT", "root_data", "module", None)
+        sfEvent = SpiderFootEvent("IP_ADDRESS", "1.2.3.4", "sfp_a", root_event)
+        duplicate_event = SpiderFootEvent("IP_ADDRESS", "1.2.3.4", "sfp_a", root_event)
+
+        self.plugin.notifyListeners(sfEvent)
+        self.plugin.notifyListeners(duplicate_event)
+
+        self.plugin.outgoingEventQueue.put.assert_called_once_with(sfEvent)
+
     def test_notifyListeners_with_outgoingEventQueue(self):
         self.plugin.outgoingEventQueue = MagicMock()
         sfEvent = SpiderFootEvent("ROOT", "data", "module", None)
@@ -338,7 +381,7 @@ class TestSpiderFootPlugin(SpiderFootTestBase):
             # Mock checkForStop to control loop execution
             with patch.object(self.plugin, 'checkForStop') as mock_checkForStop:
                 mock_checkForStop.side_effect = [False, False, True]  # Allow 2 iterations then exit
-                self.plugin.incomingEventQueue.get_nowait.side_effect = [
+                self.plugin.incomingEventQueue.get.side_effect = [
                     SpiderFootEvent("ROOT", "data", "module", None), "FINISHED"]
                 self.plugin.threadWorker()
                 mock_SpiderFootDb.assert_called_once_with(self.plugin.opts)
@@ -353,7 +396,7 @@ class TestSpiderFootPlugin(SpiderFootTestBase):
             # Mock checkForStop to allow entry into the loop
             with patch.object(self.plugin, 'checkForStop') as mock_checkForStop:
                 mock_checkForStop.return_value = False
-                self.plugin.incomingEventQueue.get_nowait.side_effect = KeyboardInterrupt
+                self.plugin.incomingEventQueue.get.side_effect = KeyboardInterrupt
                 self.plugin.threadWorker()
                 mock_SpiderFootDb.assert_called_once_with(self.plugin.opts)
                 self.plugin.sf.debug.assert_called_once_with(
@@ -0,0 +1,108 @@
+import pickle
+import threading
+from unittest.mock import MagicMock
+
+from spiderfoot import SpiderFootEvent, SpiderFootEventQueue, SpiderFootModuleProxy, SpiderFootModuleShard, SpiderFootPlugin, SpiderFootScanActivity, SpiderFootTarget
+from spiderfoot.shard import _eventStates, _restoreEvents
+from test.unit.utils.test_base import SpiderFootTestBase
+
+
+class TestSpiderFootModuleShard(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.rootEvent = SpiderFootEvent('ROOT', 'example.com', '', None)
+        self.firstEvent = SpiderFootEvent('INTERNET_NAME', 'example.com', 'SpiderFoot UI', self.rootEvent)
+        self.secondEvent = SpiderFootEvent('IP_ADDRESS', '1.2.3.4', 'sfp_test', self.firstEvent)
+
+    def test_eventStates_should_only_send_unknown_source_events(self):
+        sent = dict()
+        states = _eventStates(self.firstEvent, sent)
+        self.assertEqual([s['_eventType'] for s in states], ['ROOT', 'INTERNET_NAME'])
+
+        states = _eventStates(self.secondEvent, sent)
+        self.assertEqual([s['_eventType'] for s in states], ['IP_ADDRESS'])
+        self.assertEqual(_eventStates(self.secondEvent, sent), [])
+        self.assertEqual(set(sent), {'ROOT', self.firstEvent.hash, self.secondEvent.hash})
+
+    def test_restoreEvents_should_rebuild_source_event_chain(self):
+        sent = dict()
+        received = dict()
+        _restoreEvents(pickle.loads(pickle.dumps(_eventStates(self.firstEvent, sent))), received)
+        evt = _restoreEvents(pickle.loads(pickle.dumps(_eventStates(self.secondEvent, sent))), received)
+
+        self.assertEqual(evt.hash, self.secondEvent.hash)
+        self.assertEqual(evt.data, '1.2.3.4')
+        self.assertEqual(evt.sourceEvent.hash, self.firstEvent.hash)
+        self.assertEqual(evt.sourceEvent.sourceEvent.eventType, 'ROOT')
+        self.assertIsNone(evt.sourceEvent.sourceEvent.sourceEvent)
+        self.assertEqual(set(received), set(sent))
+
+    def test_start_should_report_module_setup_failures(self):
+        shard = SpiderFootModuleShard(name='test')
+        try:
+            ready = shard.start(
+                self.default_options,
+                'test scan',
+                SpiderFootTarget('example.com', 'INTERNET_NAME'),
+                None,
+                {'sfp_does_not_exist': dict()}
+            )
+            self.assertEqual(ready, {'sfp_does_not_exist': False})
+            self.assertTrue(shard.alive)
+        finally:
+            shard.shutdown()
+        self.assertFalse(shard.alive)
+
+
+class TestSpiderFootModuleProxy(SpiderFootTestBase):
+
+    def setUp(self):
+        super().setUp()
+        mod = SpiderFootPlugin()
+        mod.__name__ = 'sfp_test'
+        mod.watchedEvents = lambda: ['IP_ADDRESS']
+        self.activity = SpiderFootScanActivity()
+        mod.incomingEventQueue = SpiderFootEventQueue(self.activity)
+        mod.outgoingEventQueue = MagicMock()
+        self.shard = MagicMock(alive=True)
+        self.proxy = SpiderFootModuleProxy(self.shard, mod)
+
+    def tearDown(self):
+        self.proxy._stopScanning = True
+        super().tearDown()
+
+    def test_proxy_should_mirror_module(self):
+        self.assertEqual(self.proxy.__name__, 'sfp_test')
+        self.assertEqual(self.proxy.watchedEvents(), ['IP_ADDRESS'])
+        self.assertFalse(self.proxy.running)
+
+    def test_events_should_be_done_once_handled_remotely(self):
+        forwarded = threading.Event()
+        self.shard.forward.side_effect = lambda modName, item: forwarded.set() or True
+
+        self.proxy.start()
+        self.proxy.incomingEventQueue.put('FINISHED')
+        self.assertTrue(forwarded.wait(5))
+        self.shard.forward.assert_called_once_with('sfp_test', 'FINISHED')
+        self.assertTrue(self.proxy.running)
+        self.assertEqual(self.activity.inFlight, 1)
+
+        self.proxy.remoteDone(False)
+        self.assertFalse(self.proxy.running)
+        self.assertEqual(self.activity.inFlight, 0)
+        # duplicate acknowledgements are ignored
+        self.proxy.remoteDone(False)
+        self.assertEqual(self.activity.inFlight, 0)
+
+    def test_shardLost_should_mark_events_done_and_set_errorState(self):
+        forwarded = threading.Event()
+        self.shard.forward.side_effect = lambda modName, item: forwarded.set() or True
+
+        self.proxy.start()
+        self.proxy.incomingEventQueue.put('FINISHED')
+        self.assertTrue(forwarded.wait(5))
+
+        self.proxy.shardLost()
+        self.assertTrue(self.proxy.errorState)
+        self.assertEqual(self.activity.inFlight, 0)
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import MagicMock, patch
 from spiderfoot.threadpool import SpiderFootThreadPool, ThreadPoolWorker
 import queue
+import threading
 from test.unit.utils.test_base import SpiderFootTestBase
 from test.unit.utils.test_helpers import safe_recursion
 
@@ -110,6 +111,55 @@ class TestSpiderFootThreadPool(SpiderFootTestBase):
         self.pool._stop = True
         self.assertTrue(self.pool.finished)
 
+    def test_map_should_return_all_results(self):
+        def callback(x, y):
+            return x + y
+
+        with SpiderFootThreadPool(threads=3, qsize=2) as pool:
+            results = list(pool.map(callback, range(20), 100, taskName='test_task', saveResult=True))
+        self.assertEqual(sorted(results), list(range(100, 120)))
+
+    def test_submit_should_limit_calls_to_maxThreads(self):
+        release = threading.Event()
+        lock = threading.Lock()
+        active = []
+        peak = []
+
+        def callback():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            release.wait(5)
+            with lock:
+                active.pop()
+
+        self.pool.start()
+        submitter = threading.Thread(
+            target=lambda: [self.pool.submit(callback, taskName='test_task', maxThreads=2) for _ in range(4)])
+        submitter.start()
+        submitter.join(0.5)
+        self.assertTrue(submitter.is_alive())
+        self.assertEqual(self.pool.countQueuedTasks('test_task'), 2)
+        release.set()
+        submitter.join(5)
+        self.pool.shutdown(wait=True)
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(len(peak), 4)
+
+    def test_workers_should_serve_tasks_round_robin(self):
+        order = []
+        for n in range(3):
+            self.pool.submit(order.append, f"a{n}", taskName='a')
+        for n in range(3):
+            self.pool.submit(order.append, f"b{n}", taskName='b')
+        worker = ThreadPoolWorker(pool=self.pool)
+        for _ in range(6):
+            taskName, callback, args, kwargs, saveResult = self.pool.nextTask(worker)
+            callback(*args, **kwargs)
+            self.pool.finishTask(worker)
+        self.assertEqual(order, ['a0', 'b0', 'a1', 'b1', 'a2', 'b2'])
+        self.assertTrue(self.pool.finished)
+
     def test_enter_exit(self):
         with patch.object(self.pool, 'shutdown') as mock_shutdown:
             with self.pool as p:
@@ -135,40 +185,33 @@ class TestThreadPoolWorker(SpiderFootTestBase):
 
     def test_run(self):
         callback = MagicMock()
-        mock_queue = MagicMock()
-        # First call returns a task, second call raises Empty 
-        mock_queue.get_nowait.side_effect = [(callback, (), {}), queue.Empty()]
-        self.pool.inputQueues.values.return_value = [mock_queue]
-        
-        # Use a side effect to stop the worker after one iteration
-        original_stop = self.worker.stop
-        def stop_after_task():
-            self.worker.stop = True
-            return callback.return_value
-        callback.side_effect = stop_after_task
-        
+        # First call returns a task, second call tells the worker to exit
+        self.pool.nextTask.side_effect = [('test_task', callback, ('arg1',), {}, False), None]
+
         self.worker.run()
-        callback.assert_called_once()
+        callback.assert_called_once_with('arg1')
+        self.pool.finishTask.assert_called_once_with(self.worker)
 
     def test_run_with_exception(self):
-        def callback_with_exception(*args, **kwargs):
-            # Stop the worker after raising the exception
-            self.worker.stop = True
-            raise Exception('test exception')
-            
-        callback = MagicMock(side_effect=callback_with_exception)
-        mock_queue = MagicMock()
-        # First call returns a task that will raise exception
-        mock_queue.get_nowait.side_effect = [(callback, (), {}), queue.Empty()]
-        self.pool.inputQueues.values.return_value = [mock_queue]
-        
+        callback = MagicMock(side_effect=Exception('test exception'))
+        self.pool.nextTask.side_effect = [('test_task', callback, (), {}, False), None]
+
         # Mock the worker's logger directly since it's created in __init__
         mock_logger = MagicMock()
         self.worker.log = mock_logger
-        
+
         self.worker.run()
-        # The worker should have logged an error
+        # The worker should have logged an error and carried on
         mock_logger.error.assert_called_once()
+        self.pool.finishTask.assert_called_once_with(self.worker)
+
+    def test_run_should_save_result(self):
+        callback = MagicMock(return_value='result')
+        self.pool.nextTask.side_effect = [('test_task', callback, (), {}, True), None]
+
+        self.worker.run()
+        self.pool.outputQueue.assert_called_once_with('test_task')
+        self.pool.outputQueue.return_value.put.assert_called_once_with('result')
 
     def tearDown(self):
         """Clean up after each test."""
@@ -403,6 +403,17 @@ class TestSpiderFootWebUi(helper.CPWebCase, SpiderFootTestBase):
         result = self.webui.correlationrules()
         self.assertIsInstance(result, list)
 
+    def test_correlationrules_should_read_rule_meta(self):
+        self.webui.config = self.webui.config or {}
+        self.webui.config['__correlationrules__'] = [
+            {'id': 'test_rule', 'meta': {'name': 'Test Rule', 'risk': 'HIGH', 'description': 'descr'},
+             'collections': {'collect': []}, 'headline': 'headline'}
+        ]
+        self.assertEqual(
+            self.webui.correlationrules(),
+            [{'id': 'test_rule', 'name': 'Test Rule', 'risk': 'HIGH', 'description': 'descr'}]
+        )
+
     def test_ping(self):
         result = self.webui.ping()
         self.assertIsInstance(result, list)
@@ -250,6 +250,48 @@ class TestSpiderFoot(SpiderFootTestBase):
         res = sf.fetchUrl("://van1shland.io/")
         self.assertEqual(None, res)
 
+    def fetchUrlAsyncWith(self, handler, *args, **kwargs):
+        import asyncio
+        import httpx
+        sf = SpiderFoot(self.default_options)
+
+        async def fetch():
+            sf._asyncSessions[(False, True)] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await sf.fetchUrlAsync(*args, **kwargs)
+            finally:
+                await sf.closeAsyncSessions()
+
+        return asyncio.run(fetch())
+
+    def test_fetchUrlAsync_headOnly_should_not_follow_redirects(self):
+        import httpx
+
+        def handler(request):
+            if request.url.path == '/old':
+                return httpx.Response(301, headers={'Location': '/new'})
+            return httpx.Response(200, text='new')
+
+        res = self.fetchUrlAsyncWith(handler, "https://van1shland.io/old", headOnly=True)
+        self.assertEqual(res['code'], '301')
+        self.assertEqual(res['realurl'], 'https://van1shland.io/new')
+
+        res = self.fetchUrlAsyncWith(handler, "https://van1shland.io/old")
+        self.assertEqual(res['code'], '200')
+        self.assertEqual(res['realurl'], 'https://van1shland.io/new')
+        self.assertEqual(res['content'], 'new')
+
+    def test_fetchUrlAsync_postData_should_be_sent_as_fetchUrl_sends_it(self):
+        import httpx
+
+        def handler(request):
+            return httpx.Response(200, content=request.content)
+
+        res = self.fetchUrlAsyncWith(handler, "https://van1shland.io/", postData={'a': '1', 'b': '2'})
+        self.assertEqual(res['content'], 'a=1&b=2')
+        res = self.fetchUrlAsyncWith(handler, "https://van1shland.io/", postData='{"a": 1}')
+        self.assertEqual(res['content'], '{"a": 1}')
+
     def setUp(self):
         """Set up before each test."""
         super().setUp()
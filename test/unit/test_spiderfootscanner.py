@@ -271,6 +271,35 @@ class TestSpiderFootScanner(SpiderFootTestBase):
         self.assertIsInstance(scanner, SpiderFootScanner)
         del sys.modules['modules.'+mod_name]
 
+    def test_aborted_scan_should_store_events_already_emitted(self):
+        from modules.sfp__stor_db import sfp__stor_db
+        from spiderfoot import SpiderFootDb, SpiderFootEventWriter
+        import types, sys
+
+        class StoreThenAbort(sfp__stor_db):
+            def handleEvent(self, sfEvent):
+                # hold events until finish(), as a busy scan's writer would
+                if self.writer is None:
+                    self.writer = SpiderFootEventWriter(self.__sfdb__, self.getScanId(), flushInterval=3600)
+                super().handleEvent(sfEvent)
+                if sfEvent.eventType == 'INTERNET_NAME':
+                    self._stopScanning = True
+
+        opts = self.default_options.copy()
+        scan_id = str(uuid.uuid4())
+        mod_name = 'sfp__stor_abort'
+        opts['__modules__'] = dict(opts['__modules__'])
+        opts['__modules__'][mod_name] = {'opts': dict(sfp__stor_db.opts), 'meta': {'name': mod_name}}
+        sys.modules['modules.'+mod_name] = types.SimpleNamespace(**{mod_name: StoreThenAbort})
+        try:
+            scanner = SpiderFootScanner("scan", scan_id, "van1shland.io", "INTERNET_NAME", [mod_name], opts, start=True)
+        finally:
+            del sys.modules['modules.'+mod_name]
+
+        self.assertEqual(scanner.status, "ABORTED")
+        stored = SpiderFootDb(opts).scanResultEvent(scan_id, 'INTERNET_NAME')
+        self.assertEqual([row[1] for row in stored], ["van1shland.io"])
+
     def test_module_enrichTarget_returns_new_target(self):
         opts = self.default_options.copy()
         scan_id = str(uuid.uuid4())
@@ -558,6 +587,39 @@ class TestSpiderFootScanner(SpiderFootTestBase):
         t2.join()
         self.assertEqual(results.count("INITIALIZING"), 2)
 
+    def test_event_router_routes_by_event_type(self):
+        from collections import OrderedDict
+        from spiderfoot import SpiderFootPlugin
+
+        class Watcher(SpiderFootPlugin):
+            def __init__(self, name, watched):
+                super().__init__()
+                self.__name__ = name
+                self._watched = watched
+
+            def watchedEvents(self):
+                return self._watched
+
+        opts = self.default_options.copy()
+        scanner = SpiderFootScanner("scan", str(uuid.uuid4()), "van1shland.io", "INTERNET_NAME", ['sfp_example'], opts, start=False)
+        ip = Watcher('sfp_ip', ['IP_ADDRESS'])
+        both = Watcher('sfp_both', ['IP_ADDRESS', 'INTERNET_NAME'])
+        wildcard = Watcher('sfp_all', ['*'])
+        errored = Watcher('sfp_errored', ['IP_ADDRESS'])
+        errored.errorState = True
+        scanner._SpiderFootScanner__moduleInstances = OrderedDict(
+            (m.__name__, m) for m in (ip, both, wildcard, errored))
+
+        scanner._SpiderFootScanner__buildEventRouter()
+        router = scanner._SpiderFootScanner__eventRouter
+        self.assertEqual(router['IP_ADDRESS'], [ip, both])
+        self.assertEqual(router['INTERNET_NAME'], [both])
+        self.assertEqual(scanner._SpiderFootScanner__wildcardSubscribers, [wildcard])
+
+        scanner._SpiderFootScanner__unrouteModule(both)
+        self.assertEqual(router['IP_ADDRESS'], [ip])
+        self.assertNotIn('INTERNET_NAME', router)
+
 
     def setUp(self):
         """Set up before each test."""